@@ -0,0 +1,295 @@
+"""Asynchronous action dispatch.
+
+Detectors emit small Action objects instead of calling pyautogui inline. A
+background worker executes them through a pluggable backend, merging
+redundant events (consecutive scrolls, repeated key presses, superseded
+cursor moves) whenever it falls behind, so input injection never blocks the
+vision loop.
+"""
+import logging
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# Action kinds
+MOVE = "move"        # args: (x, y)
+CLICK = "click"      # args: ()
+PRESS = "press"      # args: (key,), count = number of presses
+SCROLL = "scroll"    # args: (clicks,)
+ZOOM = "zoom"        # args: (clicks,) - ctrl + scroll
+HOTKEY = "hotkey"    # args: (key, key, ...)
+
+
+class Action:
+    """A single input event waiting to be injected"""
+    __slots__ = ("kind", "args", "count", "timestamp")
+
+    def __init__(self, kind, args=(), count=1, timestamp=None):
+        self.kind = kind
+        self.args = args
+        self.count = count
+        self.timestamp = time.perf_counter() if timestamp is None else timestamp
+
+    def merge(self, other):
+        """Fold a newer action into this pending one if they are redundant"""
+        if self.kind != other.kind:
+            return False
+        if self.kind == MOVE:
+            # Only the latest cursor position matters
+            self.args = other.args
+        elif self.kind in (SCROLL, ZOOM):
+            self.args = (self.args[0] + other.args[0],)
+        elif self.kind == PRESS and self.args == other.args:
+            self.count += other.count
+        else:
+            return False
+        self.timestamp = other.timestamp
+        return True
+
+    def __repr__(self):
+        count = f" x{self.count}" if self.count > 1 else ""
+        return f"{self.kind}{self.args}{count}"
+
+
+class NullBackend:
+    """Discards every action (benchmarks, dry runs)"""
+
+    def __init__(self, screen_size=(1920, 1080)):
+        self.screen_size = screen_size
+
+    def size(self):
+        return self.screen_size
+
+    def position(self):
+        return (self.screen_size[0] // 2, self.screen_size[1] // 2)
+
+    def execute(self, action):
+        pass
+
+
+class RecordingBackend(NullBackend):
+    """Records executed actions with a timestamp from ``clock`` (tests, replay)"""
+
+    def __init__(self, screen_size=(1920, 1080), clock=time.perf_counter):
+        super().__init__(screen_size)
+        self.clock = clock
+        self.actions = []
+
+    def execute(self, action):
+        self.actions.append((self.clock(), action))
+
+
+class PyAutoGUIBackend:
+    """Injects input with PyAutoGUI"""
+
+    def __init__(self):
+        import pyautogui
+        # The dispatcher already runs off the vision loop; PyAutoGUI's built-in
+        # pause after every call would only delay the actions queued behind it
+        pyautogui.PAUSE = 0
+        self.pyautogui = pyautogui
+
+    def size(self):
+        return self.pyautogui.size()
+
+    def position(self):
+        return self.pyautogui.position()
+
+    def execute(self, action):
+        gui = self.pyautogui
+        if action.kind == MOVE:
+            gui.moveTo(action.args[0], action.args[1], duration=0)
+        elif action.kind == CLICK:
+            gui.click()
+        elif action.kind == PRESS:
+            gui.press(action.args[0], presses=action.count)
+        elif action.kind == SCROLL:
+            gui.scroll(action.args[0])
+        elif action.kind == ZOOM:
+            gui.keyDown('ctrl')
+            gui.scroll(action.args[0])
+            gui.keyUp('ctrl')
+        elif action.kind == HOTKEY:
+            gui.hotkey(*action.args)
+
+
+class XdotoolBackend:
+    """Injects input through the xdotool command (X11 without PyAutoGUI)"""
+
+    # pyautogui key names -> X keysyms
+    KEYS = {"esc": "Escape", "left": "Left", "right": "Right", "up": "Up",
+            "down": "Down", "space": "space", "enter": "Return"}
+
+    # One wheel notch per this many pyautogui scroll units (Windows WHEEL_DELTA)
+    SCROLL_UNIT = 120
+
+    def __init__(self):
+        self.xdotool = shutil.which("xdotool")
+        if self.xdotool is None:
+            raise RuntimeError("xdotool backend selected but the xdotool command was not found")
+
+    def _run(self, *args):
+        return subprocess.run([self.xdotool, *args], check=False,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+
+    def _key(self, key):
+        return self.KEYS.get(key, key)
+
+    def _wheel(self, clicks):
+        notches = max(1, round(abs(clicks) / self.SCROLL_UNIT))
+        return ["click", "--repeat", str(notches), "4" if clicks > 0 else "5"]
+
+    def size(self):
+        width, height = self._run("getdisplaygeometry").split()
+        return int(width), int(height)
+
+    def position(self):
+        # Output looks like "x:100 y:200 screen:0 window:123"
+        fields = dict(part.split(":") for part in self._run("getmouselocation").split())
+        return int(fields["x"]), int(fields["y"])
+
+    def execute(self, action):
+        if action.kind == MOVE:
+            self._run("mousemove", str(int(action.args[0])), str(int(action.args[1])))
+        elif action.kind == CLICK:
+            self._run("click", "1")
+        elif action.kind == PRESS:
+            self._run("key", "--repeat", str(action.count), self._key(action.args[0]))
+        elif action.kind == SCROLL:
+            self._run(*self._wheel(action.args[0]))
+        elif action.kind == ZOOM:
+            self._run("keydown", "ctrl", *self._wheel(action.args[0]), "keyup", "ctrl")
+        elif action.kind == HOTKEY:
+            self._run("key", "+".join(self._key(key) for key in action.args))
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "xdotool": XdotoolBackend,
+    "null": NullBackend,
+    "recording": RecordingBackend,
+}
+
+
+def create_backend(name):
+    """Instantiate an output backend by name (see BACKENDS)"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown action backend '{name}', choose from: {', '.join(BACKENDS)}")
+
+
+class ActionDispatcher:
+    """Queues actions and executes them on a background worker thread.
+
+    ``backend`` is a backend instance or the name of one in BACKENDS. Named
+    backends are created (and their modules imported) on first use,
+    ``pyautogui`` by default, and the worker thread starts with the first
+    emitted action. With
+    ``synchronous=True`` actions run immediately on the caller's thread,
+    which keeps replays deterministic.
+    """
+
+    def __init__(self, backend=None, synchronous=False):
+        self._backend = backend
+        self.synchronous = synchronous
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._stopping = False
+        self._cursor = None  # Last requested cursor position
+        self.emitted = 0
+        self.merged = 0
+        self.executed = 0
+
+    @property
+    def backend(self):
+        if self._backend is None or isinstance(self._backend, str):
+            self._backend = create_backend(self._backend or "pyautogui")
+        return self._backend
+
+    def size(self):
+        return self.backend.size()
+
+    def position(self):
+        """Current cursor position, without querying the backend after the first move"""
+        if self._cursor is None:
+            self._cursor = tuple(self.backend.position())
+        return self._cursor
+
+    def emit(self, kind, *args, count=1):
+        action = Action(kind, args, count)
+        self.emitted += 1
+        if kind == MOVE:
+            self._cursor = args
+        if self.synchronous:
+            self._execute(action)
+            return
+        with self._condition:
+            if self._pending and self._pending[-1].merge(action):
+                self.merged += 1
+            else:
+                self._pending.append(action)
+            self._condition.notify()
+        if self._worker is None:
+            self._start()
+
+    # Convenience wrappers mirroring the pyautogui calls they replace
+    def move(self, x, y):
+        self.emit(MOVE, x, y)
+
+    def click(self):
+        self.emit(CLICK)
+
+    def press(self, key, presses=1):
+        self.emit(PRESS, key, count=presses)
+
+    def scroll(self, clicks):
+        self.emit(SCROLL, clicks)
+
+    def zoom(self, clicks):
+        self.emit(ZOOM, clicks)
+
+    def hotkey(self, *keys):
+        self.emit(HOTKEY, *keys)
+
+    def _execute(self, action):
+        try:
+            self.backend.execute(action)
+        except Exception as e:
+            log.warning("Action %r failed: %s", action, e)
+        self.executed += 1
+
+    def _start(self):
+        with self._condition:
+            if self._worker is not None:
+                return
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name="actions", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                action = self._pending.popleft()
+            self._execute(action)
+
+    def stop(self, timeout=1.0):
+        """Execute the remaining queued actions and stop the worker"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def stats(self):
+        return f"{self.emitted} actions emitted, {self.merged} merged, {self.executed} executed"
@@ -1,226 +1,380 @@
-import cv2
-import mediapipe as mp
+import argparse
+import logging
 import time
+import cv2
+from actions import ActionDispatcher, BACKENDS
+from classifier import KNNClassifier
 from controller import Controller
+from cursor import CursorTracker
+from events import attach as attach_events
+from gesture_map import GestureMap
+from idle import IdleGovernor
+from inference import HandDetector
+from keyframes import KeyframeTracker
+from pipeline import Pipeline
+from profiler import StageProfiler, StartupProfiler
+from recorder import SessionRecorder
+from sources import mirror_results, open_source
+from telemetry import DEFAULT_RECORDS, attach as attach_journal
+from views import HeadlessView, InlineView, PreviewRenderer, controller_status
+
+log = logging.getLogger(__name__)
 
-def main():
-    # Initialize MediaPipe with improved settings
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,  # Only detect one hand at a time
-        min_detection_confidence=0.6,  # Slightly lower to improve detection rate
-        min_tracking_confidence=0.6,   # Improved tracking
-        model_complexity=1            # Better accuracy
-    )
-    mp_draw = mp.solutions.drawing_utils
-    mp_drawing_styles = mp.solutions.drawing_styles
-    
-    # Initialize webcam
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print("Error: Cannot open camera. Check if camera is connected.")
-        return
-        
-    # Attempt to set higher resolution for better hand detection
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    
-    # Set window name
-    window_name = "Hand Gesture Video Controller"
-    cv2.namedWindow(window_name)
-    
-    # Variables for FPS calculation
-    previous_time = 0
-    current_time = 0
-    
-    # Variables for UI and status tracking
-    gesture_history = []
-    max_history = 5
-    last_status = "No hand detected"
-    status_stability_counter = 0
-    stability_threshold = 3
-    
+
+def print_guide(controller, headless=False):
     print("\n" + "="*50)
     print("Hand Gesture Video Controller Started!")
     print("="*50)
     print("\nGESTURE GUIDE:")
-    print("- Open palm: Play video")
-    print("- Closed palm: Stop video")
-    print("- Index finger up: Move cursor")
-    print("- Index + Middle fingers up: single click")
-    print("- Index + Middle + Ring fingers up: Zoom in")
-    print("- All four fingers up: Zoom out")
-    print("- Index finger pointing left/right: Timeline backward/forward")
-    print("- Thumb up/down: Scroll up/down")
-    print("- Ring + Pinky fingers up: Fast forward")
-    print("- Index + Pinky fingers up: Go back")
+    for gesture in controller.gesture_map.gestures:
+        print("- " + gesture.description)
     print("="*50)
-    print("Press 'q' to quit, 'r' to reset controller state")
+    if headless:
+        print("Ctrl+C or 'q' + Enter to quit, SIGUSR1 or 'r' + Enter to reset controller state")
+    else:
+        print("Press 'q' to quit, 'r' to reset controller state")
     print("="*50 + "\n")
-    
+
+
+def reset_controller(controller):
+    """Reset controller state"""
+    controller.reset()
+    log.info("Controller state reset")
+
+
+def handle_key(key, controller):
+    """Handle a key press, returning False when the app should quit"""
+    if key == ord('q'):
+        return False
+    elif key == ord('r'):
+        reset_controller(controller)
+    return True
+
+
+def create_detector(args, startup):
+    """Build the hand processor for ``args`` and the idle presence detector, and warm them up"""
+    hands = HandDetector(model_complexity=args.model_complexity, max_num_hands=args.max_hands,
+                         roi=args.roi, roi_margin=args.roi_margin, frame_budget_ms=args.frame_budget)
+    if args.keyframe_interval and args.keyframe_interval > 1:
+        hands = KeyframeTracker(hands, max_interval=args.keyframe_interval)
+    presence = None
+    try:
+        if args.idle_after is not None:
+            presence = HandDetector(model_complexity=0, max_num_hands=1)
+        if args.warm_up:
+            # Graph initialization does not depend on the frame size
+            with startup.step("warm-up"):
+                hands.warm_up(*args.size)
+                if presence is not None:
+                    presence.warm_up(*args.size)
+    except BaseException:
+        hands.close()
+        if presence is not None:
+            presence.close()
+        raise
+    return hands, presence
+
+
+def release_startup(model, source, view=None, actions=None):
+    """Release everything a failed startup created, waiting for its concurrent steps"""
+    if view is not None:
+        view.close()
+    if actions is not None:
+        actions.stop()
+    try:
+        hands, presence = model.result()
+    except Exception:
+        pass  # The step failed and cleaned up after itself
+    else:
+        hands.close()
+        if presence is not None:
+            presence.close()
+    try:
+        cap = source.result()
+    except Exception:
+        cap = None
+    if cap is not None:
+        cap.release()
+
+
+def run_serial(cap, hands, controller, view, recorder=None, profiler=None, mirror=True):
+    """Capture, infer, act and render one frame at a time"""
+    profiler = profiler or StageProfiler(enabled=False)
+    image_rgb = None  # Reused conversion buffer
+
     while cap.isOpened():
-        # Read frame from webcam
-        success, image = cap.read()
+        # Read frame into the source's ring buffer
+        with profiler.stage("capture"):
+            success, image = cap.read()
         if not success:
-            print("Failed to capture image from camera.")
+            if cap.is_file:
+                log.info("End of input.")
+            else:
+                log.error("Failed to capture image from camera.")
             break
-            
-        # Flip the image horizontally for a more intuitive mirror view
-        image = cv2.flip(image, 1)
-        
-        # Improve performance by making image non-writeable
-        image.flags.writeable = False
-        
-        # Convert image to RGB for MediaPipe
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
+
+        with profiler.stage("preprocess"):
+            # Improve performance by making image non-writeable
+            image.flags.writeable = False
+
+            # Convert image to RGB for MediaPipe
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image_rgb)
+
         # Process image with MediaPipe
-        results = hands.process(image_rgb)
-        
+        with profiler.stage("inference"):
+            results = hands.process(image_rgb)
+            if mirror:
+                # Mirror the landmarks, not the image, for intuitive left/right
+                mirror_results(results)
+
         # Make image writeable again for drawing
         image.flags.writeable = True
-        
-        # Calculate FPS
-        current_time = time.time()
-        fps = 1 / (current_time - previous_time) if (current_time - previous_time) > 0 else 0
-        previous_time = current_time
-        
-        # Draw FPS on image
-        cv2.putText(image, f"FPS: {int(fps)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # Reset Controller.hand_Landmarks if no hands detected
-        if not results.multi_hand_landmarks:
-            Controller.hand_Landmarks = None
-            
-        # Draw status text
-        status_text = "No hand detected"
-        status_color = (0, 0, 255)  # Red
-        
-        # Check if hand(s) detected
-        if results.multi_hand_landmarks:
-            # Get first hand detected
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Draw landmarks on image with better visibility
-            mp_draw.draw_landmarks(
-                image, 
-                hand_landmarks, 
-                mp_hands.HAND_CONNECTIONS,
-                mp_drawing_styles.get_default_hand_landmarks_style(),
-                mp_drawing_styles.get_default_hand_connections_style()
-            )
-            
-            # Update controller with hand landmarks
-            Controller.hand_Landmarks = hand_landmarks
-            
-            # Process gestures
-            Controller.process_hand_gestures()
-            
-            # Update status text
-            status_text = "Hand detected"
-            status_color = (0, 255, 0)  # Green
-            
-            # Show active gesture - more comprehensive status
-            active_gestures = []
-            if Controller.playing_video:
-                active_gestures.append("Playing")
-            if Controller.cursor_moving:
-                active_gestures.append("Moving Cursor")
-            if Controller.zooming_in:
-                active_gestures.append("Zooming In")
-            if Controller.zooming_out:
-                active_gestures.append("Zooming Out")
-            if Controller.scrolling_up:
-                active_gestures.append("Scrolling Up")
-            if Controller.scrolling_down:
-                active_gestures.append("Scrolling Down")
-            if Controller.timeline_forward:
-                active_gestures.append("Timeline Forward")
-            if Controller.timeline_backward:
-                active_gestures.append("Timeline Backward")
-            if Controller.fast_forwarding:
-                active_gestures.append("Fast Forward")
-            if Controller.going_back:
-                active_gestures.append("Going Back")
-                
-            if active_gestures:
-                status_text += " - " + ", ".join(active_gestures)
-                
-                # Add to gesture history
-                if active_gestures[0] not in gesture_history:
-                    gesture_history.append(active_gestures[0])
-                    if len(gesture_history) > max_history:
-                        gesture_history.pop(0)
-        
-        # Stabilize status display to avoid flickering
-        if status_text == last_status:
-            status_stability_counter += 1
-        else:
-            status_stability_counter = 0
-            last_status = status_text
-        
-        # Only update displayed status if stable for a few frames
-        if status_stability_counter >= stability_threshold:
-            displayed_status = status_text
-        else:
-            displayed_status = last_status
-            
-        # Draw status text
-        cv2.putText(image, displayed_status, (10, image.shape[0] - 20), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-        
-        # Draw recent gesture history
-        for i, gesture in enumerate(reversed(gesture_history)):
-            cv2.putText(image, gesture, (image.shape[1] - 200, 30 + i * 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        
-        # Draw finger status indicators for debugging
-        if Controller.hand_Landmarks:
-            finger_status = ""
-            if Controller.index_finger_up:
-                finger_status += "I"
-            if Controller.middle_finger_up:
-                finger_status += "M"
-            if Controller.ring_finger_up:
-                finger_status += "R"
-            if Controller.pinky_finger_up:
-                finger_status += "P"
-            if Controller.thumb_up:
-                finger_status += "T"
-                
-            cv2.putText(image, f"Fingers: {finger_status}", (10, 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-                
-        # Show image
-        cv2.imshow(window_name, image)
-        
+
+        with profiler.stage("controller"):
+            # Update every detected hand's state and process gestures
+            present = controller.update(results.multi_hand_landmarks, results.multi_handedness)
+
+            if recorder is not None:
+                recorder.add(controller.clock(), [hand.landmarks for hand in present],
+                             [hand.label for hand in present])
+
+        # Hand the frame to the view (drawn inline, by the preview thread or not at all)
+        view.show(image, results)
+        profiler.frame_done()
+
         # Check for key presses
-        key = cv2.waitKey(5) & 0xFF
-        if key == ord('q'):
+        if not handle_key(view.poll_key(), controller):
             break
-        elif key == ord('r'):
-            # Reset controller state
-            Controller.prev_hand = None
-            Controller.playing_video = False
-            Controller.cursor_moving = False
-            Controller.zooming_in = False
-            Controller.zooming_out = False
-            Controller.scrolling_up = False
-            Controller.scrolling_down = False
-            Controller.fast_forwarding = False
-            Controller.going_back = False
-            Controller.timeline_forward = False
-            Controller.timeline_backward = False
-            print("Controller state reset")
-    
-    # Release resources
-    cap.release()
-    cv2.destroyAllWindows()
+
+
+def run_pipelined(cap, hands, controller, view, recorder=None, profiler=None, mirror=True):
+    """Run capture, inference and rendering as separate stages.
+
+    Capture and inference run on worker threads joined by latest-frame-wins
+    queues, so gestures always act on the newest frame and stale frames are
+    dropped instead of piling up as latency. This thread feeds the view.
+    """
+    profiler = profiler or StageProfiler(enabled=False)
+
+    # Keep the driver-side buffer short so captures are fresh
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    pipeline = Pipeline(cap, hands, controller, recorder=recorder, profiler=profiler, mirror=mirror)
+    pipeline.start()
+    try:
+        while pipeline.running:
+            packet = pipeline.next_result(timeout=0.05)
+            if packet is not None:
+                # Only the snapshot needs the controller; drawing and window I/O run unlocked
+                with pipeline.controller_lock:
+                    status = controller_status(controller)
+                view.show(packet.image, packet.results, packet.latency * 1000.0, status=status)
+                profiler.frame_done()
+
+            # Check for key presses
+            key = view.poll_key()
+            with pipeline.controller_lock:
+                if not handle_key(key, controller):
+                    break
+    finally:
+        pipeline.stop()
+        print("Pipeline " + pipeline.report())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hand Gesture Video Controller")
+    parser.add_argument("--source", default="0",
+                        help="camera index, video file or image directory (default: camera 0)")
+    parser.add_argument("--size", type=int, nargs=2, default=(640, 480), metavar=("W", "H"),
+                        help="requested camera resolution (default 640 480)")
+    parser.add_argument("--no-mirror", dest="mirror", action="store_false",
+                        help="do not mirror the view and landmarks horizontally")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture, inference and rendering on separate threads, dropping stale frames")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="pyautogui",
+                        help="how gesture actions are injected (default: pyautogui)")
+    parser.add_argument("--cursor-min-cutoff", type=float, default=1.0,
+                        help="One Euro minimum cutoff in Hz; lower = less jitter when still")
+    parser.add_argument("--cursor-beta", type=float, default=0.007,
+                        help="One Euro speed coefficient; higher = less lag on fast motion")
+    parser.add_argument("--cursor-lead", type=float, default=0.03,
+                        help="seconds of velocity-based prediction to offset camera/inference latency")
+    parser.add_argument("--gesture-map", metavar="PATH",
+                        help="JSON gesture definitions to use instead of gesture_map.json")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the landmark stream (every hand, with its handedness) to a .npz session for replay.py")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every loop stage and print a p50/p95/p99 summary at exit")
+    parser.add_argument("--hud", action="store_true",
+                        help="draw per-stage timings on the preview window")
+    parser.add_argument("--profile-export", metavar="PATH",
+                        help="periodically write stage timings to PATH (.csv or .json)")
+    parser.add_argument("--profile-interval", type=float, default=5.0,
+                        help="seconds between --profile-export writes (default: 5)")
+    parser.add_argument("--classifier", metavar="PATH",
+                        help="recognize poses with a model trained by classifier.py (threshold rules as fallback)")
+    parser.add_argument("--max-hands", type=int, default=1,
+                        help="number of hands to track; each hand gets its own gesture state (default 1)")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1), default=1,
+                        help="MediaPipe hand model: 0 = lite/faster, 1 = full/more accurate (default: 1)")
+    parser.add_argument("--roi", action="store_true",
+                        help="crop inference to the region around the previous hand detection")
+    parser.add_argument("--roi-margin", type=float, default=0.25,
+                        help="margin added around the hand bounding box, as a fraction of its size")
+    parser.add_argument("--frame-budget", type=float, metavar="MS",
+                        help="switch model_complexity between 0 and 1 to keep inference within MS")
+    parser.add_argument("--keyframe-interval", type=int, metavar="N",
+                        help="run inference at most every N frames, propagating landmarks with optical flow in between")
+    parser.add_argument("--idle-after", type=float, metavar="S",
+                        help="after S seconds without a hand, drop to a low-rate presence detection loop")
+    parser.add_argument("--idle-fps", type=float, default=5.0, metavar="HZ",
+                        help="frame rate of the idle loop (default 5)")
+    parser.add_argument("--idle-width", type=int, default=320, metavar="PX",
+                        help="frame width for idle presence detection (default 320)")
+    parser.add_argument("--idle-motion-threshold", type=float, default=4.0, metavar="T",
+                        help="mean pixel change (0-255) that triggers idle presence detection; 0 = every idle frame")
+    parser.add_argument("--events-socket", metavar="PATH",
+                        help="stream gesture events to local subscribers on this Unix socket")
+    parser.add_argument("--events-port", type=int, metavar="PORT",
+                        help="stream gesture events over a WebSocket on 127.0.0.1:PORT")
+    parser.add_argument("--events-landmarks", action="store_true",
+                        help="include the raw landmarks of every hand in the event stream")
+    parser.add_argument("--events-origin", action="append", default=[], metavar="ORIGIN",
+                        help="allow WebSocket subscribers from this browser origin (repeatable; default: none)")
+    parser.add_argument("--journal", metavar="PATH",
+                        help="record every gesture decision to a memory-mapped telemetry journal (see telemetry.py)")
+    parser.add_argument("--journal-records", type=int, default=DEFAULT_RECORDS, metavar="N",
+                        help=f"journal capacity in records before the oldest are overwritten (default {DEFAULT_RECORDS})")
+    parser.add_argument("--log-level", choices=("debug", "info", "warning", "error"), default="info",
+                        help="console messages to show; debug also logs every repeated gesture action (default info)")
+    parser.add_argument("--no-warm-up", dest="warm_up", action="store_false",
+                        help="skip the warm-up inference, leaving MediaPipe graph initialization to the first frame")
+    display = parser.add_mutually_exclusive_group()
+    display.add_argument("--headless", action="store_true",
+                         help="no window or drawing; quit with Ctrl+C/SIGTERM or 'q', reset with SIGUSR1 or 'r' on stdin")
+    display.add_argument("--preview-fps", type=float, metavar="HZ",
+                         help="render the preview on its own thread at no more than HZ frames/sec")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+
+    # The model (with its warm-up inference), the frame source (webcam by
+    # default) and the output backend initialize concurrently while this
+    # thread builds the controller and the window
+    startup = StartupProfiler()
+    model = startup.submit("model", create_detector, args, startup)
+    source = startup.submit("camera", open_source, args.source, *args.size)
+
+    # Until the loop starts, a failure anywhere must release what was created
+    view = actions = None
+    started = False
+    try:
+        with startup.step("controller"):
+            # Actions are injected off the vision loop by a background worker.
+            # The backend is created by name, so it is imported off this thread,
+            # and the screen is only probed when the cursor first moves.
+            actions = ActionDispatcher(args.backend)
+            backend = startup.submit("backend", lambda: actions.backend)
+            controller = Controller(
+                actions=actions,
+                gesture_map=GestureMap.load(args.gesture_map) if args.gesture_map else None,
+                cursor=CursorTracker(actions.size, min_cutoff=args.cursor_min_cutoff,
+                                     beta=args.cursor_beta, lead=args.cursor_lead),
+                max_hands=args.max_hands,
+                classifier=KNNClassifier.load(args.classifier) if args.classifier else None)
+
+        recorder = SessionRecorder(args.record, max_hands=args.max_hands) if args.record else None
+        profiler = StageProfiler(enabled=args.profile or args.hud or bool(args.profile_export),
+                                 export_path=args.profile_export,
+                                 export_interval=args.profile_interval)
+
+        # Choose how frames are displayed and where 'q'/'r' come from
+        with startup.step("view"):
+            if args.headless:
+                view = HeadlessView()
+            elif args.preview_fps:
+                view = PreviewRenderer(controller, args.preview_fps, profiler, args.hud, args.mirror)
+            else:
+                view = InlineView(controller, profiler, args.hud, args.mirror)
+
+        hands, presence = model.result()
+        backend.result()
+        cap = source.result()
+        if cap is None:
+            log.error("Error: Cannot open video source %s. Check if the camera is connected.", args.source)
+            return
+        started = True
+    finally:
+        if not started:
+            release_startup(model, source, view, actions)
+
+    # From here on everything is released however the loop ends; the
+    # recording is only written when the recorder is closed
+    idle = events = journal = None
+    try:
+        if args.idle_after is not None:
+            # A throttled loop must not read frames that waited in the driver's buffers
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            hands = idle = IdleGovernor(hands, idle_after=args.idle_after, idle_fps=args.idle_fps,
+                                        idle_width=args.idle_width, motion_threshold=args.idle_motion_threshold,
+                                        throttle=not cap.is_file, presence=presence)
+
+        print_guide(controller, args.headless)
+        print(startup.summary())
+        events = attach_events(controller, args.events_socket, args.events_port, args.events_landmarks,
+                               args.events_origin)
+        journal = attach_journal(controller, args.journal, args.journal_records)
+
+        start = time.perf_counter()
+        if args.pipelined:
+            run_pipelined(cap, hands, controller, view, recorder, profiler, args.mirror)
+        else:
+            run_serial(cap, hands, controller, view, recorder, profiler, args.mirror)
+        elapsed = time.perf_counter() - start
+    finally:
+        view.close()
+        if recorder is not None:
+            recorder.close()
+        controller.actions.stop()
+        if events is not None:
+            events.close()
+        if journal is not None:
+            journal.close()
+        hands.close()  # The IdleGovernor also closes its presence detector
+        if idle is None and presence is not None:
+            presence.close()
+        cap.release()
+
+    if cap.is_file and elapsed > 0:
+        print(f"Read {cap.frames} frames from {cap.name} in {elapsed:.2f} s ({cap.frames / elapsed:.1f} frames/sec)")
+    print("Action dispatcher: " + controller.actions.stats())
+    if events is not None:
+        print("Events: " + events.stats())
+    if journal is not None:
+        print("Journal: " + journal.stats())
+    if controller.latency:
+        print(controller.latency_summary())
+
+    if args.profile_export:
+        profiler.export(args.profile_export)
+    if args.profile:
+        print(profiler.summary())
+
+    tracker = idle.hands if idle is not None else hands
+    detector = tracker.detector if isinstance(tracker, KeyframeTracker) else tracker
+    if args.roi or args.frame_budget:
+        print("Inference: " + detector.stats())
+    if detector is not tracker:
+        print("Keyframes: " + tracker.stats())
+    if idle is not None:
+        print("Idle mode: " + idle.stats())
 
 if __name__ == "__main__":
     main()
 
 
 #   venv\Scripts\activate
-#   python app.py
\ No newline at end of file
+#   python app.py
@@ -0,0 +1,378 @@
+"""Performance regression suite on synthetic gesture workloads.
+
+Runs without a camera, a display or pyautogui. The workloads come from
+synthetic.py: one landmark take per gesture in the README table plus an
+idle take, each replayed in several randomized variants through a fresh
+Controller (clock driven by the take's timestamps, actions on a
+NullBackend), and rendered frames (or a recorded clip with --video) for the
+end-to-end loop. Measured:
+
+    controller    us per Controller.update() frame over every take (p50, p99, mean)
+    accuracy      % of take variants whose fired gestures match the script exactly
+    features      us per compute_features() call on one hand
+    cursor        us per Controller.get_position() call
+    motion        us per match_stroke() call on a finished circle stroke
+    allocations   tracemalloc: peak KiB allocated within one controller frame
+                  (p50 and max) and bytes retained per frame
+    end-to-end    capture -> MediaPipe (CPU) -> controller loop of app.py --headless:
+                  frames/sec and per-stage p50 (skipped when MediaPipe is unavailable)
+
+Timings are the median over --repeat runs. ``run`` writes every metric with
+its unit, which direction is better and an absolute noise floor as JSON;
+``compare`` checks results against a baseline and exits with status 1 when
+a metric got worse by more than --threshold percent and its noise floor
+(accuracy by more than --accuracy-threshold points).
+
+Usage:
+    python benchmark.py run [--output results.json] [--variants 5] [--repeat 5] [--no-e2e]
+    python benchmark.py run --video clip.mp4 [--frames 300] [--model-complexity 0]
+    python benchmark.py compare baseline.json [results.json] [--threshold 10]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import synthetic
+from actions import ActionDispatcher, NullBackend
+from controller import Controller
+from features import compute_features
+from gesture_map import GestureMap
+from motion import match_stroke
+
+VERSION = 2
+
+# ``run`` options that define the workload; they are stored with the results,
+# so ``compare`` can re-run exactly the baseline's workload
+WORKLOAD_ARGUMENTS = ("variants", "repeat", "gesture_map", "no_e2e", "video", "frames", "model_complexity")
+
+
+def metric(value, unit, better="lower", noise=0.0):
+    """One measurement; differences within ``noise`` (absolute) never count as regressions"""
+    return {"value": float(value), "unit": unit, "better": better, "noise": noise}
+
+
+def load_workloads(variants):
+    """Every scenario take as [(name, seed, session, expected gestures)]"""
+    return [(name, seed) + synthetic.build(name, seed)
+            for name in synthetic.SCENARIOS for seed in range(variants)]
+
+
+def new_controller(gesture_map, clock):
+    return Controller(actions=ActionDispatcher(NullBackend(), synchronous=True), gesture_map=gesture_map,
+                      clock=lambda: clock[0], max_hands=1)
+
+
+def replay(session, gesture_map, frame_times=None):
+    """Feed one take through a fresh Controller; returns the gestures that fired, in order"""
+    clock = [float(session.timestamps[0])]
+    controller = new_controller(gesture_map, clock)
+    fired = []
+    for i in range(len(session)):
+        clock[0] = float(session.timestamps[i])
+        hands = [session.landmarks[i]] if session.present[i] else None
+        start = time.perf_counter()
+        controller.update(hands)
+        if frame_times is not None:
+            frame_times.append(time.perf_counter() - start)
+        # A held or continuous gesture repeats; count each activation once
+        for _, gesture in controller.fired:
+            if not fired or fired[-1] != gesture.name:
+                fired.append(gesture.name)
+    return fired
+
+
+def bench_controller(workloads, gesture_map, repeat):
+    """Per-take gesture accuracy, then per-frame controller timings"""
+    # The accuracy pass is untimed, and doubles as a warm-up for the timed runs
+    scenarios = {}
+    for name, seed, session, expected in workloads:
+        fired = replay(session, gesture_map)
+        result = scenarios.setdefault(name, {"expected": list(expected), "passed": 0, "variants": 0,
+                                             "failures": []})
+        result["variants"] += 1
+        if tuple(fired) == tuple(expected):
+            result["passed"] += 1
+        else:
+            result["failures"].append({"seed": seed, "fired": fired})
+
+    runs = []
+    for _ in range(repeat):
+        frame_times = []
+        for _, _, session, _ in workloads:
+            replay(session, gesture_map, frame_times)
+        times = np.asarray(frame_times) * 1e6
+        runs.append((np.percentile(times, 50), np.percentile(times, 99), times.mean()))
+    p50, p99, mean = np.median(runs, axis=0)
+    frames = len(frame_times)
+    passed = sum(r["passed"] for r in scenarios.values())
+    total = sum(r["variants"] for r in scenarios.values())
+    metrics = {
+        "controller_p50_us": metric(p50, "us", noise=2.0),
+        "controller_p99_us": metric(p99, "us", noise=10.0),
+        "controller_mean_us": metric(mean, "us", noise=2.0),
+        "accuracy": metric(100.0 * passed / total, "%", better="higher"),
+    }
+    return metrics, scenarios, frames
+
+
+def _per_call_us(function, calls, repeat):
+    """Median over ``repeat`` runs of the mean time of ``calls`` calls"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        runs.append((time.perf_counter() - start) / calls * 1e6)
+    return float(np.median(runs))
+
+
+def bench_components(gesture_map, repeat, calls=2000):
+    """Feature extraction, cursor mapping and stroke matching in isolation"""
+    session, _ = synthetic.build("cursor")
+    hand = session.landmarks[session.present][:1].copy()  # (1, 21, 3), as the controller batches it
+
+    clock = [0.0]
+    controller = new_controller(gesture_map, clock)
+    points = session.landmarks[session.present][:, 8, :2].tolist()
+    state = {"i": 0}
+
+    def cursor():
+        i = state["i"] = state["i"] + 1
+        clock[0] = i / synthetic.FPS
+        x, y = points[i % len(points)]
+        controller.get_position(x, y)
+
+    # A slightly uneven full circle, as a finished stroke reaches match_stroke()
+    rng = np.random.default_rng(0)
+    angles = np.linspace(0.0, 2.0 * math.pi, 26)
+    stroke = np.stack((np.cos(angles), np.sin(angles), np.zeros_like(angles)), axis=1)
+    stroke[:, :2] += rng.normal(0.0, 0.03, (len(angles), 2))
+
+    return {
+        "features_us": metric(_per_call_us(lambda: compute_features(hand), calls, repeat), "us", noise=1.0),
+        "cursor_us": metric(_per_call_us(cursor, calls, repeat), "us", noise=1.0),
+        "motion_match_us": metric(_per_call_us(lambda: match_stroke(stroke, turning=2.0 * math.pi),
+                                                calls // 4, repeat), "us", noise=5.0),
+    }
+
+
+def bench_allocations(workloads, gesture_map):
+    """Bytes allocated per controller frame, traced in steady state"""
+    session = synthetic.concatenate([w[2] for w in workloads])
+    clock = [0.0]
+    controller = new_controller(gesture_map, clock)
+
+    def feed(offset, peaks=None):
+        for i in range(len(session)):
+            clock[0] = offset + float(session.timestamps[i])
+            hands = [session.landmarks[i]] if session.present[i] else None
+            if peaks is None:
+                controller.update(hands)
+                continue
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            controller.update(hands)
+            peaks[i] = tracemalloc.get_traced_memory()[1] - before
+
+    # One untraced pass fills caches and latency windows; then trace a second
+    feed(0.0)
+    controller.reset()
+    peaks = np.zeros(len(session))  # Preallocated, so the measurement allocates nothing per frame
+    offset = float(session.timestamps[-1]) + 10.0
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        feed(offset, peaks)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    peaks /= 1024.0
+    return {
+        "alloc_peak_p50_kib": metric(np.percentile(peaks, 50), "KiB", noise=0.5),
+        "alloc_peak_max_kib": metric(peaks.max(), "KiB", noise=4.0),
+        "alloc_retained_b": metric(retained / len(session), "B", noise=16.0),
+    }
+
+
+def bench_end_to_end(args, gesture_map):
+    """Throughput of the serial capture/inference/controller loop; returns (metrics, note)"""
+    from app import run_serial
+    from inference import HandDetector
+    from profiler import StageProfiler
+    from sources import open_source
+    from views import HeadlessView
+
+    try:
+        hands = HandDetector(model_complexity=args.model_complexity)
+        start = time.perf_counter()
+        hands.warm_up()
+        warm_up = time.perf_counter() - start
+    except Exception as e:  # MediaPipe missing, or a build without the solutions API
+        return {}, f"skipped: MediaPipe unavailable ({e})"
+
+    if args.video:
+        cap = open_source(args.video)
+        if cap is None:
+            raise SystemExit(f"Cannot open {args.video}")
+        source = args.video
+    else:
+        session = synthetic.concatenate([synthetic.build(name)[0] for name in synthetic.SCENARIOS], gap=0.5)
+        cap = synthetic.SyntheticSource(session, limit=args.frames)
+        source = cap.name
+
+    controller = Controller(actions=ActionDispatcher(NullBackend()), gesture_map=gesture_map)
+    profiler = StageProfiler(window=max(args.frames, 300))
+    start = time.perf_counter()
+    try:
+        run_serial(cap, hands, controller, HeadlessView(), profiler=profiler)
+    finally:
+        elapsed = time.perf_counter() - start
+        cap.release()
+        hands.close()
+        controller.actions.stop()
+
+    metrics = {
+        "e2e_fps": metric(cap.frames / elapsed, "fps", better="higher", noise=1.0),
+        "e2e_warm_up_ms": metric(warm_up * 1000.0, "ms", noise=50.0),
+    }
+    for name, row in profiler.stats().items():
+        if name != profiler.FRAME:
+            metrics[f"e2e_{name}_p50_ms"] = metric(row["p50_ms"], "ms", noise=0.2)
+    return metrics, f"{cap.frames} frames from {source}, model complexity {args.model_complexity}"
+
+
+def machine():
+    return {"platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version(), "numpy": np.__version__,
+            "opencv": cv2.__version__}
+
+
+def run(args):
+    gesture_map = GestureMap.load(args.gesture_map) if args.gesture_map else GestureMap.load()
+    workloads = load_workloads(args.variants)
+
+    metrics, scenarios, frames = bench_controller(workloads, gesture_map, args.repeat)
+    metrics.update(bench_components(gesture_map, args.repeat))
+    metrics.update(bench_allocations(workloads, gesture_map))
+    end_to_end = "skipped: --no-e2e"
+    if not args.no_e2e:
+        e2e_metrics, end_to_end = bench_end_to_end(args, gesture_map)
+        metrics.update(e2e_metrics)
+
+    return {
+        "version": VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": machine(),
+        "workload": {"takes": len(workloads), "frames": frames, "end_to_end": end_to_end,
+                     "arguments": {name: getattr(args, name) for name in WORKLOAD_ARGUMENTS}},
+        "metrics": metrics,
+        "scenarios": scenarios,
+    }
+
+
+def format_results(results):
+    lines = [f"{'metric':<24}{'value':>12}  unit"]
+    for name, m in results["metrics"].items():
+        lines.append(f"{name:<24}{m['value']:>12.2f}  {m['unit']}")
+    workload = results["workload"]
+    lines.append(f"{workload['takes']} takes, {workload['frames']} frames; end-to-end {workload['end_to_end']}")
+    for name, result in results["scenarios"].items():
+        for failure in result["failures"]:
+            lines.append(f"FAILED {name} (seed {failure['seed']}): fired {failure['fired'] or 'nothing'}, "
+                         f"expected {result['expected'] or 'nothing'}")
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold=10.0, accuracy_threshold=0.0):
+    """Per-metric comparison lines and the names of metrics that regressed"""
+    lines = [f"{'metric':<24}{'baseline':>12}{'current':>12}{'change':>9}"]
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        now = current["metrics"].get(name)
+        if now is None:
+            lines.append(f"{name:<24}{base['value']:>12.2f}{'-':>12}  missing")
+            continue
+        # Positive ``worse`` means a change in the bad direction
+        worse = now["value"] - base["value"]
+        if base["better"] == "higher":
+            worse = -worse
+        if base["unit"] == "%":
+            allowed = max(accuracy_threshold, base["noise"])
+        else:
+            allowed = max(abs(base["value"]) * threshold / 100.0, base["noise"])
+        change = (now["value"] - base["value"]) / abs(base["value"]) * 100.0 if base["value"] else 0.0
+        flag = ""
+        if worse > allowed:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif -worse > allowed:
+            flag = "  improved"
+        lines.append(f"{name:<24}{base['value']:>12.2f}{now['value']:>12.2f}{change:>+8.1f}%{flag}")
+    if baseline["workload"].get("arguments") != current["workload"].get("arguments"):
+        lines.append("Note: the results were run with different workload options than the baseline")
+    if baseline.get("machine") != current.get("machine"):
+        lines.append("Note: baseline was recorded on a different machine or software versions")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the gesture pipeline on synthetic workloads")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write the results as JSON")
+    run_parser.add_argument("--output", metavar="PATH", help="write the results here")
+    run_parser.add_argument("--variants", type=int, default=5, help="randomized variants per take (default 5)")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timing runs; the median is kept (default 5)")
+    run_parser.add_argument("--gesture-map", metavar="PATH", help="gesture map to benchmark")
+    run_parser.add_argument("--no-e2e", action="store_true", help="skip the end-to-end MediaPipe loop")
+    run_parser.add_argument("--video", metavar="PATH", help="run the end-to-end loop on this clip or image directory")
+    run_parser.add_argument("--frames", type=int, default=300, help="synthetic frames for the end-to-end loop")
+    run_parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1))
+    compare_parser = commands.add_parser("compare", help="check results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results", nargs="?", help="results to check (default: run the suite now)")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, metavar="PCT",
+                                help="percent a timing or allocation may worsen (default 10)")
+    compare_parser.add_argument("--accuracy-threshold", type=float, default=0.0, metavar="PTS",
+                                help="percentage points accuracy may drop (default 0)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    if args.command == "run":
+        results = run(args)
+        print(format_results(results))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("version") != VERSION:
+        parser.error(f"{args.baseline} has results format {baseline.get('version')}, expected {VERSION}; "
+                     "record a new baseline")
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        # Re-run the baseline's workload exactly
+        current = run(argparse.Namespace(**baseline["workload"]["arguments"]))
+    lines, regressions = compare(baseline, current, args.threshold, args.accuracy_threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
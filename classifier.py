@@ -0,0 +1,315 @@
+"""Learned pose classifier on normalized hand landmarks.
+
+The threshold rules in features.py compare raw normalized image coordinates,
+so they drift with hand size and distance from the camera. This module maps
+the 21 landmarks to a scale- and rotation-normalized feature vector (wrist
+at the origin, palm length 1, wrist->middle knuckle pointing up) plus the
+hand's orientation, and classifies it with a k-nearest-neighbour model
+that runs in plain NumPy.
+
+Labels are gesture names from the gesture map (gestures sharing a finger
+pose, such as "play" and "zoom_out", are interchangeable) or "none". At run
+time the predicted gesture replaces the finger-mask lookup and geometric
+predicates; state predicates such as playing/not_playing still apply.
+Frames below ``min_confidence`` fall back to the threshold rules.
+
+Training data are recorded sessions (app.py --record) in which one pose is
+held for the whole recording, given on the command line as LABEL=PATH.
+
+Usage:
+    python classifier.py train model.npz cursor=index.npz click=two.npz none=idle.npz
+    python classifier.py evaluate model.npz cursor=index_far.npz click=two_far.npz
+"""
+import argparse
+import time
+
+import numpy as np
+
+from features import INDEX_BASE, MIDDLE_BASE, NUM_LANDMARKS, PINKY_BASE, WRIST
+
+NONE = "none"
+FEATURE_SIZE = (NUM_LANDMARKS - 1) * 3 + 2
+
+
+def normalize_landmarks(landmarks):
+    """(N, 21, 3) landmarks -> (N, FEATURE_SIZE) float32 scale/rotation-normalized features"""
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+    points = landmarks - landmarks[:, WRIST:WRIST + 1]
+
+    # Palm length: wrist to middle knuckle, averaged with the knuckle span for
+    # stability when the palm is foreshortened
+    palm = points[:, MIDDLE_BASE, :2]
+    span = points[:, INDEX_BASE, :2] - points[:, PINKY_BASE, :2]
+    scale = np.maximum(np.linalg.norm(palm, axis=1) + np.linalg.norm(span, axis=1), 1e-6)
+    points /= scale[:, None, None]
+
+    # Rotate so the palm axis points up (negative y in image coordinates)
+    angle = np.arctan2(palm[:, 0], -palm[:, 1])
+    cos, sin = np.cos(angle), np.sin(angle)
+    x, y = points[..., 0].copy(), points[..., 1].copy()
+    points[..., 0] = x * cos[:, None] - y * sin[:, None]
+    points[..., 1] = x * sin[:, None] + y * cos[:, None]
+
+    # Orientation is kept as a separate feature so direction-dependent
+    # gestures (pointing left/right, thumb up/down) remain learnable
+    features = np.empty((len(points), FEATURE_SIZE), dtype=np.float32)
+    features[:, :-2] = points[:, 1:].reshape(len(points), -1)
+    features[:, -2] = cos
+    features[:, -1] = sin
+    return features
+
+
+class KNNClassifier:
+    """k-nearest-neighbour classifier over standardized feature vectors"""
+
+    def __init__(self, k=5, min_confidence=0.6):
+        self.k = k
+        self.min_confidence = min_confidence
+        self.classes = []
+        self.samples = None
+        self.targets = None
+        self.mean = None
+        self.std = None
+        self._sq_norms = None
+
+    def fit(self, landmarks, labels, max_per_class=None, seed=0):
+        """Train on (N, 21, 3) landmarks and N string labels"""
+        labels = np.asarray(labels)
+        self.classes = sorted(set(labels.tolist()))
+        targets = np.searchsorted(self.classes, labels)
+        features = normalize_landmarks(landmarks)
+
+        if max_per_class:
+            # Keep the model small (and inference fast) by subsampling large classes
+            rng = np.random.default_rng(seed)
+            keep = np.concatenate([
+                rng.permutation(np.flatnonzero(targets == c))[:max_per_class]
+                for c in range(len(self.classes))])
+            features, targets = features[keep], targets[keep]
+
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0) + 1e-6
+        self._set_samples((features - self.mean) / self.std, targets)
+        return self
+
+    def _set_samples(self, samples, targets):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.targets = targets.astype(np.int32)
+        self._sq_norms = (self.samples ** 2).sum(axis=1)
+
+    def predict(self, landmarks):
+        """Return (labels, confidences) for a (21, 3) hand or an (N, 21, 3) batch.
+
+        Confidence is the fraction of the k neighbours voting for the label.
+        """
+        queries = (normalize_landmarks(landmarks) - self.mean) / self.std
+        # Squared distances via one matrix product: |s|^2 - 2 s.q (+ |q|^2, constant per query)
+        distances = self._sq_norms[None, :] - 2.0 * (queries @ self.samples.T)
+        k = min(self.k, len(self.samples))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        votes = np.zeros((len(queries), len(self.classes)), dtype=np.int32)
+        np.add.at(votes, (np.arange(len(queries))[:, None], self.targets[nearest]), 1)
+        best = votes.argmax(axis=1)
+        confidences = votes[np.arange(len(queries)), best] / k
+        return [self.classes[i] for i in best], confidences
+
+    def save(self, path):
+        np.savez(path, samples=self.samples, targets=self.targets, classes=np.array(self.classes),
+                 mean=self.mean, std=self.std, k=self.k, min_confidence=self.min_confidence)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            model = cls(k=int(data["k"]), min_confidence=float(data["min_confidence"]))
+            model.classes = data["classes"].tolist()
+            model.mean, model.std = data["mean"], data["std"]
+            model._set_samples(data["samples"], data["targets"])
+        return model
+
+
+def load_labeled_sessions(specs, trim=0.5):
+    """Load LABEL=PATH session specs into (landmarks, labels, session index of each frame).
+
+    ``trim`` seconds are dropped from both ends of each session, where the
+    hand is still moving into or out of the pose.
+    """
+    from recorder import load_session
+
+    landmarks, labels, sessions = [], [], []
+    for spec in specs:
+        label, sep, path = spec.partition("=")
+        if not sep:
+            raise ValueError(f"Expected LABEL=PATH, got {spec!r}")
+        session = load_session(path)
+        keep = session.present.copy()
+        if len(session):
+            t = session.timestamps - session.timestamps[0]
+            keep &= (t >= trim) & (t <= session.duration - trim)
+        landmarks.append(session.landmarks[keep])
+        labels.extend([label] * int(keep.sum()))
+        sessions.extend([len(landmarks) - 1] * int(keep.sum()))
+    if not labels:
+        raise ValueError("No labeled frames found")
+    return np.concatenate(landmarks), np.array(labels), np.array(sessions)
+
+
+def held_out_split(labels, sessions, test_fraction, gap=15):
+    """Split frames into (fit, test) index arrays without leaking neighbouring frames.
+
+    Consecutive frames of a held pose are nearly identical, so a random frame
+    split scores the model on copies of its training data. A label recorded
+    in several sessions holds out its last whole sessions. A label with a
+    single session holds out the last block of its frames, and up to ``gap``
+    frames before that block are used for neither side.
+    """
+    fit, test = [], []
+    for label in np.unique(labels):
+        mine = [np.flatnonzero((labels == label) & (sessions == s)) for s in np.unique(sessions[labels == label])]
+        wanted = test_fraction * sum(len(frames) for frames in mine)
+        if wanted <= 0:
+            fit.extend(mine)
+        elif len(mine) > 1:
+            held = 0
+            # Hold out sessions from the end until the fraction is reached, keeping at least one to fit
+            while len(mine) > 1 and held < wanted:
+                held += len(mine[-1])
+                test.append(mine.pop())
+            fit.extend(mine)
+        else:
+            frames = mine[0]
+            n_test = max(1, int(round(wanted)))
+            # Short sessions shrink the gap, so at least half the remaining frames are fitted
+            skip = min(gap, (len(frames) - n_test) // 2)
+            test.append(frames[len(frames) - n_test:])
+            fit.append(frames[:len(frames) - n_test - skip])
+    empty = np.zeros(0, dtype=np.intp)
+    return (np.concatenate(fit) if fit else empty), (np.concatenate(test) if test else empty)
+
+
+def threshold_predict(gesture_map, landmarks):
+    """Poses the threshold rules (the fallback) produce, as gesture names.
+
+    Only geometric predicates are checked, so the result does not depend on
+    playback or other hand state.
+    """
+    from features import compute_features
+    from gesture_map import PREDICATES
+
+    features = compute_features(landmarks)
+    names = []
+    for i in range(len(landmarks)):
+        hand_features = features[i]
+        name = NONE
+        for gesture in gesture_map.table[int(features.mask[i])]:
+            if all(PREDICATES[p](hand_features, None) for p in gesture.pose[2]):
+                name = gesture.name
+                break
+        names.append(name)
+    return names
+
+
+def canonical(gesture_map, name):
+    """Map a label to the first gesture with the same pose (e.g. zoom_out -> play)"""
+    if name == NONE:
+        return NONE
+    pose = gesture_map[name].pose
+    return next(g.name for g in gesture_map.gestures if g.pose == pose and g.motion is None)
+
+
+def confusion_matrix(truth, predicted, classes):
+    index = {c: i for i, c in enumerate(classes)}
+    matrix = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    for t, p in zip(truth, predicted):
+        matrix[index[t], index[p]] += 1
+    return matrix
+
+
+def format_confusion(matrix, classes):
+    width = max(8, max(len(c) for c in classes) + 1)
+    lines = ["true \\ predicted".ljust(width) + "".join(c[:width - 1].rjust(width) for c in classes)]
+    for c, row in zip(classes, matrix):
+        lines.append(c.ljust(width) + "".join(str(v).rjust(width) for v in row))
+    return "\n".join(lines)
+
+
+def evaluate(model, gesture_map, landmarks, labels):
+    """Print a confusion matrix, accuracy against the threshold rules and us/frame"""
+    truth = [canonical(gesture_map, label) for label in labels]
+    predicted, confidences = model.predict(landmarks)
+    predicted = [canonical(gesture_map, p) for p in predicted]
+    thresholds = [canonical(gesture_map, p) for p in threshold_predict(gesture_map, landmarks)]
+    # What the app does: classifier, or threshold rules on low confidence
+    combined = [p if c >= model.min_confidence else t
+                for p, c, t in zip(predicted, confidences, thresholds)]
+
+    classes = sorted(set(truth) | set(predicted) | set(combined))
+    print(format_confusion(confusion_matrix(truth, combined, classes), classes))
+    for name, result in (("classifier", predicted), ("with fallback", combined),
+                         ("threshold rules", thresholds)):
+        accuracy = np.mean([t == p for t, p in zip(truth, result)])
+        print(f"Accuracy ({name}): {100.0 * accuracy:.1f}% of {len(truth)} frames")
+    print(f"Low-confidence frames (threshold fallback): {100.0 * np.mean(confidences < model.min_confidence):.1f}%")
+
+    # Single-frame latency, as used in the live loop
+    repeats = min(len(landmarks), 500)
+    start = time.perf_counter()
+    for i in range(repeats):
+        model.predict(landmarks[i])
+    per_frame = (time.perf_counter() - start) / repeats
+    print(f"Inference: {per_frame * 1e6:.1f} us/frame ({len(model.samples)} reference samples, k={model.k})")
+
+
+def main(argv=None):
+    from gesture_map import DEFAULT_PATH, GestureMap
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the landmark pose classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="train a model from labeled sessions")
+    train.add_argument("model", help="output .npz model")
+    train.add_argument("sessions", nargs="+", metavar="LABEL=PATH")
+    train.add_argument("--k", type=int, default=5)
+    train.add_argument("--min-confidence", type=float, default=0.6,
+                       help="below this vote share the threshold rules are used (default 0.6)")
+    train.add_argument("--max-per-class", type=int, default=400,
+                       help="subsample each class to at most this many reference frames (default 400)")
+    train.add_argument("--test-fraction", type=float, default=0.2,
+                       help="fraction of each label held out for the evaluation report, as whole sessions "
+                            "or the end of a single session (default 0.2)")
+
+    evaluate_parser = sub.add_parser("evaluate", help="evaluate a model on labeled sessions")
+    evaluate_parser.add_argument("model")
+    evaluate_parser.add_argument("sessions", nargs="+", metavar="LABEL=PATH")
+
+    for p in (train, evaluate_parser):
+        p.add_argument("--gesture-map", default=DEFAULT_PATH, metavar="PATH")
+        p.add_argument("--trim", type=float, default=0.5,
+                       help="seconds dropped at both ends of each session (default 0.5)")
+    args = parser.parse_args(argv)
+
+    gesture_map = GestureMap.load(args.gesture_map)
+    landmarks, labels, sessions = load_labeled_sessions(args.sessions, args.trim)
+    unknown = sorted(set(labels.tolist()) - {g.name for g in gesture_map.gestures} - {NONE})
+    if unknown:
+        parser.error(f"unknown labels {', '.join(unknown)}; use gesture names or '{NONE}'")
+    motions = sorted(set(labels.tolist()) & {g.name for g in gesture_map.gestures if g.motion is not None})
+    if motions:
+        parser.error(f"motion gestures are recognized from the hand's trajectory, not trained: {', '.join(motions)}")
+
+    if args.command == "train":
+        fit, test = held_out_split(labels, sessions, args.test_fraction)
+        n_test = len(test)
+        model = KNNClassifier(args.k, args.min_confidence).fit(
+            landmarks[fit], labels[fit], max_per_class=args.max_per_class)
+        model.save(args.model)
+        print(f"Trained on {len(fit)} frames, {len(model.classes)} classes: {', '.join(model.classes)}")
+        print(f"Saved {args.model}")
+        if n_test:
+            print(f"\nHeld-out evaluation ({n_test} frames):")
+            evaluate(model, gesture_map, landmarks[test], labels[test])
+    else:
+        evaluate(KNNClassifier.load(args.model), gesture_map, landmarks, labels)
+
+
+if __name__ == "__main__":
+    main()
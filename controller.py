@@ -1,321 +1,286 @@
-import pyautogui
 import time
-import math
+import numpy as np
+from actions import ActionDispatcher
+from cursor import CursorTracker
+from features import compute_features, landmarks_to_array, NUM_LANDMARKS, WRIST
+from gesture_map import GestureMap
+from motion import MotionTracker
+from profiler import RollingWindow
+
+
+class HandState:
+    """Per-hand state: landmarks, finger flags and gesture activation.
+
+    One instance exists per tracked hand, keyed by MediaPipe handedness
+    ("Left"/"Right"). __slots__ keeps it compact and attribute access fast.
+    """
+    __slots__ = (
+        "key", "label", "landmarks", "features", "present", "last_seen", "others",
+        "index_finger_up", "middle_finger_up", "ring_finger_up", "pinky_finger_up", "thumb_up",
+        "finger_mask", "open_palm", "closed_palm",
+        "gesture", "fired", "mask", "playing_at_onset", "last_fired",
+        "candidate", "candidate_since", "candidate_frames", "missing_frames", "missing_since", "onset",
+        "motion", "consumed", "confidence", "suppressed",
+    )
+
+    def __init__(self, key, label, gesture_count):
+        self.key = key
+        self.label = label
+        self.landmarks = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.last_fired = [float("-inf")] * gesture_count
+        self.motion = MotionTracker()   # Palm trajectory for dynamic gestures (see motion.py)
+        self.reset()
+
+    def reset(self):
+        self.features = None
+        self.present = False
+        self.last_seen = float("-inf")
+        self.others = 0            # Other hands present in the same frame
+        self.index_finger_up = self.middle_finger_up = self.ring_finger_up = None
+        self.pinky_finger_up = self.thumb_up = None
+        self.finger_mask = 0
+        self.open_palm = self.closed_palm = None
+        self.gesture = None        # Active gesture (after enter/exit hysteresis)
+        self.fired = False         # Whether the active gesture has fired since it began
+        self.candidate = None      # Gesture resolved from this frame alone
+        self.candidate_since = 0.0  # When the candidate was first seen (pose onset)
+        self.candidate_frames = 0
+        self.missing_frames = 0    # Consecutive frames the active gesture was not seen
+        self.missing_since = 0.0
+        self.onset = 0.0           # Pose onset of the active gesture
+        self.consumed = None       # Pose used by a dynamic gesture; static gestures wait for a new one
+        self.confidence = float("nan")  # Classifier confidence of this frame's pose (NaN: threshold rules)
+        self.suppressed = False    # Whether the active gesture's cooldown already held it back
+        self.motion.reset()
+        self.mask = None           # Finger pose the playback state was latched for
+        self.playing_at_onset = False
+        self.last_fired[:] = [float("-inf")] * len(self.last_fired)
+
+    def is_active(self, flag):
+        """True while a fired gesture with this ``flag`` is held"""
+        return self.fired and self.gesture is not None and self.gesture.flag == flag
+
+    @property
+    def cursor_moving(self):
+        return self.fired and self.gesture is not None and self.gesture.moves_cursor
+
+    @property
+    def finger_status(self):
+        """Fingers up as letters, e.g. "IM" for index + middle"""
+        return "".join(letter for letter, up in zip("IMRPT", (
+            self.index_finger_up, self.middle_finger_up, self.ring_finger_up,
+            self.pinky_finger_up, self.thumb_up)) if up)
+
+    def __repr__(self):
+        return f"HandState({self.key!r}, gesture={self.gesture!r})"
+
 
 class Controller:
-    # Static variables for tracking state
-    prev_hand = None
-    last_gesture_time = 0
-    
-    # Gesture states
-    playing_video = False
-    cursor_moving = False
-    zooming_in = False
-    zooming_out = False
-    scrolling_up = False
-    scrolling_down = False
-    fast_forwarding = False
-    going_back = False
-    timeline_forward = False
-    timeline_backward = False
-    
-    # Hand landmarks from MediaPipe
-    hand_Landmarks = None
-    
-    # Finger status indicators
-    index_finger_up = None
-    middle_finger_up = None
-    ring_finger_up = None
-    pinky_finger_up = None
-    thumb_up = None
-    
-    # Combined finger states
-    open_palm = None
-    closed_palm = None
-    
-    # Screen size for mapping coordinates
-    screen_width, screen_height = pyautogui.size()
-    
-    # Gesture cooldown in seconds - reduced for more responsive control
-    GESTURE_COOLDOWN = 0.3
-
-    @staticmethod
-    def update_fingers_status():
-        """Update the status of all fingers based on current hand landmarks with improved detection"""
-        if Controller.hand_Landmarks is None:
-            return
-            
-        # Improved finger up/down detection with better thresholds
-        # For each finger, compare tip (knuckle) position with base position
-        # A finger is considered "up" if its tip is significantly higher than its base
-        
-        # Define threshold for clearer detection
-        threshold = 0.07
-        
-        # Check if fingers are up (tip position is higher than base position)
-        Controller.index_finger_up = Controller.hand_Landmarks.landmark[8].y < (Controller.hand_Landmarks.landmark[5].y - threshold)
-        Controller.middle_finger_up = Controller.hand_Landmarks.landmark[12].y < (Controller.hand_Landmarks.landmark[9].y - threshold)
-        Controller.ring_finger_up = Controller.hand_Landmarks.landmark[16].y < (Controller.hand_Landmarks.landmark[13].y - threshold)
-        Controller.pinky_finger_up = Controller.hand_Landmarks.landmark[20].y < (Controller.hand_Landmarks.landmark[17].y - threshold)
-        
-        # Thumb is special as it moves more horizontally
-        # Detect if thumb is extended away from palm
-        thumb_tip = Controller.hand_Landmarks.landmark[4]
-        thumb_base = Controller.hand_Landmarks.landmark[2]
-        wrist = Controller.hand_Landmarks.landmark[0]
-        
-        # Calculate Euclidean distance between thumb tip and wrist
-        # compared to distance between thumb base and wrist
-        thumb_tip_dist = math.sqrt((thumb_tip.x - wrist.x)**2 + (thumb_tip.y - wrist.y)**2)
-        thumb_base_dist = math.sqrt((thumb_base.x - wrist.x)**2 + (thumb_base.y - wrist.y)**2)
-        
-        # Thumb is "up" if its tip is significantly farther from wrist than its base
-        Controller.thumb_up = thumb_tip_dist > (thumb_base_dist * 1.2)
-        
-        # Combined finger states with improved reliability
-        Controller.open_palm = (Controller.index_finger_up and 
-                               Controller.middle_finger_up and 
-                               Controller.ring_finger_up and 
-                               Controller.pinky_finger_up)
-        
-        Controller.closed_palm = (not Controller.index_finger_up and 
-                                 not Controller.middle_finger_up and 
-                                 not Controller.ring_finger_up and 
-                                 not Controller.pinky_finger_up)
-    
-    @staticmethod
-    def get_position(hand_x_position, hand_y_position):
-        """Convert hand position to screen position with improved smoothing"""
-        old_x, old_y = pyautogui.position()
-        current_x = int(hand_x_position * Controller.screen_width)
-        current_y = int(hand_y_position * Controller.screen_height)
-
-        # Increased sensitivity for easier movement
-        ratio = 1.5
-        Controller.prev_hand = (current_x, current_y) if Controller.prev_hand is None else Controller.prev_hand
-        
-        # Calculate movement delta
-        delta_x = current_x - Controller.prev_hand[0]
-        delta_y = current_y - Controller.prev_hand[1]
-        
-        # Apply smoothing - more aggressive for small movements, less for large movements
-        smoothing = 0.5 if max(abs(delta_x), abs(delta_y)) < 20 else 0.8
-        
-        # Update previous hand position with smoothing
-        Controller.prev_hand = [
-            Controller.prev_hand[0] + delta_x * smoothing,
-            Controller.prev_hand[1] + delta_y * smoothing
-        ]
-        
-        # Calculate new cursor position
-        current_x, current_y = old_x + delta_x * ratio, old_y + delta_y * ratio
-
-        # Boundary checks with buffer
-        threshold = 10
-        if current_x < threshold:
-            current_x = threshold
-        elif current_x > Controller.screen_width - threshold:
-            current_x = Controller.screen_width - threshold
-        if current_y < threshold:
-            current_y = threshold
-        elif current_y > Controller.screen_height - threshold:
-            current_y = Controller.screen_height - threshold
-
-        return (current_x, current_y)
-    
-    @staticmethod
-    def is_cooldown_passed():
-        """Check if enough time has passed since the last gesture activation"""
-        current_time = time.time()
-        if current_time - Controller.last_gesture_time >= Controller.GESTURE_COOLDOWN:
-            Controller.last_gesture_time = current_time
-            return True
-        return False
-    
-    @staticmethod
-    def detect_cursor_movement():
-        """Only move cursor if index finger is up and others are down"""
-        if Controller.index_finger_up and not Controller.middle_finger_up and not Controller.ring_finger_up and not Controller.pinky_finger_up:
-            # Using index finger tip for movement
-            point = 8  # Index finger tip
-            current_x, current_y = Controller.hand_Landmarks.landmark[point].x, Controller.hand_Landmarks.landmark[point].y
-            x, y = Controller.get_position(current_x, current_y)
-            pyautogui.moveTo(x, y, duration=0)
-            Controller.cursor_moving = True
-            print("Moving Cursor")
-        else:
-            Controller.cursor_moving = False
-    
-    @staticmethod
-    def detect_play_stop():
-        """Open palm to play video, closed palm to stop video"""
-        if Controller.open_palm and not Controller.playing_video and Controller.is_cooldown_passed():
-            pyautogui.press('space')  # Play video
-            Controller.playing_video = True
-            print("Playing Video")
-        elif Controller.closed_palm and Controller.playing_video and Controller.is_cooldown_passed():
-            pyautogui.press('space')  # Stop video
-            Controller.playing_video = False
-            print("Stopping Video")
-    
-    @staticmethod
-    def detect_single_click():
-        """Index and middle fingers up for single click"""
-        single_click_condition = (Controller.index_finger_up and 
-                                Controller.middle_finger_up and 
-                                not Controller.ring_finger_up and 
-                                not Controller.pinky_finger_up)
-    
-        if single_click_condition and Controller.is_cooldown_passed():
-            # Single click at current cursor position
-            pyautogui.click()
-            print("Clicking")
-
-    
-    @staticmethod
-    def detect_zoom():
-        """
-        Index, middle, ring fingers up for zoom in
-        All four fingers up for zoom out
-        """
-        zoom_in_condition = (Controller.index_finger_up and 
-                            Controller.middle_finger_up and 
-                            Controller.ring_finger_up and 
-                            not Controller.pinky_finger_up)
-        
-        zoom_out_condition = Controller.open_palm
-        
-        if zoom_in_condition and not Controller.zooming_in and Controller.is_cooldown_passed():
-            pyautogui.keyDown('ctrl')
-            pyautogui.scroll(120)  # Zoom in
-            pyautogui.keyUp('ctrl')
-            Controller.zooming_in = True
-            print("Zooming In")
-        elif not zoom_in_condition:
-            Controller.zooming_in = False
-            
-        if zoom_out_condition and not Controller.zooming_out and Controller.is_cooldown_passed():
-            pyautogui.keyDown('ctrl')
-            pyautogui.scroll(-120)  # Zoom out
-            pyautogui.keyUp('ctrl')
-            Controller.zooming_out = True
-            print("Zooming Out")
-        elif not zoom_out_condition:
-            Controller.zooming_out = False
-    
-    @staticmethod
-    def detect_timeline_navigation():
-        """
-        Index finger pointing left for backward timeline 
-        Index finger pointing right for forward timeline
-        Improved detection using the direction of the pointing index finger
-        """
-        if Controller.index_finger_up and not Controller.middle_finger_up and not Controller.ring_finger_up and not Controller.pinky_finger_up:
-            # Get wrist, index base and tip positions to determine pointing direction more accurately
-            wrist_x = Controller.hand_Landmarks.landmark[0].x
-            index_base_x = Controller.hand_Landmarks.landmark[5].x
-            index_tip_x = Controller.hand_Landmarks.landmark[8].x
-            
-            # Calculate direction vector
-            base_to_tip_x = index_tip_x - index_base_x
-            
-            # Stronger thresholds for more reliable detection
-            pointing_left = base_to_tip_x < -0.05
-            pointing_right = base_to_tip_x > 0.05
-            
-            if pointing_left and not Controller.timeline_backward and Controller.is_cooldown_passed():
-                pyautogui.press('left')  # Go backward in timeline
-                Controller.timeline_backward = True
-                print("Timeline Backward")
-            elif not pointing_left:
-                Controller.timeline_backward = False
-                
-            if pointing_right and not Controller.timeline_forward and Controller.is_cooldown_passed():
-                pyautogui.press('right')  # Go forward in timeline
-                Controller.timeline_forward = True
-                print("Timeline Forward")
-            elif not pointing_right:
-                Controller.timeline_forward = False
-    
-    @staticmethod
-    def detect_scroll():
-        """
-        Thumb up for scroll up
-        Thumb down for scroll down
-        With improved detection of thumb orientation
-        """
-        thumb_tip_y = Controller.hand_Landmarks.landmark[4].y
-        thumb_base_y = Controller.hand_Landmarks.landmark[2].y
-        
-        thumb_pointing_up = thumb_tip_y < thumb_base_y - 0.05
-        thumb_pointing_down = thumb_tip_y > thumb_base_y + 0.05
-        
-        if thumb_pointing_up and not Controller.scrolling_up and Controller.is_cooldown_passed():
-            pyautogui.scroll(150)  # Increased scroll amount for better visibility
-            Controller.scrolling_up = True
-            print("Scrolling Up")
-        elif not thumb_pointing_up:
-            Controller.scrolling_up = False
-            
-        if thumb_pointing_down and not Controller.scrolling_down and Controller.is_cooldown_passed():
-            pyautogui.scroll(-150)  # Increased scroll amount for better visibility
-            Controller.scrolling_down = True
-            print("Scrolling Down")
-        elif not thumb_pointing_down:
-            Controller.scrolling_down = False
-    
-    @staticmethod
-    def detect_fast_forward():
-        """Ring and pinky fingers up for fast forward"""
-        fast_forward_condition = (not Controller.index_finger_up and 
-                                 not Controller.middle_finger_up and 
-                                 Controller.ring_finger_up and 
-                                 Controller.pinky_finger_up)
-        
-        if fast_forward_condition and not Controller.fast_forwarding and Controller.is_cooldown_passed():
-            # Try multiple fast forward shortcuts as they vary by video player
-            pyautogui.press('f')  # Common shortcut for full screen
-            pyautogui.press('l')  # YouTube fast forward
-            pyautogui.press('right', presses=5)  # Multiple right presses for bigger jumps
-            
-            Controller.fast_forwarding = True
-            print("Fast Forward")
-        elif not fast_forward_condition:
-            Controller.fast_forwarding = False
-    
-    @staticmethod
-    def detect_go_back():
-        """Index and pinky fingers up for go back event"""
-        go_back_condition = (Controller.index_finger_up and 
-                            not Controller.middle_finger_up and 
-                            not Controller.ring_finger_up and 
-                            Controller.pinky_finger_up)
-        
-        if go_back_condition and not Controller.going_back and Controller.is_cooldown_passed():
-            # Try multiple back shortcuts
-            pyautogui.press('esc')  # Common shortcut for back/cancel
-            pyautogui.hotkey('alt', 'left')  # Browser back
-            
-            Controller.going_back = True
-            print("Going Back")
-        elif not go_back_condition:
-            Controller.going_back = False
-    
-    @staticmethod
-    def process_hand_gestures():
-        """Main method to process all hand gestures"""
-        if Controller.hand_Landmarks is None:
-            return
-            
-        # Update finger statuses first
-        Controller.update_fingers_status()
-        
-        # Process gestures in order of priority
-        Controller.detect_play_stop()
-        Controller.detect_cursor_movement()
-        Controller.detect_single_click()
-        Controller.detect_zoom()
-        Controller.detect_timeline_navigation()
-        Controller.detect_scroll()
-        Controller.detect_fast_forward()
-        Controller.detect_go_back()
\ No newline at end of file
+    """Turns detected hands into gestures and actions.
+
+    ``update()`` runs once per frame over all detected hands: landmarks are
+    packed into one (N, 21, 3) array, features are computed in a single
+    vectorized pass, and each hand's gesture is resolved against its own
+    HandState. Playback state and the screen cursor are shared; the first
+    hand to start a cursor gesture owns the cursor until it lets go.
+    """
+
+    def __init__(self, actions=None, gesture_map=None, cursor=None, clock=time.time,
+                 max_hands=2, forget_after=1.0, match_radius=0.15, classifier=None, publisher=None,
+                 journal=None):
+        # Detectors emit actions here; a background worker injects them (see actions.py)
+        self.actions = actions or ActionDispatcher()
+
+        # Gesture definitions compiled into a finger-mask lookup table
+        self.gesture_map = gesture_map or GestureMap.load()
+
+        # Optional learned pose classifier (see classifier.py); the threshold
+        # rules decide when it is absent or not confident
+        self.classifier = classifier
+        if classifier is not None:
+            names = {g.name for g in self.gesture_map.gestures} | {"none"}
+            unknown = sorted(set(classifier.classes) - names)
+            if unknown:
+                raise ValueError(f"Classifier labels not in the gesture map: {', '.join(unknown)}")
+
+        # Clock used for cooldowns; replay swaps in the recorded timestamps
+        self.clock = clock
+
+        # Filtered, predictive cursor state (see cursor.py); the screen is
+        # probed through the output backend when the cursor first moves
+        self.cursor = cursor or CursorTracker(self.actions.size)
+        self.cursor_owner = None
+
+        self.max_hands = max_hands
+        self.forget_after = forget_after    # Seconds before an absent hand's state is dropped
+        self.match_radius = match_radius    # Max wrist travel to keep a hand whose label flipped
+
+        # Tracked hands by key, and the ones present this frame in detection order
+        self.hands = {}
+        self.present_hands = []
+        self._landmark_buffer = np.empty((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+
+        # Shared state toggled by gestures ("sets" in the gesture map)
+        self.playing_video = False
+
+        # Pose onset -> first action latency per gesture name (seconds)
+        self.latency = {}
+
+        # Gestures fired this frame as (hand, gesture), and an optional
+        # subscriber stream that receives every frame (see events.py)
+        self.fired = []
+        self.publisher = publisher
+
+        # Optional memory-mapped record of every gesture decision (see telemetry.py)
+        self.journal = journal
+
+    @property
+    def primary(self):
+        """The first hand detected this frame, or None"""
+        return self.present_hands[0] if self.present_hands else None
+
+    def _labels(self, multi_handedness, count):
+        if not multi_handedness:
+            return ["Hand"] * count
+        return [h.classification[0].label if hasattr(h, "classification") else str(h)
+                for h in multi_handedness[:count]]
+
+    def _match(self, labels, batch):
+        """Assign each detection to a HandState (same label, nearest wrist)"""
+        claimed = []
+        for i, label in enumerate(labels):
+            wrist = batch[i, WRIST, :2]
+            best, best_distance = None, float("inf")
+            for hand in self.hands.values():
+                if hand in claimed:
+                    continue
+                distance = float(np.linalg.norm(hand.landmarks[WRIST, :2] - wrist))
+                # Prefer the same handedness; accept a flipped label only for a
+                # hand that was just seen at nearly the same place
+                if hand.label != label and (not hand.present or distance > self.match_radius):
+                    continue
+                distance += 0.0 if hand.label == label else self.match_radius
+                if distance < best_distance:
+                    best, best_distance = hand, distance
+            if best is None:
+                key = label
+                n = 1
+                while key in self.hands:
+                    n += 1
+                    key = f"{label}-{n}"
+                best = self.hands[key] = HandState(key, label, len(self.gesture_map.gestures))
+            claimed.append(best)
+        return claimed
+
+    def update(self, multi_hand_landmarks, multi_handedness=None):
+        """Process one frame of detections (landmark lists or (21, 3) arrays)"""
+        now = self.clock()
+        self.fired.clear()
+        count = min(len(multi_hand_landmarks or ()), self.max_hands)
+        present = []
+        if count:
+            # Convert every hand once and derive all features in one vectorized pass
+            batch = self._landmark_buffer[:count]
+            for i in range(count):
+                landmarks_to_array(multi_hand_landmarks[i], batch[i])
+            features = compute_features(batch)
+            present = self._match(self._labels(multi_handedness, count), batch)
+
+            fingers_up = features.fingers_up.tolist()
+            thumb_up = features.thumb_up.tolist()
+            finger_mask = features.finger_mask.tolist()
+            mask = features.mask.tolist()
+            open_palm = features.open_palm.tolist()
+            closed_palm = features.closed_palm.tolist()
+            track_motion = bool(self.gesture_map.motions)
+            if track_motion:
+                palm_center = features.palm_center.tolist()
+                palm_size = features.palm_size.tolist()
+            labels = [None] * count
+            confidences = [float("nan")] * count
+            if self.classifier is not None:
+                predicted, confidences = self.classifier.predict(batch)
+                confidences = confidences.tolist()
+                labels = [label if confidence >= self.classifier.min_confidence else None
+                          for label, confidence in zip(predicted, confidences)]
+            for i, hand in enumerate(present):
+                np.copyto(hand.landmarks, batch[i])
+                hand.features = features[i]
+                hand.present = True
+                hand.last_seen = now
+                hand.others = count - 1
+                hand.index_finger_up, hand.middle_finger_up, hand.ring_finger_up, hand.pinky_finger_up = fingers_up[i]
+                hand.thumb_up = thumb_up[i]
+                hand.finger_mask = finger_mask[i]
+                hand.open_palm = open_palm[i]
+                hand.closed_palm = closed_palm[i]
+                hand.confidence = confidences[i]
+                if track_motion:
+                    hand.motion.update(now, palm_center[i][0], palm_center[i][1], palm_size[i])
+
+        for hand in list(self.hands.values()):
+            if hand in present:
+                continue
+            if hand.present:
+                hand.present = False
+                hand.motion.reset()
+                self._release_cursor(hand)
+            if now - hand.last_seen > self.forget_after:
+                del self.hands[hand.key]
+
+        # Resolve each hand to a single gesture through the compiled table
+        for i, hand in enumerate(present):
+            was_moving = hand.cursor_moving
+            self.gesture_map.update(self, hand, mask[i], hand.features, now, labels[i])
+            if was_moving and not hand.cursor_moving:
+                self._release_cursor(hand)
+        self.present_hands = present
+        if self.publisher is not None:
+            self.publisher.publish(self)
+        return present
+
+    def record_latency(self, gesture, seconds):
+        """Record the time from a gesture's pose onset to its first action"""
+        window = self.latency.get(gesture.name)
+        if window is None:
+            window = self.latency[gesture.name] = RollingWindow(300)
+        window.add(seconds)
+
+    def latency_summary(self):
+        """Per-gesture pose-onset-to-action latency, one line per gesture that fired"""
+        lines = []
+        for name, window in sorted(self.latency.items()):
+            stats = window.stats()
+            lines.append(f"{name:<18} {stats['count']:>6} {stats['mean_ms']:8.1f} "
+                         f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f}")
+        if lines:
+            lines.insert(0, f"{'gesture':<18} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8}  (ms, onset to action)")
+        return "\n".join(lines)
+
+    def _release_cursor(self, hand):
+        if self.cursor_owner == hand.key:
+            self.cursor.release()
+            self.cursor_owner = None
+
+    def get_position(self, hand_x_position, hand_y_position):
+        """Convert hand position to screen position with One Euro smoothing and prediction"""
+        return self.cursor.update(hand_x_position, hand_y_position,
+                                  self.clock(), origin=self.actions.position)
+
+    def move_cursor(self, hand):
+        """Move the cursor to follow the index finger tip of ``hand``"""
+        if self.cursor_owner not in (None, hand.key):
+            return  # Another hand is driving the cursor
+        self.cursor_owner = hand.key
+        current_x, current_y = hand.features.cursor_point
+        x, y = self.get_position(current_x, current_y)
+        self.actions.move(x, y)
+
+    def reset(self, keep_playback=False):
+        """Reset all gesture state (hands, cursor smoothing, toggles and cooldowns)"""
+        self.cursor.reset()
+        self.cursor_owner = None
+        self.hands.clear()
+        self.present_hands = []
+        if not keep_playback:
+            self.playing_video = False
@@ -0,0 +1,199 @@
+"""Low-latency cursor tracking.
+
+The index fingertip is filtered with a One Euro filter (Casiez et al.): a
+low-pass filter whose cutoff rises with speed, so slow motions are smoothed
+heavily (no jitter) while fast motions pass through almost unfiltered (no
+lag). The filtered velocity is used to predict ahead by ``lead`` seconds to
+offset camera and inference latency.
+
+Usage (measurement mode):
+    python cursor.py session.npz [--min-cutoff 1.0] [--beta 0.007] [--lead 0.03]
+"""
+import argparse
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """One Euro filter for a single scalar signal"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = 0.0
+        self.timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, timestamp):
+        """Filter a new sample, returning (value, derivative per second)"""
+        if self.value is None:
+            self.value, self.timestamp = x, timestamp
+            return x, 0.0
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value, self.derivative
+        self.timestamp = timestamp
+
+        # Smooth the derivative, then use it to adapt the cutoff
+        a_d = self._alpha(self.d_cutoff, dt)
+        self.derivative += a_d * ((x - self.value) / dt - self.derivative)
+        cutoff = self.min_cutoff + self.beta * abs(self.derivative)
+        self.value += self._alpha(cutoff, dt) * (x - self.value)
+        return self.value, self.derivative
+
+
+class CursorTracker:
+    """Maps fingertip positions to cursor positions.
+
+    The tracker keeps its own cursor state, so the backend is only asked for
+    the real cursor position once (via ``origin``) instead of every frame.
+    Movement is relative: the cursor moves by the filtered fingertip motion
+    times ``gain``, and the hand reference is released whenever the cursor
+    gesture ends so re-entering it does not make the cursor jump.
+
+    ``screen_size`` is (width, height) or a callable returning it, which is
+    only called on the first update so startup never waits for the display.
+    """
+
+    def __init__(self, screen_size, min_cutoff=1.0, beta=0.007, d_cutoff=1.0,
+                 lead=0.03, gain=1.5, margin=10, max_gap=0.25):
+        self._screen = screen_size if callable(screen_size) else None
+        self.screen_width, self.screen_height = (None, None) if self._screen else screen_size
+        self.max_gap = max_gap  # Release the hand after a tracking gap this long
+        self.lead = lead        # Prediction horizon in seconds
+        self.gain = gain        # Increased sensitivity for easier movement
+        self.margin = margin    # Keep the cursor this far from the screen edges
+        self.filter_x = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.filter_y = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.cursor = None
+        self.anchor = None
+
+    def release(self):
+        """Forget the hand reference (cursor gesture ended or hand lost)"""
+        self.filter_x.reset()
+        self.filter_y.reset()
+        self.anchor = None
+
+    def reset(self):
+        self.release()
+        self.cursor = None
+
+    def filter_point(self, hand_x, hand_y, timestamp):
+        """Filtered and predicted fingertip position in screen pixels"""
+        x, vx = self.filter_x(float(hand_x) * self.screen_width, timestamp)
+        y, vy = self.filter_y(float(hand_y) * self.screen_height, timestamp)
+        return x + vx * self.lead, y + vy * self.lead
+
+    def update(self, hand_x, hand_y, timestamp, origin=None):
+        """Return the new cursor position for a normalized fingertip position.
+
+        ``origin`` is a callable returning the current cursor position; it is
+        only used the first time the tracker needs a starting point.
+        """
+        if self._screen is not None:
+            self.screen_width, self.screen_height = self._screen()
+            self._screen = None
+        last = self.filter_x.timestamp
+        if last is not None and timestamp - last > self.max_gap:
+            self.release()
+        target = self.filter_point(hand_x, hand_y, timestamp)
+        if self.cursor is None:
+            self.cursor = tuple(origin()) if origin is not None else (
+                self.screen_width / 2, self.screen_height / 2)
+        if self.anchor is not None:
+            x = self.cursor[0] + (target[0] - self.anchor[0]) * self.gain
+            y = self.cursor[1] + (target[1] - self.anchor[1]) * self.gain
+
+            # Boundary checks with buffer
+            x = min(max(x, self.margin), self.screen_width - self.margin)
+            y = min(max(y, self.margin), self.screen_height - self.margin)
+            self.cursor = (x, y)
+        self.anchor = target
+        return self.cursor
+
+
+def measure(timestamps, points, tracker, still_speed=50.0):
+    """Measure jitter and lag of ``tracker`` on a fingertip trace.
+
+    timestamps: (N,) seconds; points: (N, 2) normalized fingertip positions.
+    Jitter is the RMS frame-to-frame movement of the output while the hand
+    is held still (its 5-frame moving average moves slower than
+    ``still_speed`` px/s). Lag is the delay that best aligns output velocity
+    with the (noise-free) trend of the raw velocity (cross-correlation).
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    scale = np.array([tracker.screen_width, tracker.screen_height])
+    raw = np.asarray(points, dtype=np.float64) * scale
+    tracker.release()
+    filtered = np.array([tracker.filter_point(x, y, t)
+                         for (x, y), t in zip(points, timestamps)])
+
+    dt = np.diff(timestamps)
+    dt[dt <= 0] = np.median(dt) if len(dt) else 1.0
+    raw_step = np.linalg.norm(np.diff(raw, axis=0), axis=1)
+    out_step = np.linalg.norm(np.diff(filtered, axis=0), axis=1)
+    kernel = np.ones(5) / 5
+    trend = np.stack([np.convolve(raw[:, axis], kernel, mode="same") for axis in (0, 1)], axis=1)
+    still = np.linalg.norm(np.diff(trend, axis=0), axis=1) / dt < still_speed
+    still[:2] = still[-2:] = False  # Moving average is biased at the edges
+
+    def rms(values):
+        return float(np.sqrt(np.mean(values ** 2))) if len(values) else 0.0
+
+    # Lag: shift (in frames) maximizing correlation of the velocity signals
+    raw_v = np.diff(trend, axis=0)[2:-2]
+    out_v = np.diff(filtered, axis=0)[2:-2]
+    best_shift, best_score = 0, -np.inf
+    for shift in range(min(15, len(raw_v) // 4) + 1):
+        score = float(np.mean(raw_v[:len(raw_v) - shift] * out_v[shift:]))
+        if score > best_score:
+            best_shift, best_score = shift, score
+    frame_time = float(np.median(dt)) if len(dt) else 0.0
+
+    return {
+        "frames": int(len(raw)),
+        "raw_jitter_px": rms(raw_step[still]),
+        "jitter_px": rms(out_step[still]),
+        "lag_ms": best_shift * frame_time * 1000.0,
+        "mean_error_px": float(np.mean(np.linalg.norm(filtered - raw, axis=1))),
+    }
+
+
+def main(argv=None):
+    from features import INDEX, compute_features
+    from recorder import load_session
+
+    parser = argparse.ArgumentParser(description="Measure cursor filter jitter and lag on a recorded session")
+    parser.add_argument("session", help="session file written by app.py --record")
+    parser.add_argument("--min-cutoff", type=float, default=1.0)
+    parser.add_argument("--beta", type=float, default=0.007)
+    parser.add_argument("--lead", type=float, default=0.03)
+    parser.add_argument("--screen", type=int, nargs=2, default=(1920, 1080), metavar=("W", "H"))
+    args = parser.parse_args(argv)
+
+    session = load_session(args.session)
+    features = compute_features(session.landmarks)
+    # Only frames where the cursor gesture (index finger only) is active
+    active = session.present & (features.finger_mask == INDEX)
+    if active.sum() < 3:
+        print("Not enough cursor-movement frames in this session.")
+        return
+
+    tracker = CursorTracker(args.screen, min_cutoff=args.min_cutoff, beta=args.beta, lead=args.lead)
+    report = measure(session.timestamps[active], features.cursor_point[active], tracker)
+    for key, value in report.items():
+        print(f"{key:>16}: {value:.2f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,629 @@
+"""Gesture event stream for local subscribers.
+
+EventServer publishes what the Controller recognized on every frame, so
+media applications can react natively instead of receiving synthetic key
+presses. Subscribers connect over a Unix domain socket or a loopback
+WebSocket. Each frame becomes one binary message, batching every present
+hand and every gesture fired on that frame:
+
+    FRAME    type, frame id, publish time (time.time), state bits
+             (bit 0: playing), hand count, event count
+    HAND     per hand: handedness (0 left, 1 right, 255 unknown), finger
+             mask (index=1 ... thumb=16), active gesture index (-1 none),
+             fired flag, cursor point x/y (index fingertip, normalized)
+    LANDMARKS  per hand, when enabled: 21 x 3 float32
+    EVENT    per fired gesture: hand position in this frame, gesture index
+
+On connect a HELLO message (type byte + UTF-8 JSON) lists the gesture names
+the indices refer to. Over the Unix socket every message is prefixed with
+its uint32 length; over WebSocket each message is one binary frame. All
+integers are little-endian.
+
+Only the current user may connect to the Unix socket. Browsers send an
+Origin header with every WebSocket handshake, and local tools do not. The
+server refuses handshakes from any origin not explicitly allowed, so a web
+page cannot read the stream through the loopback port.
+
+Publishing never blocks the vision loop: a message is encoded once, then
+appended to each subscriber's bounded queue, and a background thread writes
+the queues with non-blocking sockets. A subscriber that falls behind loses
+its oldest messages, never the newest. Queued messages are coalesced into a
+single send.
+
+Usage:
+    python app.py --events-socket /tmp/gestures.sock [--events-landmarks]
+    python events.py listen --socket /tmp/gestures.sock [--duration 10]
+    python events.py listen --port 8765
+    python app.py --events-port 8765 --events-origin http://localhost:3000   # a local web UI
+    python events.py bench [--rate 1000] [--duration 5] [--clients 2]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import selectors
+import socket
+import stat
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from features import NUM_LANDMARKS, THUMB
+
+log = logging.getLogger(__name__)
+
+HELLO = 1
+FRAME = 2
+PROTOCOL_VERSION = 1
+
+LENGTH = struct.Struct("<I")
+FRAME_HEADER = struct.Struct("<BIdBBB")   # type, frame id, publish time, state, hands, events
+HAND = struct.Struct("<BBh?ff")           # handedness, finger mask, gesture, fired, cursor x, y
+EVENT = struct.Struct("<BH")              # hand position, gesture index
+LANDMARK_BYTES = NUM_LANDMARKS * 3 * 4
+HANDEDNESS = {"Left": 0, "Right": 1}
+PLAYING = 1
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def websocket_frame(payload):
+    """Wrap ``payload`` in an unmasked binary WebSocket frame (server to client)"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x82, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x82, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x82, 127, length)
+    return header + payload
+
+
+def websocket_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+
+
+def encode_frame(controller, frame_id, landmarks=False, now=None):
+    """Encode the controller's current frame (present hands and fired gestures)"""
+    hands = controller.present_hands
+    fired = controller.fired
+    index = {hand.key: i for i, hand in enumerate(hands)}
+    state = PLAYING if controller.playing_video else 0
+    parts = [FRAME_HEADER.pack(FRAME, frame_id, time.time() if now is None else now, state,
+                               len(hands), len(fired))]
+    for hand in hands:
+        gesture = hand.gesture
+        x, y = hand.features.cursor_point.tolist() if hand.features is not None else (0.0, 0.0)
+        mask = hand.finger_mask | (THUMB if hand.thumb_up else 0)
+        parts.append(HAND.pack(HANDEDNESS.get(hand.label, 255), mask,
+                               -1 if gesture is None else gesture.index, hand.fired, x, y))
+    if landmarks:
+        parts.extend(hand.landmarks.tobytes() for hand in hands)
+    for hand, gesture in fired:
+        parts.append(EVENT.pack(index.get(hand.key, 255), gesture.index))
+    return b"".join(parts)
+
+
+def decode_frame(body, landmarks=False):
+    """Decode a FRAME message into a dict (used by the test client)"""
+    _, frame_id, sent, state, hand_count, event_count = FRAME_HEADER.unpack_from(body)
+    offset = FRAME_HEADER.size
+    hands = []
+    for _ in range(hand_count):
+        handedness, mask, gesture, fired, x, y = HAND.unpack_from(body, offset)
+        offset += HAND.size
+        hands.append({"handedness": handedness, "mask": mask, "gesture": gesture,
+                      "fired": fired, "cursor": (x, y)})
+    if landmarks:
+        for hand in hands:
+            hand["landmarks"] = np.frombuffer(body, np.float32, NUM_LANDMARKS * 3,
+                                              offset).reshape(NUM_LANDMARKS, 3)
+            offset += LANDMARK_BYTES
+    events = []
+    for _ in range(event_count):
+        events.append(EVENT.unpack_from(body, offset))
+        offset += EVENT.size
+    return {"frame_id": frame_id, "time": sent, "playing": bool(state & PLAYING),
+            "hands": hands, "events": events}
+
+
+class Subscriber:
+    """One connected client: socket, bounded message queue and send state"""
+
+    def __init__(self, sock, websocket, queue_size):
+        self.sock = sock
+        self.websocket = websocket
+        self.ready = not websocket      # WebSocket clients must finish the handshake first
+        self.request = b""
+        self.queue = deque(maxlen=queue_size)
+        self.pending = b""              # Partially sent data
+        self.writing = False            # Registered for EVENT_WRITE
+        self.sent = 0
+        self.dropped = 0
+
+
+def _is_socket(path):
+    """True if ``path`` is a Unix socket (never follows a symlink)"""
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class EventServer:
+    """Publishes per-frame gesture messages to Unix socket and loopback WebSocket subscribers"""
+
+    def __init__(self, socket_path=None, port=None, host="127.0.0.1", landmarks=False,
+                 queue_size=32, hello=None, allowed_origins=()):
+        self.socket_path = socket_path
+        self.port = port
+        self.host = host
+        self.landmarks = landmarks
+        self.queue_size = queue_size
+        self.allowed_origins = {origin.rstrip("/").lower() for origin in allowed_origins}
+        self.hello = dict(hello or {}, version=PROTOCOL_VERSION, landmarks=landmarks)
+
+        self.selector = selectors.DefaultSelector()
+        self.lock = threading.Lock()
+        self.subscribers = []
+        self.frame_id = 0
+        self.published = 0
+        self.dropped = 0                # Messages dropped by subscribers that fell behind
+        self._listeners = []
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self.socket_path:
+            if _is_socket(self.socket_path):
+                os.unlink(self.socket_path)  # Stale socket from a previous run
+            elif os.path.lexists(self.socket_path):
+                raise FileExistsError(f"{self.socket_path} exists and is not a socket; "
+                                      "choose another --events-socket path")
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Create the socket file accessible to the current user only, so
+            # nobody else can connect before the chmod
+            umask = os.umask(0o077)
+            try:
+                listener.bind(self.socket_path)
+            finally:
+                os.umask(umask)
+            os.chmod(self.socket_path, 0o600)
+            self._listen(listener, websocket=False)
+        if self.port is not None:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, self.port))
+            self.port = listener.getsockname()[1]  # Resolve port 0
+            self._listen(listener, websocket=True)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._run, name="events", daemon=True)
+        self._thread.start()
+        return self
+
+    def _listen(self, listener, websocket):
+        listener.listen(8)
+        listener.setblocking(False)
+        self.selector.register(listener, selectors.EVENT_READ, ("listen", websocket))
+        self._listeners.append(listener)
+
+    def _hello_message(self, websocket):
+        body = bytes([HELLO]) + json.dumps(self.hello).encode()
+        return websocket_frame(body) if websocket else LENGTH.pack(len(body)) + body
+
+    def publish(self, controller):
+        """Queue the controller's current frame for every subscriber (never blocks)"""
+        self.frame_id = (self.frame_id + 1) & 0xFFFFFFFF
+        self.published += 1
+        if not self.subscribers:
+            return
+        body = encode_frame(controller, self.frame_id, self.landmarks)
+        framed = {}
+        with self.lock:
+            for subscriber in self.subscribers:
+                if not subscriber.ready:
+                    continue
+                message = framed.get(subscriber.websocket)
+                if message is None:
+                    message = framed[subscriber.websocket] = (
+                        websocket_frame(body) if subscriber.websocket else LENGTH.pack(len(body)) + body)
+                if len(subscriber.queue) == subscriber.queue.maxlen:
+                    subscriber.dropped += 1  # The deque discards the oldest message
+                    self.dropped += 1
+                subscriber.queue.append(message)
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # A wake-up is already pending
+
+    def _run(self):
+        while not self._stopping:
+            for key, events in self.selector.select(timeout=0.5):
+                if key.data == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif key.data[0] == "listen":
+                    self._accept(key.fileobj, key.data[1])
+                else:
+                    subscriber = key.data[1]
+                    if events & selectors.EVENT_READ:
+                        self._read(subscriber)
+                    if events & selectors.EVENT_WRITE and subscriber in self.subscribers:
+                        self._write(subscriber)
+            with self.lock:
+                subscribers = [s for s in self.subscribers if s.queue and not s.writing]
+            for subscriber in subscribers:
+                self._write(subscriber)
+
+    def _accept(self, listener, websocket):
+        try:
+            sock, _ = listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        subscriber = Subscriber(sock, websocket, self.queue_size)
+        if not websocket:
+            subscriber.pending = self._hello_message(False)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        self.selector.register(sock, selectors.EVENT_READ, ("client", subscriber))
+        if subscriber.pending:
+            self._write(subscriber)
+
+    def _read(self, subscriber):
+        try:
+            data = subscriber.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(subscriber)
+            return
+        if subscriber.ready:
+            # Subscribers have nothing to say; a WebSocket close frame ends the stream
+            if subscriber.websocket and data[0] & 0x0F == 0x8:
+                self._drop(subscriber)
+            return
+        subscriber.request += data
+        if b"\r\n\r\n" not in subscriber.request:
+            if len(subscriber.request) > 8192:
+                self._drop(subscriber)
+            return
+        key = origin = None
+        for line in subscriber.request.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"sec-websocket-key":
+                key = value.strip().decode()
+            elif name == b"origin":
+                origin = value.strip().decode(errors="replace")
+        status = None
+        if key is None:
+            status = "400 Bad Request"
+        elif origin is not None and origin.rstrip("/").lower() not in self.allowed_origins:
+            # A browser page: refuse unless its origin was allowed explicitly
+            log.warning("Refused event stream connection from origin %s", origin)
+            status = "403 Forbidden"
+        if status is not None:
+            subscriber.pending = f"HTTP/1.1 {status}\r\nContent-Length: 0\r\n\r\n".encode()
+            self._write(subscriber)
+            self._drop(subscriber)
+            return
+        subscriber.pending = ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                              "Connection: Upgrade\r\nSec-WebSocket-Accept: "
+                              f"{websocket_accept(key)}\r\n\r\n").encode() + self._hello_message(True)
+        subscriber.ready = True
+        self._write(subscriber)
+
+    def _write(self, subscriber):
+        if not subscriber.pending:
+            with self.lock:
+                if not subscriber.queue:
+                    self._set_writing(subscriber, False)
+                    return
+                # Coalesce everything queued into one send
+                subscriber.pending = b"".join(subscriber.queue)
+                subscriber.sent += len(subscriber.queue)
+                subscriber.queue.clear()
+        try:
+            sent = subscriber.sock.send(subscriber.pending)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(subscriber)
+            return
+        subscriber.pending = subscriber.pending[sent:]
+        # Wait for the socket to drain before sending more
+        self._set_writing(subscriber, bool(subscriber.pending))
+
+    def _set_writing(self, subscriber, writing):
+        if subscriber.writing != writing and subscriber in self.subscribers:
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self.selector.modify(subscriber.sock, events, ("client", subscriber))
+            subscriber.writing = writing
+
+    def _drop(self, subscriber):
+        with self.lock:
+            if subscriber not in self.subscribers:
+                return
+            self.subscribers.remove(subscriber)
+        self.selector.unregister(subscriber.sock)
+        subscriber.sock.close()
+
+    def close(self):
+        self._stopping = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(1.0)
+        for subscriber in list(self.subscribers):
+            self._drop(subscriber)
+        for listener in self._listeners:
+            listener.close()
+        if self.socket_path and _is_socket(self.socket_path):
+            os.unlink(self.socket_path)
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def stats(self):
+        return (f"{self.published} frames published, {len(self.subscribers)} subscribers, "
+                f"{self.dropped} messages dropped for slow subscribers")
+
+
+def attach(controller, socket_path=None, port=None, landmarks=False, allowed_origins=()):
+    """Start an EventServer publishing ``controller``'s frames; returns it (None if not requested)"""
+    if not socket_path and port is None:
+        return None
+    server = EventServer(socket_path, port, landmarks=landmarks, allowed_origins=allowed_origins,
+                         hello={"gestures": [g.name for g in controller.gesture_map.gestures]}).start()
+    controller.publisher = server
+    where = [f"unix:{socket_path}"] if socket_path else []
+    where += [f"ws://{server.host}:{server.port}/"] if port is not None else []
+    log.info("Publishing gesture events on %s", ", ".join(where))
+    return server
+
+
+def connect(socket_path=None, port=None, host="127.0.0.1"):
+    """Connect a subscriber socket; returns (socket, websocket)"""
+    if socket_path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        return sock, False
+    sock = socket.create_connection((host, port))
+    key = base64.b64encode(os.urandom(16)).decode()
+    sock.sendall((f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                  "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+    response = b""
+    while b"\r\n\r\n" not in response:
+        chunk = sock.recv(1024)
+        if not chunk:
+            raise ConnectionError("WebSocket handshake failed")
+        response += chunk
+    head, _, rest = response.partition(b"\r\n\r\n")
+    if b" 101 " not in head.split(b"\r\n")[0] or websocket_accept(key).encode() not in head:
+        raise ConnectionError("WebSocket handshake rejected")
+    return _Prefixed(sock, rest), True
+
+
+class _Prefixed:
+    """Socket wrapper that returns already-received bytes first"""
+
+    def __init__(self, sock, data):
+        self.sock, self.data = sock, data
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def recv(self, size):
+        if self.data:
+            data, self.data = self.data, b""
+            return data
+        return self.sock.recv(size)
+
+    def close(self):
+        self.sock.close()
+
+
+def read_messages(sock, websocket):
+    """Yield message bodies from a subscriber socket until it closes"""
+    buffer = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        buffer += chunk
+        while True:
+            if websocket:
+                if len(buffer) < 2:
+                    break
+                length, offset = buffer[1] & 0x7F, 2
+                if length == 126:
+                    if len(buffer) < 4:
+                        break
+                    length, offset = struct.unpack_from("!H", buffer, 2)[0], 4
+                elif length == 127:
+                    if len(buffer) < 10:
+                        break
+                    length, offset = struct.unpack_from("!Q", buffer, 2)[0], 10
+            else:
+                if len(buffer) < LENGTH.size:
+                    break
+                length, offset = LENGTH.unpack_from(buffer)[0], LENGTH.size
+            if len(buffer) < offset + length:
+                break
+            yield buffer[offset:offset + length]
+            buffer = buffer[offset + length:]
+
+
+class ClientStats:
+    """Latency, throughput and loss seen by one subscriber"""
+
+    def __init__(self):
+        self.messages = 0
+        self.events = 0
+        self.bytes = 0
+        self.missed = 0
+        self.latencies = []
+        self.start = None
+        self.end = None
+        self._last_frame = None
+
+    def add(self, body, frame, received):
+        self.start = self.start or received
+        self.end = received
+        self.messages += 1
+        self.bytes += len(body)
+        self.events += len(frame["events"])
+        self.latencies.append(received - frame["time"])
+        if self._last_frame is not None:
+            self.missed += max(0, (frame["frame_id"] - self._last_frame - 1) & 0xFFFFFFFF)
+        self._last_frame = frame["frame_id"]
+
+    def summary(self):
+        elapsed = (self.end - self.start) if self.messages > 1 else 0.0
+        rate = self.messages / elapsed if elapsed > 0 else 0.0
+        text = (f"{self.messages} frames ({rate:.0f}/s, {self.bytes / max(elapsed, 1e-9) / 1024:.0f} KiB/s), "
+                f"{self.events} events, {self.missed} frames dropped")
+        if self.latencies:
+            p50, p95, p99 = np.percentile(np.array(self.latencies) * 1000.0, (50, 95, 99))
+            text += f", latency p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms"
+        return text
+
+
+def listen(sock, websocket, duration=None, quiet=False, stats=None):
+    """Print events from a subscriber socket and return its ClientStats"""
+    stats = stats or ClientStats()
+    names, landmarks = [], False
+    deadline = time.time() + duration if duration else None
+    if deadline:
+        sock.settimeout(duration)
+    try:
+        for body in read_messages(sock, websocket):
+            received = time.time()
+            if body[0] == HELLO:
+                hello = json.loads(body[1:].decode())
+                names, landmarks = hello.get("gestures", []), hello.get("landmarks", False)
+                if not quiet:
+                    print(f"Connected: {len(names)} gestures, landmarks {'on' if landmarks else 'off'}")
+                continue
+            frame = decode_frame(body, landmarks)
+            stats.add(body, frame, received)
+            if not quiet:
+                for hand, gesture in frame["events"]:
+                    name = names[gesture] if gesture < len(names) else gesture
+                    print(f"{frame['frame_id']:8d}  hand {hand}: {name}")
+            if deadline and received >= deadline:
+                break
+    except (socket.timeout, ConnectionError):
+        pass
+    finally:
+        sock.close()
+    return stats
+
+
+def bench(rate, duration, clients, landmarks, queue_size):
+    """Publish synthetic frames through a real Controller to local subscribers"""
+    import tempfile
+
+    from actions import ActionDispatcher, NullBackend
+    from controller import Controller
+    from features import INDEX_BASE, INDEX_TIP, MIDDLE_BASE, MIDDLE_TIP, WRIST
+
+    path = os.path.join(tempfile.mkdtemp(), "gestures.sock")
+    controller = Controller(actions=ActionDispatcher(NullBackend(), synchronous=True), max_hands=1)
+    server = EventServer(path, port=0, landmarks=landmarks, queue_size=queue_size,
+                         hello={"gestures": [g.name for g in controller.gesture_map.gestures]}).start()
+
+    results = []
+    threads = []
+    for i in range(clients):
+        # Alternate between the Unix socket and the WebSocket
+        sock, websocket = connect(path) if i % 2 == 0 else connect(port=server.port)
+        stats = ClientStats()
+        results.append(("unix" if not websocket else "websocket", stats))
+        thread = threading.Thread(target=listen, args=(sock, websocket, duration + 1.0, True, stats), daemon=True)
+        thread.start()
+        threads.append(thread)
+    time.sleep(0.2)  # Let the subscribers connect
+
+    # A hand alternating between index-up (cursor) and index+middle (click)
+    hand = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+    hand[:, :2] = 0.5, 0.6
+    hand[WRIST, 1] = 0.8
+    publish_times = []
+    interval = 1.0 / rate if rate else 0.0
+    start = time.perf_counter()
+    frame = 0
+    while time.perf_counter() - start < duration:
+        hand[INDEX_TIP, 1] = 0.4
+        hand[MIDDLE_TIP, 1] = 0.4 if (frame // 30) % 2 else 0.62
+        hand[[INDEX_BASE, MIDDLE_BASE], 1] = 0.6
+        controller.update([hand])
+        # What Controller(publisher=server) does at the end of update(), timed on its own
+        t = time.perf_counter()
+        server.publish(controller)
+        publish_times.append(time.perf_counter() - t)
+        frame += 1
+        if interval:
+            delay = start + frame * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    time.sleep(0.5)
+    server.close()
+    for thread in threads:
+        thread.join(2.0)
+
+    publish_us = np.array(publish_times) * 1e6
+    print(f"Published {frame} frames in {duration:.1f} s ({frame / duration:.0f}/s): "
+          f"publish p50 {np.percentile(publish_us, 50):.1f} us, p99 {np.percentile(publish_us, 99):.1f} us")
+    print("Server: " + server.stats())
+    for kind, stats in results:
+        print(f"{kind:>9} subscriber: {stats.summary()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture event stream test client and benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listen_parser = sub.add_parser("listen", help="print events and measure latency and throughput")
+    target = listen_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--socket", metavar="PATH", help="Unix socket of app.py --events-socket")
+    target.add_argument("--port", type=int, help="loopback WebSocket port of app.py --events-port")
+    listen_parser.add_argument("--duration", type=float, metavar="S", help="stop after S seconds")
+    listen_parser.add_argument("--quiet", action="store_true", help="only print the summary")
+
+    bench_parser = sub.add_parser("bench", help="publish synthetic frames to local subscribers")
+    bench_parser.add_argument("--rate", type=float, default=1000.0, help="frames/sec, 0 = as fast as possible")
+    bench_parser.add_argument("--duration", type=float, default=5.0)
+    bench_parser.add_argument("--clients", type=int, default=2)
+    bench_parser.add_argument("--landmarks", action="store_true", help="include raw landmarks")
+    bench_parser.add_argument("--queue-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        bench(args.rate, args.duration, args.clients, args.landmarks, args.queue_size)
+        return
+    sock, websocket = connect(args.socket, args.port)
+    try:
+        stats = listen(sock, websocket, args.duration, args.quiet)
+    except KeyboardInterrupt:
+        return
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
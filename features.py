@@ -0,0 +1,125 @@
+import numpy as np
+
+# MediaPipe hand landmark indices
+WRIST = 0
+THUMB_BASE = 2
+THUMB_TIP = 4
+INDEX_BASE = 5
+INDEX_TIP = 8
+MIDDLE_BASE = 9
+MIDDLE_TIP = 12
+RING_BASE = 13
+RING_TIP = 16
+PINKY_BASE = 17
+PINKY_TIP = 20
+NUM_LANDMARKS = 21
+
+# Tip/base pairs for index, middle, ring and pinky (in that order)
+FINGER_TIPS = np.array([INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP])
+FINGER_BASES = np.array([INDEX_BASE, MIDDLE_BASE, RING_BASE, PINKY_BASE])
+
+# Bits of the finger-state mask
+INDEX = 1
+MIDDLE = 2
+RING = 4
+PINKY = 8
+THUMB = 16
+FINGER_BITS = np.array([INDEX, MIDDLE, RING, PINKY], dtype=np.uint8)
+FOUR_FINGERS = INDEX | MIDDLE | RING | PINKY
+
+# Detection thresholds (normalized image coordinates)
+FINGER_THRESHOLD = 0.07       # Tip must be this much higher than its base
+THUMB_RATIO = 1.2             # Thumb tip must be this much farther from the wrist than its base
+POINTING_THRESHOLD = 0.05     # Index base->tip x offset for left/right pointing
+THUMB_POINTING_THRESHOLD = 0.05  # Thumb base->tip y offset for up/down
+
+
+def landmarks_to_array(hand_landmarks, out=None):
+    """Convert a MediaPipe NormalizedLandmarkList into a (21, 3) float32 array.
+
+    Arrays are accepted too (copied into ``out`` when given), so recorded
+    sessions and live results share the same code path.
+    """
+    if isinstance(hand_landmarks, np.ndarray):
+        if out is None:
+            return np.asarray(hand_landmarks, dtype=np.float32)
+        np.copyto(out, hand_landmarks)
+        return out
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    out.reshape(-1)[:] = np.fromiter(
+        (value for lm in hand_landmarks.landmark for value in (lm.x, lm.y, lm.z)),
+        dtype=np.float32, count=NUM_LANDMARKS * 3)
+    return out
+
+
+class HandFeatures:
+    """Per-frame hand features derived from landmarks.
+
+    Every attribute has the leading shape of the input: scalars (0-d arrays)
+    for a single (21, 3) hand, or length-N arrays for an (N, 21, 3) batch.
+    """
+    __slots__ = (
+        "landmarks", "fingers_up", "thumb_up", "finger_mask", "mask",
+        "open_palm", "closed_palm", "thumb_tip_dist", "thumb_base_dist",
+        "pointing_dx", "pointing_left", "pointing_right",
+        "thumb_dy", "thumb_pointing_up", "thumb_pointing_down", "cursor_point",
+        "palm_center", "palm_size",
+    )
+
+    def __len__(self):
+        return 1 if self.mask.ndim == 0 else len(self.mask)
+
+    def __getitem__(self, i):
+        """Features of hand ``i`` of a batch (views into the batch arrays)"""
+        hand = HandFeatures()
+        for name in HandFeatures.__slots__:
+            setattr(hand, name, getattr(self, name)[i])
+        return hand
+
+
+def compute_features(landmarks):
+    """Compute finger states, thumb distances and pointing vectors.
+
+    Accepts a single (21, 3) hand or an (N, 21, 3) batch and evaluates every
+    rule with vectorized NumPy operations.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    xy = landmarks[..., :2]
+    features = HandFeatures()
+    features.landmarks = landmarks
+
+    # A finger is "up" if its tip is significantly higher than its base
+    tips_y = landmarks[..., FINGER_TIPS, 1]
+    bases_y = landmarks[..., FINGER_BASES, 1]
+    features.fingers_up = tips_y < (bases_y - FINGER_THRESHOLD)
+
+    # Thumb is "up" if its tip is significantly farther from the wrist than its base
+    wrist = xy[..., WRIST, :]
+    features.thumb_tip_dist = np.linalg.norm(xy[..., THUMB_TIP, :] - wrist, axis=-1)
+    features.thumb_base_dist = np.linalg.norm(xy[..., THUMB_BASE, :] - wrist, axis=-1)
+    features.thumb_up = features.thumb_tip_dist > (features.thumb_base_dist * THUMB_RATIO)
+
+    # Pack finger states into bitmasks: 4 fingers, then with the thumb bit
+    features.finger_mask = (features.fingers_up * FINGER_BITS).sum(axis=-1, dtype=np.uint8)
+    features.mask = features.finger_mask | (features.thumb_up.astype(np.uint8) * np.uint8(THUMB))
+    features.open_palm = features.finger_mask == FOUR_FINGERS
+    features.closed_palm = features.finger_mask == 0
+
+    # Index finger pointing direction (base -> tip)
+    features.pointing_dx = landmarks[..., INDEX_TIP, 0] - landmarks[..., INDEX_BASE, 0]
+    features.pointing_left = features.pointing_dx < -POINTING_THRESHOLD
+    features.pointing_right = features.pointing_dx > POINTING_THRESHOLD
+
+    # Thumb orientation (base -> tip); negative y is up in image coordinates
+    features.thumb_dy = landmarks[..., THUMB_TIP, 1] - landmarks[..., THUMB_BASE, 1]
+    features.thumb_pointing_up = features.thumb_dy < -THUMB_POINTING_THRESHOLD
+    features.thumb_pointing_down = features.thumb_dy > THUMB_POINTING_THRESHOLD
+
+    # Index finger tip drives the cursor
+    features.cursor_point = xy[..., INDEX_TIP, :]
+
+    # Palm position and size (wrist to middle knuckle) track dynamic gestures
+    features.palm_center = (xy[..., WRIST, :] + xy[..., MIDDLE_BASE, :]) * 0.5
+    features.palm_size = np.linalg.norm(xy[..., MIDDLE_BASE, :] - wrist, axis=-1)
+    return features
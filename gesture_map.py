@@ -0,0 +1,339 @@
+"""Table-driven gesture classification.
+
+Gestures are declared in a JSON file (gesture_map.json by default). Each
+entry has:
+
+    name         unique identifier
+    description  line shown in the startup gesture guide
+    label        message logged when the gesture fires (INFO for the first action
+                 of an activation, DEBUG for repeats)
+    fingers      fingers that must be up; all others must be down
+    ignore       fingers whose state does not matter (default: thumb)
+    when         optional predicate names, all of which must hold
+    actions      list of [kind, args...]: press, click, scroll, zoom, hotkey, cursor
+    trigger      "enter" (once per activation), "hold" (repeat while held)
+                 or "continuous" (every frame)
+    cooldown     seconds between firings of this gesture
+    repeat_hz    repeat rate of a held "hold" gesture (default: once per cooldown)
+    enter_frames, enter_ms
+                 how long the pose must be seen before the gesture activates
+                 (default 1 frame, 0 ms; both must be met)
+    exit_frames, exit_ms
+                 how long the pose must be gone before the gesture ends; a
+                 shorter dropout neither re-triggers nor interrupts it
+    flag         name reported by HandState.is_active() while the gesture is held
+    sets         Controller attributes assigned when the gesture fires
+    motion       makes this a dynamic gesture, fired when a hand movement ends:
+                 swipe_left/right/up/down, push, pull, circle_cw or circle_ccw
+                 (see motion.py). "fingers" then restricts the pose the motion
+                 is made with; without it any pose will do
+
+At load time the map is compiled into a 32-entry table indexed by the 5-bit
+finger mask. Each entry holds the (usually one or two) gestures compatible
+with that mask in priority order (file order), so classifying a frame is a
+table lookup plus at most a couple of predicate checks, no matter how many
+gestures are defined. Overlapping gestures resolve to exactly one winner.
+Dynamic gestures are kept out of the table and looked up by motion name.
+
+The map itself is immutable; which gesture is active, whether it fired and
+its cooldowns live in each hand's HandState (see controller.py), so every
+detected hand is classified independently. Every gesture keeps its own
+cooldown, stamped only when it actually fires, so e.g. a scroll never
+delays a timeline step.
+"""
+import json
+import logging
+import os
+
+from features import INDEX, MIDDLE, RING, PINKY, THUMB
+from motion import MOTIONS
+from telemetry import EXIT, FILTERED, FIRE, REPEAT, SUPPRESSED
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gesture_map.json")
+
+FINGERS = {"index": INDEX, "middle": MIDDLE, "ring": RING, "pinky": PINKY, "thumb": THUMB}
+ALL_FINGERS = INDEX | MIDDLE | RING | PINKY | THUMB
+TRIGGERS = ("enter", "hold", "continuous")
+ACTION_KINDS = ("press", "click", "scroll", "zoom", "hotkey", "cursor")
+
+# Geometric and state predicates usable in "when", called with the hand's
+# features and its HandState. The playback state is latched when the current
+# finger pose begins, so e.g. an open palm that starts playback does not turn
+# into "zoom out" while it is still held. two_hands/one_hand allow gestures
+# that need (or must not have) a second hand in view, and "still" keeps a
+# pose gesture from firing while the hand is in the middle of a movement.
+PREDICATES = {
+    "pointing_left": lambda features, hand: bool(features.pointing_left),
+    "pointing_right": lambda features, hand: bool(features.pointing_right),
+    "thumb_pointing_up": lambda features, hand: bool(features.thumb_pointing_up),
+    "thumb_pointing_down": lambda features, hand: bool(features.thumb_pointing_down),
+    "playing": lambda features, hand: hand.playing_at_onset,
+    "not_playing": lambda features, hand: not hand.playing_at_onset,
+    "two_hands": lambda features, hand: hand.others > 0,
+    "one_hand": lambda features, hand: hand.others == 0,
+    "still": lambda features, hand: not hand.motion.moving,
+}
+
+# Predicates on hand/controller state rather than geometry; these still apply
+# when a learned classifier (classifier.py) decides the pose
+STATE_PREDICATES = ("playing", "not_playing", "two_hands", "one_hand", "still")
+
+
+class Gesture:
+    """A compiled gesture definition"""
+    __slots__ = ("index", "name", "description", "label", "motion", "bits", "care", "predicates",
+                 "state_predicates", "pose", "actions", "trigger", "cooldown", "repeat_interval",
+                 "enter_frames", "enter_time", "exit_frames", "exit_time", "flag", "sets", "moves_cursor")
+
+    def matches(self, mask):
+        return (mask & self.care) == self.bits
+
+    def can_enter(self, frames, elapsed):
+        """Whether a pose seen for ``frames`` frames / ``elapsed`` seconds activates the gesture"""
+        return frames >= self.enter_frames and elapsed >= self.enter_time
+
+    def can_exit(self, frames, elapsed):
+        """Whether a pose gone for ``frames`` frames / ``elapsed`` seconds ends the gesture"""
+        return frames >= self.exit_frames and elapsed >= self.exit_time
+
+    def __repr__(self):
+        return f"Gesture({self.name!r})"
+
+
+def _finger_bits(names, gesture_name):
+    bits = 0
+    for name in names:
+        if name not in FINGERS:
+            raise ValueError(f"Gesture '{gesture_name}': unknown finger '{name}'")
+        bits |= FINGERS[name]
+    return bits
+
+
+def compile_gesture(index, spec, defaults):
+    """Validate one gesture spec and turn it into a Gesture"""
+    spec = dict(defaults, **spec)
+    name = spec.get("name") or f"gesture_{index}"
+    gesture = Gesture()
+    gesture.index = index
+    gesture.name = name
+    gesture.description = spec.get("description", name)
+    gesture.label = spec.get("label", name)
+    gesture.motion = spec.get("motion")
+    if gesture.motion is not None and gesture.motion not in MOTIONS:
+        raise ValueError(f"Gesture '{name}': unknown motion '{gesture.motion}', choose from: {', '.join(MOTIONS)}")
+    gesture.care = ALL_FINGERS & ~_finger_bits(spec.get("ignore", []), name)
+    if gesture.motion is not None and "fingers" not in spec:
+        gesture.care = 0  # Any pose
+    gesture.bits = _finger_bits(spec.get("fingers", []), name) & gesture.care
+
+    try:
+        gesture.predicates = tuple(PREDICATES[p] for p in spec.get("when", []))
+        gesture.state_predicates = tuple(PREDICATES[p] for p in spec.get("when", []) if p in STATE_PREDICATES)
+        # Fingers plus geometric predicates: what a learned classifier recognizes
+        gesture.pose = (gesture.bits, gesture.care,
+                        frozenset(p for p in spec.get("when", []) if p not in STATE_PREDICATES))
+    except KeyError as e:
+        raise ValueError(f"Gesture '{name}': unknown predicate {e}, choose from: {', '.join(PREDICATES)}")
+
+    gesture.actions = []
+    for action in spec.get("actions", []):
+        if not action or action[0] not in ACTION_KINDS:
+            raise ValueError(f"Gesture '{name}': unknown action {action!r}")
+        gesture.actions.append((action[0], tuple(action[1:])))
+    gesture.moves_cursor = any(kind == "cursor" for kind, _ in gesture.actions)
+
+    gesture.trigger = spec.get("trigger", "enter")
+    if gesture.trigger not in TRIGGERS:
+        raise ValueError(f"Gesture '{name}': trigger must be one of {', '.join(TRIGGERS)}")
+    gesture.cooldown = float(spec.get("cooldown", 0.0))
+    repeat_hz = float(spec.get("repeat_hz", 0.0))
+    if repeat_hz < 0:
+        raise ValueError(f"Gesture '{name}': repeat_hz must not be negative")
+    gesture.repeat_interval = 1.0 / repeat_hz if repeat_hz else gesture.cooldown
+
+    # Hysteresis: frames and milliseconds the pose must persist to enter or leave
+    gesture.enter_frames = int(spec.get("enter_frames", 1))
+    gesture.exit_frames = int(spec.get("exit_frames", 1))
+    if gesture.enter_frames < 1 or gesture.exit_frames < 1:
+        raise ValueError(f"Gesture '{name}': enter_frames and exit_frames must be at least 1")
+    gesture.enter_time = float(spec.get("enter_ms", 0.0)) / 1000.0
+    gesture.exit_time = float(spec.get("exit_ms", 0.0)) / 1000.0
+    gesture.flag = spec.get("flag")
+    gesture.sets = dict(spec.get("sets", {}))
+    return gesture
+
+
+class GestureMap:
+    """Compiled gesture table; activation state is kept per hand"""
+
+    def __init__(self, gestures):
+        self.gestures = gestures
+        names = [g.name for g in gestures]
+        duplicates = {n for n in names if names.count(n) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate gesture names: {', '.join(sorted(duplicates))}")
+
+        # Candidates for every possible 5-bit finger mask, in priority order
+        self.table = tuple(tuple(g for g in gestures if g.motion is None and g.matches(mask))
+                           for mask in range(ALL_FINGERS + 1))
+
+        # Dynamic gestures by motion name, in priority order
+        self.motions = {}
+        for gesture in gestures:
+            if gesture.motion is not None:
+                self.motions[gesture.motion] = self.motions.get(gesture.motion, ()) + (gesture,)
+
+    @classmethod
+    def from_dict(cls, config):
+        defaults = config.get("defaults", {})
+        return cls([compile_gesture(i, spec, defaults)
+                    for i, spec in enumerate(config.get("gestures", []))])
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def __getitem__(self, name):
+        for gesture in self.gestures:
+            if gesture.name == name:
+                return gesture
+        raise KeyError(name)
+
+    def resolve(self, mask, features, hand):
+        """Return the highest-priority gesture for this frame, or None"""
+        for gesture in self.table[mask]:
+            if all(predicate(features, hand) for predicate in gesture.predicates):
+                return gesture
+        return None
+
+    def resolve_label(self, name, hand):
+        """Resolve a classifier label (gesture name or "none") to a gesture.
+
+        The labeled gesture wins if its state predicates hold; otherwise another
+        gesture with the same pose may (e.g. "play" while playing becomes
+        "zoom_out"). A pose alone never resolves to a motion gesture: those
+        fire only from a recognized trajectory.
+        """
+        if name == "none":
+            return None
+        labeled = self[name]
+        for gesture in (labeled,) + self.table[labeled.bits]:
+            if gesture.motion is not None:
+                continue
+            if gesture.pose == labeled.pose and all(p(None, hand) for p in gesture.state_predicates):
+                return gesture
+        return None
+
+    def update(self, controller, hand, mask, features, now, label=None):
+        """Classify one hand's frame and fire the resolved gesture's actions.
+
+        ``label`` is the learned classifier's pose for this frame; when None
+        the finger-mask table and threshold predicates decide. The per-frame
+        result only becomes (or stops being) the active gesture once it has
+        persisted for the gesture's enter (exit) frames and milliseconds.
+        Returns the active gesture (or None).
+        """
+        # Labels naming gestures with the same pose are the same pose
+        pose = mask if label is None else (None if label == "none" else self[label].pose)
+        if pose != hand.mask:
+            # New finger pose: latch the playback state it started in
+            hand.mask = pose
+            hand.playing_at_onset = controller.playing_video
+
+        # Dynamic gestures fire when a movement ends; the pose it was made
+        # with is then consumed, so holding it still afterwards does not also
+        # trigger a static gesture
+        for gesture in self.motions.get(hand.motion.motion, ()):
+            if gesture.matches(mask) and all(p(features, hand) for p in gesture.predicates):
+                remaining = gesture.cooldown - (now - hand.last_fired[gesture.index])
+                if remaining > 0:
+                    if controller.journal is not None:
+                        controller.journal.record(now, SUPPRESSED, gesture, hand, remaining)
+                    continue
+                self._fire(controller, hand, gesture, now, now - hand.motion.stroke_time)
+                hand.consumed = pose
+                break
+        if hand.consumed is not None and hand.consumed != pose:
+            hand.consumed = None
+
+        if hand.consumed is not None:
+            candidate = None
+        elif label is None:
+            candidate = self.resolve(mask, features, hand)
+        else:
+            candidate = self.resolve_label(label, hand)
+        if candidate is not hand.candidate:
+            if (controller.journal is not None and hand.candidate is not None
+                    and hand.candidate is not hand.gesture):
+                # The previous pose vanished before it could activate: a flicker
+                controller.journal.record(now, FILTERED, hand.candidate, hand,
+                                          now - hand.candidate_since, hand.candidate_frames)
+            # Pose onset: start counting how long this result persists
+            hand.candidate, hand.candidate_since, hand.candidate_frames = candidate, now, 0
+        hand.candidate_frames += 1
+
+        gesture = hand.gesture
+        if candidate is gesture:
+            hand.missing_frames = 0
+        else:
+            if gesture is not None:
+                if not hand.missing_frames:
+                    hand.missing_since = now
+                hand.missing_frames += 1
+                if gesture.can_exit(hand.missing_frames, now - hand.missing_since):
+                    gesture = None
+            # A confirmed new pose takes over without waiting for the old one to exit
+            if candidate is not None and candidate.can_enter(hand.candidate_frames, now - hand.candidate_since):
+                gesture = candidate
+            if gesture is not hand.gesture:
+                if controller.journal is not None and hand.gesture is not None:
+                    controller.journal.record(now, EXIT, hand.gesture, hand, now - hand.onset)
+                hand.gesture, hand.fired, hand.missing_frames = gesture, False, 0
+                hand.onset, hand.suppressed = hand.candidate_since, False
+        if gesture is None or candidate is not gesture:
+            return gesture  # Idle, waiting to enter, or held through a brief dropout
+
+        if gesture.trigger == "enter" and hand.fired:
+            return gesture
+        if gesture.trigger != "continuous":
+            interval = gesture.repeat_interval if hand.fired else gesture.cooldown
+            if now - hand.last_fired[gesture.index] < interval:
+                if not hand.fired and not hand.suppressed and controller.journal is not None:
+                    # Record each activation held back by its cooldown once
+                    hand.suppressed = True
+                    controller.journal.record(now, SUPPRESSED, gesture, hand,
+                                              interval - (now - hand.last_fired[gesture.index]))
+                return gesture
+
+        first = not hand.fired
+        hand.fired = True
+        self._fire(controller, hand, gesture, now, now - hand.onset if first else None)
+        return gesture
+
+    def _fire(self, controller, hand, gesture, now, latency=None):
+        """Run a gesture's actions and state changes.
+
+        ``latency`` (pose onset to action) is given for the first action of an
+        activation and None for repeats.
+        """
+        previous = hand.last_fired[gesture.index]
+        hand.last_fired[gesture.index] = now
+        controller.fired.append((hand, gesture))
+        if latency is not None:
+            controller.record_latency(gesture, latency)
+        if controller.journal is not None:
+            if latency is not None:
+                controller.journal.record(now, FIRE, gesture, hand, latency)
+            else:
+                controller.journal.record(now, REPEAT, gesture, hand, now - previous)
+        for name, value in gesture.sets.items():
+            setattr(controller, name, value)
+        for kind, args in gesture.actions:
+            if kind == "cursor":
+                controller.move_cursor(hand)
+            else:
+                getattr(controller.actions, kind)(*args)
+        log.log(logging.INFO if latency is not None else logging.DEBUG, gesture.label)
@@ -0,0 +1,176 @@
+"""Idle/presence mode: throttle inference while nobody is in front of the camera.
+
+IdleGovernor wraps the full-rate hand processor (a HandDetector or
+KeyframeTracker) behind the same ``process()`` call. After ``idle_after``
+seconds without a hand it switches to a presence loop:
+
+* the loop is slowed to ``idle_fps`` by sleeping after each frame, so the
+  next camera read is fresh;
+* a cheap frame-difference check on a tiny grayscale thumbnail skips
+  inference entirely while the scene is static;
+* when something moves, a model_complexity=0 detector looks for a hand on a
+  frame downscaled to ``idle_width`` pixels.
+
+When the presence detector finds a hand, the same frame is immediately
+processed again at full resolution and quality, so full-rate tracking resumes
+on the frame that woke it. Camera resolution and frame rate are left alone;
+reconfiguring a camera stalls its stream for longer than the wake-up budget.
+
+Process CPU time and wall time are accounted per mode. Wake-up latency is
+the time from the first frame that showed motion to the full-quality result.
+"""
+import logging
+import time
+
+import cv2
+
+from inference import HandDetector
+
+log = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (64, 48)
+MOTION_BURST_GAP = 1.0  # Seconds without motion that end a motion burst
+
+
+class NoHands:
+    """Results of a frame that was not run through inference"""
+    multi_hand_landmarks = None
+    multi_handedness = None
+
+
+NO_HANDS = NoHands()
+
+
+class IdleGovernor:
+    """Duty-cycles hand inference between full-rate tracking and idle presence detection"""
+
+    def __init__(self, hands, idle_after=10.0, idle_fps=5.0, idle_width=320,
+                 motion_threshold=4.0, throttle=True, presence=None, clock=time.perf_counter, name=None):
+        self.hands = hands                        # Full-rate processor
+        self.presence = presence or HandDetector(model_complexity=0, max_num_hands=1)
+        self.idle_after = idle_after              # Seconds without a hand before idling
+        self.idle_interval = 1.0 / idle_fps if idle_fps else 0.0
+        self.idle_width = idle_width              # Presence detection input width
+        self.motion_threshold = motion_threshold  # Mean absolute thumbnail change (0-255); 0 = always detect
+        self.throttle = throttle                  # Sleep between idle frames (not for files)
+        self.clock = clock
+        self.prefix = f"[{name}] " if name else ""  # For messages from multicam workers
+
+        self.idle = False
+        self.last_hand = clock()
+        self._motion_since = None    # First frame of the current motion burst
+        self._last_motion = 0.0
+        self._small = None           # Reused presence-detection buffer
+        self._thumbnail = None       # Reused color thumbnail buffer
+        self._thumbnails = [None, None]  # Current/previous grayscale thumbnails
+
+        # Accounting: {mode: [wall seconds, CPU seconds, frames]}
+        self.modes = {"active": [0.0, 0.0, 0], "idle": [0.0, 0.0, 0]}
+        self._mode_wall = clock()
+        self._mode_cpu = time.process_time()
+        self.idle_inferences = 0     # Presence detections run while idle
+        self.wake_latencies = []
+
+    def _switch(self, idle):
+        self._account()
+        self.idle = idle
+        self._motion_since = None
+        self._thumbnails = [None, None]
+
+    def _account(self):
+        now, cpu = self.clock(), time.process_time()
+        totals = self.modes["idle" if self.idle else "active"]
+        totals[0] += now - self._mode_wall
+        totals[1] += cpu - self._mode_cpu
+        self._mode_wall, self._mode_cpu = now, cpu
+
+    def _motion(self, image_rgb):
+        """Mean absolute change of a tiny grayscale thumbnail since the previous idle frame"""
+        thumbnail = self._thumbnail = cv2.resize(image_rgb, THUMBNAIL_SIZE, dst=self._thumbnail,
+                                                 interpolation=cv2.INTER_AREA)
+        current = cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY, dst=self._thumbnails[0])
+        previous = self._thumbnails[1]
+        # Swap so the current thumbnail becomes the previous one without copying
+        self._thumbnails = [previous, current]
+        if previous is None:
+            return 0.0
+        return cv2.norm(current, previous, cv2.NORM_L1) / current.size
+
+    def process(self, image_rgb):
+        now = self.clock()
+        if not self.idle:
+            results = self.hands.process(image_rgb)
+            self.modes["active"][2] += 1
+            if results.multi_hand_landmarks:
+                self.last_hand = now
+            elif now - self.last_hand >= self.idle_after:
+                self._switch(True)
+                log.info("%sNo hand for %g s: idle mode", self.prefix, self.idle_after)
+            return results
+
+        self.modes["idle"][2] += 1
+        results = self._presence(image_rgb, now)
+        if results is None:
+            # Still idle: wait out the rest of the idle frame interval
+            if self.throttle:
+                delay = self.idle_interval - (self.clock() - now)
+                if delay > 0:
+                    time.sleep(delay)
+            return NO_HANDS
+        return results
+
+    def _presence(self, image_rgb, now):
+        """Idle frame: return full-quality results on wake-up, else None"""
+        if self.motion_threshold > 0:
+            if self._motion(image_rgb) < self.motion_threshold:
+                if now - self._last_motion > MOTION_BURST_GAP:
+                    self._motion_since = None
+                return None
+        if self._motion_since is None:
+            self._motion_since = now
+        self._last_motion = now
+
+        height, width = image_rgb.shape[:2]
+        if width > self.idle_width:
+            size = (self.idle_width, max(1, round(height * self.idle_width / width)))
+            small = self._small = cv2.resize(image_rgb, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        else:
+            small = image_rgb
+        self.idle_inferences += 1
+        results = self.presence.process(small)
+        if not results.multi_hand_landmarks:
+            if self.motion_threshold <= 0:
+                self._motion_since = None  # No motion bursts: latency counts from this frame
+            return None
+
+        # Hand found: run the full-rate processor on this same frame
+        motion_since = self._motion_since
+        self._switch(False)
+        results = self.hands.process(image_rgb)
+        self.last_hand = self.clock()
+        self.wake_latencies.append(self.last_hand - motion_since)
+        log.info("%sHand detected: active mode (%.0f ms wake-up)", self.prefix,
+                 (self.last_hand - motion_since) * 1000.0)
+        return results
+
+    def warm_up(self, width=640, height=480):
+        self.hands.warm_up(width, height)
+        self.presence.warm_up(width, height)
+
+    def close(self):
+        self.hands.close()
+        self.presence.close()
+
+    def stats(self):
+        self._account()
+        parts = []
+        for mode, (wall, cpu, frames) in self.modes.items():
+            if wall > 0:
+                parts.append(f"{mode} {wall:.1f} s, {frames} frames, "
+                             f"CPU {cpu:.2f} s ({100.0 * cpu / wall:.0f}% of a core)")
+        text = "; ".join(parts) + f"; {self.idle_inferences} presence inferences"
+        if self.wake_latencies:
+            ordered = sorted(self.wake_latencies)
+            text += (f"; {len(ordered)} wake-ups, latency median {ordered[len(ordered) // 2] * 1000.0:.0f} ms,"
+                     f" max {ordered[-1] * 1000.0:.0f} ms")
+        return text
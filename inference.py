@@ -0,0 +1,206 @@
+"""MediaPipe inference with adaptive preprocessing.
+
+HandDetector wraps mp.solutions.hands.Hands behind the same ``process()``
+call and adds two optional optimizations:
+
+* ROI cropping: once a hand is found, the next frame is cropped to the
+  previous landmark bounding box plus a margin (and downscaled if large)
+  before inference. Landmarks are mapped back to full-frame normalized
+  coordinates, so the Controller never sees the crop. When the hand is lost
+  the detector falls back to full-frame detection. While fewer than
+  ``max_num_hands`` hands are tracked, every ``full_search_interval``-th
+  frame is searched in full, so a hand entering elsewhere is picked up.
+* Automatic model complexity: with a frame-time budget, inference switches
+  to model_complexity=0 when its smoothed time exceeds the budget and back
+  to 1 when there is comfortable headroom.
+
+MediaPipe itself is imported the first time a graph is built, so importing
+this module is cheap; ``warm_up()`` builds the graphs ahead of the first
+live frame.
+"""
+import logging
+import math
+import time
+
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def create_hands(model_complexity=1, max_num_hands=1):
+    """Initialize MediaPipe with improved settings"""
+    import mediapipe as mp  # Deferred: the slowest import at startup
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_num_hands,  # Only detect one hand at a time by default
+        min_detection_confidence=0.6,  # Slightly lower to improve detection rate
+        min_tracking_confidence=0.6,   # Improved tracking
+        model_complexity=model_complexity  # 1 = better accuracy, 0 = faster
+    )
+
+
+def landmark_bounds(*hand_landmarks):
+    """Normalized (x_min, y_min, x_max, y_max) enclosing one or more landmark lists"""
+    xs = [lm.x for hand in hand_landmarks for lm in hand.landmark]
+    ys = [lm.y for hand in hand_landmarks for lm in hand.landmark]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def roi_from_bounds(bounds, width, height, margin=0.25, min_size=96):
+    """Square pixel ROI (x0, y0, x1, y1) around normalized bounds, clamped to the frame.
+
+    Returns None when the bounds are not finite or the ROI is empty after
+    clamping; the caller then searches the full frame.
+    """
+    if not all(math.isfinite(v) for v in bounds):
+        return None
+    # Landmarks can be predicted outside the frame: order and clamp the bounds to it
+    x_min, x_max = sorted(min(max(v, 0.0), 1.0) for v in (bounds[0], bounds[2]))
+    y_min, y_max = sorted(min(max(v, 0.0), 1.0) for v in (bounds[1], bounds[3]))
+    cx = (x_min + x_max) / 2 * width
+    cy = (y_min + y_max) / 2 * height
+    side = max((x_max - x_min) * width, (y_max - y_min) * height)
+    side = max(side * (1 + 2 * margin), min_size)
+    half = side / 2
+    x0, y0 = max(0, int(cx - half)), max(0, int(cy - half))
+    x1, y1 = min(width, int(cx + half)), min(height, int(cy + half))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return x0, y0, x1, y1
+
+
+def map_landmarks_to_frame(results, roi, width, height):
+    """Convert landmarks from ROI-normalized to frame-normalized coordinates in place"""
+    x0, y0, x1, y1 = roi
+    roi_width, roi_height = x1 - x0, y1 - y0
+    sx, sy = roi_width / width, roi_height / height
+    ox, oy = x0 / width, y0 / height
+    for hand_landmarks in results.multi_hand_landmarks or ():
+        for lm in hand_landmarks.landmark:
+            lm.x = lm.x * sx + ox
+            lm.y = lm.y * sy + oy
+            lm.z = lm.z * sx  # z uses roughly the same scale as x
+
+
+class HandDetector:
+    """Drop-in replacement for Hands.process() with ROI cropping and auto complexity"""
+
+    def __init__(self, model_complexity=1, max_num_hands=1, roi=False, roi_margin=0.25,
+                 roi_max_size=256, frame_budget_ms=None, hands_factory=create_hands, full_search_interval=15):
+        self.model_complexity = model_complexity
+        self.max_num_hands = max_num_hands
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.roi_max_size = roi_max_size  # Larger crops are downscaled to this side length
+        self.full_search_interval = full_search_interval  # ROI frames between searches for more hands
+        self._roi_streak = 0  # ROI frames since the last full-frame search
+        self.frame_budget = frame_budget_ms / 1000.0 if frame_budget_ms else None
+        self.hands_factory = hands_factory
+        self._hands = {}  # (model_complexity, "roi"|"full") -> Hands
+        self._bounds = None  # Previous landmark bounds, None when tracking is lost
+        self._tracked = 0    # Hands found on the previous frame
+        self._ewma = None
+        self._frames_since_switch = 0
+        self.min_dwell_frames = 60  # Avoid flapping between models
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.complexity_switches = 0
+
+    def _get_hands(self, kind, complexity=None):
+        # Separate graphs for crops and full frames keep MediaPipe's own
+        # tracking state consistent with the coordinates it is fed
+        key = (self.model_complexity if complexity is None else complexity, kind)
+        hands = self._hands.get(key)
+        if hands is None:
+            hands = self._hands[key] = self.hands_factory(key[0], self.max_num_hands)
+        return hands
+
+    def warm_up(self, width=640, height=480):
+        """Build every graph this detector may use and run it once on a blank frame.
+
+        MediaPipe initializes a graph on its first ``process()`` call; doing
+        that here keeps it from delaying the first live frame (and gesture).
+        Blank frames contain no hand, so no tracking state is left behind.
+        """
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        complexities = (0, 1) if self.frame_budget else (self.model_complexity,)
+        for complexity in complexities:
+            self._get_hands("full", complexity).process(frame)
+            if self.roi:
+                side = min(self.roi_max_size, width, height)
+                self._get_hands("roi", complexity).process(np.zeros((side, side, 3), dtype=np.uint8))
+
+    def _process_roi(self, image_rgb):
+        height, width = image_rgb.shape[:2]
+        roi = roi_from_bounds(self._bounds, width, height, self.roi_margin)
+        if roi is None:
+            return None  # Degenerate crop: search the full frame
+        x0, y0, x1, y1 = roi
+        crop = image_rgb[y0:y1, x0:x1]
+        side = max(x1 - x0, y1 - y0)
+        if side > self.roi_max_size:
+            scale = self.roi_max_size / side
+            crop = cv2.resize(crop, (max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale))),
+                              interpolation=cv2.INTER_AREA)
+        else:
+            crop = crop.copy()  # MediaPipe needs a contiguous image
+        results = self._get_hands("roi").process(crop)
+        if results.multi_hand_landmarks:
+            map_landmarks_to_frame(results, roi, width, height)
+        return results
+
+    def process(self, image_rgb):
+        start = time.perf_counter()
+        results = None
+        if self.roi and self._bounds is not None and not self._search_more_hands():
+            results = self._process_roi(image_rgb)
+            if results is not None:
+                self.roi_frames += 1
+                self._roi_streak += 1
+                if not results.multi_hand_landmarks:
+                    results = None  # Tracking lost: fall back to the full frame
+
+        if results is None:
+            results = self._get_hands("full").process(image_rgb)
+            self.full_frames += 1
+            self._roi_streak = 0
+
+        if self.roi:
+            # With several hands the crop encloses all of them
+            self._tracked = len(results.multi_hand_landmarks or ())
+            self._bounds = landmark_bounds(*results.multi_hand_landmarks) if self._tracked else None
+        if self.frame_budget:
+            self._adapt_complexity(time.perf_counter() - start)
+        return results
+
+    def _search_more_hands(self):
+        """Whether this frame should be searched in full for hands the ROI cannot see"""
+        return self._tracked < self.max_num_hands and self._roi_streak >= self.full_search_interval
+
+    def _adapt_complexity(self, elapsed):
+        self._ewma = elapsed if self._ewma is None else 0.9 * self._ewma + 0.1 * elapsed
+        self._frames_since_switch += 1
+        if self._frames_since_switch < self.min_dwell_frames:
+            return
+        if self.model_complexity == 1 and self._ewma > self.frame_budget:
+            self._set_complexity(0)
+        elif self.model_complexity == 0 and self._ewma < 0.5 * self.frame_budget:
+            # Full model costs roughly twice the lite one; only upgrade with headroom
+            self._set_complexity(1)
+
+    def _set_complexity(self, complexity):
+        self.model_complexity = complexity
+        self.complexity_switches += 1
+        self._ewma = None
+        self._frames_since_switch = 0
+        log.info("Switched to model_complexity=%d", complexity)
+
+    def close(self):
+        for hands in self._hands.values():
+            hands.close()
+        self._hands.clear()
+
+    def stats(self):
+        return (f"{self.roi_frames} ROI inferences, {self.full_frames} full-frame inferences, "
+                f"model_complexity={self.model_complexity} ({self.complexity_switches} switches)")
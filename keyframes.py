@@ -0,0 +1,203 @@
+"""Keyframe inference with optical-flow landmark propagation.
+
+KeyframeTracker wraps a detector (Hands or HandDetector) and only runs full
+MediaPipe inference on keyframes. In between, the 21 landmarks are carried
+forward with pyramidal Lucas-Kanade optical flow on grayscale frames, so the
+Controller still receives landmarks at the full camera rate. A keyframe is
+forced when flow tracking degrades, and the keyframe interval adapts to the
+measured hand motion: fast motion shortens it, a still hand stretches it.
+
+Usage (benchmark against every-frame inference on a recorded clip):
+    python keyframes.py clip.mp4 [--max-interval 4]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from features import NUM_LANDMARKS
+
+
+def _copy(message):
+    """Copy a protobuf message, so consumers may modify results in place"""
+    copy = type(message)()
+    copy.CopyFrom(message)
+    return copy
+
+
+class TrackedResults:
+    """Minimal stand-in for MediaPipe results on propagated frames"""
+    __slots__ = ("multi_hand_landmarks", "multi_handedness")
+
+    def __init__(self, multi_hand_landmarks, multi_handedness=None):
+        self.multi_hand_landmarks = multi_hand_landmarks
+        self.multi_handedness = multi_handedness
+
+
+class KeyframeTracker:
+    """Runs ``detector.process`` every N frames and propagates landmarks in between"""
+
+    LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                     criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+    def __init__(self, detector, max_interval=4, min_tracked=0.8, max_error=20.0,
+                 fast_motion=12.0, slow_motion=3.0):
+        self.detector = detector
+        self.max_interval = max_interval  # Upper bound for frames between keyframes
+        self.min_tracked = min_tracked    # Fraction of landmarks that must be tracked
+        self.max_error = max_error        # Median LK error that forces a keyframe
+        self.fast_motion = fast_motion    # px/frame above which the interval shrinks
+        self.slow_motion = slow_motion    # px/frame below which the interval grows
+        self.interval = 1
+        self._since_keyframe = 0
+        self._templates = None    # Landmark lists of the last keyframe
+        self._handedness = None
+        self._points = None       # (hands * 21, 1, 2) float32 pixel positions
+        self._gray_prev = None
+        self.keyframes = 0
+        self.propagated = 0
+
+    def _gray(self, image_rgb):
+        # LK builds its image pyramid internally; the grayscale frame is kept
+        # so each frame is converted only once
+        return cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
+
+    def _keyframe(self, image_rgb, gray):
+        results = self.detector.process(image_rgb)
+        self.keyframes += 1
+        frames = self._since_keyframe + 1
+        self._since_keyframe = 0
+        self._gray_prev = gray
+        if results.multi_hand_landmarks:
+            height, width = image_rgb.shape[:2]
+            points = np.array([[[lm.x * width, lm.y * height]]
+                               for hand in results.multi_hand_landmarks for lm in hand.landmark],
+                              dtype=np.float32)
+            if self._points is not None and len(points) == len(self._points):
+                self._adapt(float(np.median(np.linalg.norm((points - self._points)[:, 0], axis=1))) / frames)
+            self._templates = list(results.multi_hand_landmarks)
+            # Copied now: the caller mirrors the returned results in place
+            self._handedness = [_copy(h) for h in results.multi_handedness] if results.multi_handedness else None
+            self._points = points
+        else:
+            self._templates = None
+            self._points = None
+        return results
+
+    def _adapt(self, motion):
+        """Adapt the keyframe interval to the hand's motion in px/frame"""
+        if motion > self.fast_motion:
+            self.interval = max(1, self.interval // 2)
+        elif motion < self.slow_motion:
+            self.interval = min(self.max_interval, self.interval + 1)
+
+    def process(self, image_rgb):
+        gray = self._gray(image_rgb)
+        if self._templates is None or self._since_keyframe + 1 >= self.interval:
+            return self._keyframe(image_rgb, gray)
+
+        points, status, error = cv2.calcOpticalFlowPyrLK(self._gray_prev, gray, self._points, None,
+                                                         **self.LK_PARAMS)
+        tracked = status.ravel() == 1
+        if (tracked.sum() < self.min_tracked * len(tracked)
+                or np.median(error[tracked]) > self.max_error):
+            # Flow lost the hand: re-detect on this frame
+            self.interval = 1
+            return self._keyframe(image_rgb, gray)
+
+        self._adapt(float(np.median(np.linalg.norm((points - self._points)[tracked, 0], axis=1))))
+
+        # Untracked points keep their previous position
+        points[~tracked] = self._points[~tracked]
+        self._points, self._gray_prev = points, gray
+        self._since_keyframe += 1
+        self.propagated += 1
+
+        height, width = image_rgb.shape[:2]
+        multi_hand_landmarks = []
+        for i, template in enumerate(self._templates):
+            hand_landmarks = _copy(template)
+            for lm, (x, y) in zip(hand_landmarks.landmark, points[i * NUM_LANDMARKS:(i + 1) * NUM_LANDMARKS, 0]):
+                lm.x = float(x) / width
+                lm.y = float(y) / height
+            multi_hand_landmarks.append(hand_landmarks)
+        handedness = [_copy(h) for h in self._handedness] if self._handedness else None
+        return TrackedResults(multi_hand_landmarks, handedness)
+
+    def warm_up(self, width=640, height=480):
+        self.detector.warm_up(width, height)
+
+    def close(self):
+        self.detector.close()
+
+    def stats(self):
+        total = self.keyframes + self.propagated
+        share = 100.0 * self.keyframes / total if total else 0.0
+        return f"{self.keyframes} keyframes, {self.propagated} propagated frames ({share:.0f}% inference)"
+
+
+def _landmark_session(video_path, detector, limit=None):
+    """Run a detector over a video file and return (Session, seconds of CPU time)"""
+    from recorder import SessionRecorder
+    from sources import VideoFileSource, mirror_results
+
+    cap = VideoFileSource(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    recorder = SessionRecorder(None)
+    cpu_start = time.process_time()
+    frame_index = 0
+    image_rgb = None
+    while limit is None or frame_index < limit:
+        success, image = cap.read()
+        if not success:
+            break
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image_rgb)
+        results = mirror_results(detector.process(image_rgb))
+        recorder.add(frame_index / fps, results.multi_hand_landmarks, results.multi_handedness)
+        frame_index += 1
+    cap.release()
+    return recorder.session(), time.process_time() - cpu_start
+
+
+def main(argv=None):
+    import difflib
+    from inference import HandDetector
+    from replay import replay_session
+
+    parser = argparse.ArgumentParser(description="Compare keyframe propagation with every-frame inference")
+    parser.add_argument("video", help="recorded clip (any format OpenCV can read)")
+    parser.add_argument("--max-interval", type=int, default=4)
+    parser.add_argument("--frames", type=int, help="only process the first N frames")
+    args = parser.parse_args(argv)
+
+    baseline_detector = HandDetector()
+    baseline, baseline_cpu = _landmark_session(args.video, baseline_detector, args.frames)
+    baseline_detector.close()
+
+    tracker = KeyframeTracker(HandDetector(), max_interval=args.max_interval)
+    keyframed, keyframed_cpu = _landmark_session(args.video, tracker, args.frames)
+    tracker.close()
+
+    baseline_actions = [repr(action) for _, action in replay_session(baseline).actions
+                        if action.kind != "move"]
+    keyframed_actions = [repr(action) for _, action in replay_session(keyframed).actions
+                         if action.kind != "move"]
+    similarity = difflib.SequenceMatcher(None, baseline_actions, keyframed_actions).ratio()
+
+    both = baseline.present & keyframed.present
+    error = np.linalg.norm(baseline.landmarks[both, :, :2] - keyframed.landmarks[both, :, :2], axis=-1)
+
+    print(f"Frames: {len(baseline)}")
+    print(f"Every-frame inference: {baseline_cpu:.2f} s CPU, {len(baseline_actions)} actions")
+    print(f"Keyframe propagation:  {keyframed_cpu:.2f} s CPU, {len(keyframed_actions)} actions, "
+          + tracker.stats())
+    print(f"CPU saved: {100.0 * (1 - keyframed_cpu / baseline_cpu) if baseline_cpu else 0.0:.0f}%")
+    print(f"Action sequence agreement (cursor moves excluded): {100.0 * similarity:.1f}%")
+    if both.any():
+        print(f"Landmark error vs every-frame: mean {error.mean():.4f}, p95 {np.percentile(error, 95):.4f} "
+              "(normalized units)")
+
+
+if __name__ == "__main__":
+    main()
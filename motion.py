@@ -0,0 +1,239 @@
+"""Dynamic gestures: swipes, circles and pushes.
+
+Every tracked hand owns a MotionTracker, a preallocated ring buffer of its
+last K palm samples (x, y, log palm size and time). Moving toward the camera
+grows the palm, so the log size acts as a third axis. Each frame updates the
+motion features incrementally, in O(1):
+
+    speed     palm lengths per second, exponentially smoothed
+    path      length of the current stroke, in palm lengths
+    turning   signed turning angle accumulated along the stroke
+
+A stroke starts when the palm speeds up past ``start_speed``. It ends when
+the palm slows below ``stop_speed`` (or a fifth of the stroke's peak speed),
+or when it fills the buffer. Only then
+is it matched: the stroke is resampled to RESAMPLE_POINTS points by arc
+length, normalized, and compared with TEMPLATES using dynamic time warping
+within a Sakoe-Chiba band. Templates are visited in order of their LB_Keogh
+lower bound. DTW abandons a template as soon as a whole row of the cost
+matrix exceeds the best distance so far. Matching a stroke takes well under
+a millisecond, and frames without a finished stroke cost a few arithmetic
+operations.
+"""
+import math
+
+import numpy as np
+
+RESAMPLE_POINTS = 16
+BAND = 2              # Sakoe-Chiba band (points) for DTW and the LB_Keogh envelope
+PUSH_GAIN = 3.0       # Weight of log palm size relative to palm lengths of travel
+MIN_TURN_STEP = 0.1   # Palm lengths a step must cover to count toward the turning angle
+
+
+def _circle(clockwise, phase):
+    angles = phase + np.linspace(0.0, 2.0 * np.pi, RESAMPLE_POINTS) * (1.0 if clockwise else -1.0)
+    points = np.zeros((RESAMPLE_POINTS, 3))
+    # Image y grows downward, so increasing angles turn clockwise on screen
+    points[:, 0], points[:, 1] = np.cos(angles), np.sin(angles)
+    return points
+
+
+def _line(direction):
+    return np.linspace(0.0, 1.0, RESAMPLE_POINTS)[:, None] * np.asarray(direction, dtype=np.float64)
+
+
+def normalize_stroke(points):
+    """Translate a stroke to start at the origin and scale its largest excursion to 1"""
+    points = points - points[0]
+    extent = np.abs(points).max()
+    return points / extent if extent > 1e-9 else points
+
+
+def _envelope(template):
+    """LB_Keogh upper/lower envelope of a template within the band"""
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(template, ((BAND, BAND), (0, 0)), mode="edge"), 2 * BAND + 1, axis=0)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def _templates():
+    shapes = [
+        ("swipe_right", _line((1, 0, 0))),
+        ("swipe_left", _line((-1, 0, 0))),
+        ("swipe_up", _line((0, -1, 0))),
+        ("swipe_down", _line((0, 1, 0))),
+        ("push", _line((0, 0, 1))),
+        ("pull", _line((0, 0, -1))),
+    ]
+    # A circle can start anywhere on it; one template per quarter
+    for phase in np.arange(4) * np.pi / 2:
+        shapes.append(("circle_cw", _circle(True, phase)))
+        shapes.append(("circle_ccw", _circle(False, phase)))
+    return tuple((name, normalize_stroke(points)) + _envelope(normalize_stroke(points))
+                 for name, points in shapes)
+
+
+# (name, template, upper envelope, lower envelope)
+TEMPLATES = _templates()
+MOTIONS = tuple(sorted({name for name, *_ in TEMPLATES}))
+CIRCLES = ("circle_cw", "circle_ccw")
+
+
+def lb_keogh(query, upper, lower):
+    """Lower bound of the banded DTW distance between ``query`` and a template"""
+    above = np.maximum(query - upper, 0.0)
+    below = np.maximum(lower - query, 0.0)
+    return float((above * above).sum() + (below * below).sum())
+
+
+def dtw_distance(query, template, best=math.inf):
+    """Squared-Euclidean DTW within the band, abandoned early once above ``best``"""
+    n = len(query)
+    # Pairwise costs in one vectorized pass; the recursion reads them as floats
+    costs = ((query[:, None, :] - template[None, :, :]) ** 2).sum(axis=-1).tolist()
+    inf = math.inf
+    previous = [inf] * n
+    for i in range(n):
+        row = [inf] * n
+        row_costs = costs[i]
+        for j in range(max(0, i - BAND), min(n, i + BAND + 1)):
+            if i == 0 and j == 0:
+                row[j] = row_costs[0]
+                continue
+            step = previous[j]
+            if j:
+                step = min(step, row[j - 1], previous[j - 1])
+            row[j] = row_costs[j] + step
+        if min(row) >= best:
+            return inf  # Every warping path through this row is already worse
+        previous = row
+    return previous[-1]
+
+
+def match_stroke(points, max_distance=0.25, turning=None):
+    """Return (motion name, distance) for an (N, 3) stroke, or (None, distance).
+
+    ``distance`` is the RMS per-point DTW distance to the best template.
+    ``turning`` (radians, if known) skips circle templates for strokes that
+    did not turn at least half a circle, and the other templates for strokes
+    that turned more than that.
+    """
+    if len(points) < 2:
+        return None, math.inf
+    segments = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    arc = np.concatenate(([0.0], np.cumsum(segments)))
+    if arc[-1] <= 1e-9:
+        return None, math.inf
+    targets = np.linspace(0.0, arc[-1], RESAMPLE_POINTS)
+    query = np.empty((RESAMPLE_POINTS, 3))
+    for c in range(3):
+        query[:, c] = np.interp(targets, arc, points[:, c])
+    query = normalize_stroke(query)
+
+    candidates = TEMPLATES
+    if turning is not None:
+        circular = abs(turning) >= np.pi
+        candidates = [t for t in TEMPLATES if (t[0] in CIRCLES) == circular]
+    # Sorted on the bound alone: ties between templates must not compare the arrays
+    bounds = sorted(((lb_keogh(query, upper, lower), name, template)
+                     for name, template, upper, lower in candidates), key=lambda c: c[0])
+
+    # Only templates that can still beat the acceptance threshold are worth a full DTW
+    best, best_name = (max_distance ** 2) * RESAMPLE_POINTS, None
+    for bound, name, template in bounds:
+        if bound >= best:
+            break  # Bounds are sorted, so no remaining template can win
+        distance = dtw_distance(query, template, best)
+        if distance < best:
+            best, best_name = distance, name
+    return best_name, math.sqrt(best / RESAMPLE_POINTS)
+
+
+class MotionTracker:
+    """Ring buffer of one hand's recent palm samples with incremental motion features"""
+
+    def __init__(self, size=48, start_speed=4.0, stop_speed=1.5, min_path=1.0, max_distance=0.25):
+        self.size = size
+        self.samples = np.zeros((size, 3), dtype=np.float64)   # x, y, log palm size
+        self.times = np.zeros(size, dtype=np.float64)
+        self.start_speed = start_speed    # Palm lengths/s that start a stroke
+        self.stop_speed = stop_speed      # Palm lengths/s that end it
+        self.min_path = min_path          # Shortest stroke considered, in palm lengths
+        self.max_distance = max_distance  # Largest accepted RMS template distance
+        self.reset()
+
+    def reset(self):
+        self.count = 0           # Samples written; the newest is at (count - 1) % size
+        self.speed = 0.0
+        self.moving = False
+        self.stroke_start = 0    # Sample number of the stroke's first sample
+        self.stroke_time = 0.0
+        self.path = 0.0
+        self.turning = 0.0
+        self.peak_speed = 0.0
+        self.slow_frames = 0
+        self.motion = None       # Motion recognized on the latest frame
+        self.distance = math.inf
+        self._last = None        # (x, y, log size, time) of the previous sample
+        self._step = None        # Previous significant xy step, for the turning angle
+
+    def update(self, now, x, y, palm_size):
+        """Add a palm sample; returns the motion that ended on this frame, or None"""
+        log_size = math.log(max(palm_size, 1e-6))
+        slot = self.count % self.size
+        self.samples[slot] = x, y, log_size
+        self.times[slot] = now
+        self.count += 1
+        self.motion = None
+
+        last, self._last = self._last, (x, y, log_size, now)
+        if last is None:
+            return None
+        dt = now - last[3]
+        if dt <= 0:
+            return None
+        dx, dy = (x - last[0]) / palm_size, (y - last[1]) / palm_size
+        step = math.sqrt(dx * dx + dy * dy + (PUSH_GAIN * (log_size - last[2])) ** 2)
+        self.speed = 0.5 * self.speed + 0.5 * step / dt
+
+        if not self.moving:
+            if self.speed >= self.start_speed:
+                # The stroke began with the previous sample
+                self.moving = True
+                self.stroke_start = self.count - 2
+                self.stroke_time = last[3]
+                self.path, self.turning, self.slow_frames = step, 0.0, 0
+                self.peak_speed = self.speed
+                self._step = None
+            return None
+
+        self.path += step
+        if dx * dx + dy * dy >= MIN_TURN_STEP ** 2:
+            # Steps shorter than MIN_TURN_STEP are mostly landmark jitter
+            if self._step is not None:
+                px, py = self._step
+                self.turning += math.atan2(px * dy - py * dx, px * dx + py * dy)
+            self._step = (dx, dy)
+        self.peak_speed = max(self.peak_speed, self.speed)
+        slow = self.speed < max(self.stop_speed, 0.2 * self.peak_speed)
+        self.slow_frames = self.slow_frames + 1 if slow else 0
+        if self.slow_frames >= 2 or self.count - self.stroke_start >= self.size:
+            self.moving = False
+            self.motion = self._classify()
+        return self.motion
+
+    def stroke(self):
+        """The current (or just finished) stroke as an (N, 3) array in palm lengths"""
+        indices = np.arange(max(self.stroke_start, self.count - self.size), self.count) % self.size
+        points = self.samples[indices]
+        # Palm lengths relative to the palm size at the start of the stroke
+        scale = math.exp(points[0, 2])
+        points[:, :2] /= scale
+        points[:, 2] = PUSH_GAIN * (points[:, 2] - points[0, 2])
+        return points
+
+    def _classify(self):
+        if self.path < self.min_path:
+            return None
+        motion, self.distance = match_stroke(self.stroke(), self.max_distance, self.turning)
+        return motion
@@ -0,0 +1,416 @@
+"""Multi-camera deployment: one inference process per video source.
+
+Each source (camera index, video file or image directory) gets its own worker process that
+runs capture and hand inference, so MediaPipe scales across cores instead
+of sharing one GIL-bound loop. Workers never ship frames: every frame becomes
+a compact binary record (frame id, capture time, inference time, and each
+detected hand's handedness and 21x3 landmarks) sent over a pipe to this
+process, the arbiter, which owns the Controller and action injection.
+
+The arbiter gives control to one source at a time: the source that last
+showed a hand keeps it until it has seen no hand for ``--handoff`` seconds,
+so two cameras seeing the same user do not fight over the cursor. Crashed
+workers are restarted with exponential backoff, and per-source throughput,
+hand rate and capture-to-arbiter latency are reported periodically.
+
+Usage:
+    python multicam.py 0 1 [--max-hands 2] [--handoff 0.5] [--report-interval 5] [--journal gestures.journal]
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import struct
+import time
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from actions import ActionDispatcher, BACKENDS, create_backend
+from classifier import KNNClassifier
+from controller import Controller
+from events import HANDEDNESS, attach as attach_events
+from features import NUM_LANDMARKS
+from gesture_map import GestureMap
+from profiler import RollingWindow
+from telemetry import DEFAULT_RECORDS, attach as attach_journal
+
+log = logging.getLogger(__name__)
+
+# frame_id, capture_time (time.time), inference seconds, hand count; followed
+# by one handedness byte per hand (events.HANDEDNESS, 255 if unknown) and
+# NUM_LANDMARKS * 3 float32 landmarks per hand
+HEADER = struct.Struct("<IdfB")
+LANDMARK_BYTES = NUM_LANDMARKS * 3 * 4
+HAND_LABELS = {code: label for label, code in HANDEDNESS.items()}
+
+
+def pack_record(frame_id, capture_time, inference_time, landmarks=None, handedness=()):
+    """Encode one frame; ``landmarks`` is (hands, 21, 3) (or None) and ``handedness`` their labels"""
+    count = 0 if landmarks is None else len(landmarks)
+    if not count:
+        return HEADER.pack(frame_id, capture_time, inference_time, 0)
+    # Hands without a handedness label (e.g. none reported) are sent as unknown
+    codes = bytes(HANDEDNESS.get(label, 255) for label in handedness).ljust(count, b"\xff")
+    return (HEADER.pack(frame_id, capture_time, inference_time, count) + codes
+            + np.ascontiguousarray(landmarks, dtype=np.float32).tobytes())
+
+
+def unpack_record(data):
+    """Decode a record into (frame_id, capture_time, inference_time, hands or None, labels or None).
+
+    ``hands`` is a list of (21, 3) arrays and ``labels`` their "Left"/"Right"
+    handedness, in the form Controller.update takes them.
+    """
+    frame_id, capture_time, inference_time, count = HEADER.unpack_from(data)
+    if not count:
+        return frame_id, capture_time, inference_time, None, None
+    codes = data[HEADER.size:HEADER.size + count]
+    landmarks = np.frombuffer(data, dtype=np.float32, count=count * NUM_LANDMARKS * 3,
+                              offset=HEADER.size + count).reshape(count, NUM_LANDMARKS, 3)
+    labels = [HAND_LABELS.get(code, "Hand") for code in codes]
+    return frame_id, capture_time, inference_time, list(landmarks), labels
+
+
+def run_worker(source, conn, stop_event, options):
+    """Worker process: capture + inference, streaming landmark records to ``conn``.
+
+    Exits with code 0 when a video file ends and 1 when the source fails, so
+    the supervisor only restarts real failures.
+    """
+    import cv2
+    from features import landmarks_to_array
+    from idle import IdleGovernor
+    from inference import HandDetector
+    from keyframes import KeyframeTracker
+    from sources import mirror_results, open_source
+
+    # Ctrl+C goes to the whole process group; let the supervisor stop us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Spawned processes start without the arbiter's logging setup
+    logging.basicConfig(level=options["log_level"], format="%(message)s")
+
+    cap = open_source(source)
+    if cap is None:
+        log.error("[%s] Cannot open video source", source)
+        raise SystemExit(1)
+
+    hands = HandDetector(model_complexity=options["model_complexity"], max_num_hands=options["max_hands"],
+                         roi=options["roi"], frame_budget_ms=options["frame_budget"])
+    if options["keyframe_interval"] and options["keyframe_interval"] > 1:
+        hands = KeyframeTracker(hands, max_interval=options["keyframe_interval"])
+    idle = None
+    if options["idle_after"] is not None:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        hands = idle = IdleGovernor(hands, idle_after=options["idle_after"], idle_fps=options["idle_fps"],
+                                    throttle=not cap.is_file, name=source)
+    # Build the MediaPipe graphs now rather than on the first frame, so a
+    # restarted worker's first hand is not delayed
+    hands.warm_up()
+
+    landmarks = np.empty((options["max_hands"], NUM_LANDMARKS, 3), dtype=np.float32)
+    handedness = []
+    image_rgb = None
+    frame_id = 0
+    exit_code = 0
+    try:
+        while not stop_event.is_set():
+            success, image = cap.read()
+            capture_time = time.time()
+            if not success:
+                exit_code = 0 if cap.is_file else 1
+                break
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image_rgb)
+            start = time.perf_counter()
+            results = mirror_results(hands.process(image_rgb))
+            inference_time = time.perf_counter() - start
+
+            count = min(len(results.multi_hand_landmarks or ()), len(landmarks))
+            handedness.clear()
+            for i in range(count):
+                landmarks_to_array(results.multi_hand_landmarks[i], landmarks[i])
+                if results.multi_handedness:
+                    handedness.append(results.multi_handedness[i].classification[0].label)
+            try:
+                conn.send_bytes(pack_record(frame_id, capture_time, inference_time, landmarks[:count], handedness))
+            except (BrokenPipeError, EOFError, OSError):
+                break  # Arbiter went away
+            frame_id = (frame_id + 1) & 0xFFFFFFFF
+    finally:
+        if idle is not None:
+            log.info("[%s] Idle mode: %s", source, idle.stats())
+        hands.close()
+        cap.release()
+        conn.close()
+    raise SystemExit(exit_code)
+
+
+class SourceStats:
+    """Per-source counters for the throughput report"""
+
+    def __init__(self):
+        self.frames = 0
+        self.hands = 0
+        self.dropped = 0       # Records superseded by a newer one before the arbiter used them
+        self.restarts = 0
+        self.inference = RollingWindow(300)
+        self.latency = RollingWindow(300)  # Capture to arbiter, seconds
+        self.started = time.monotonic()
+        self._last_frames = 0
+        self._last_report = self.started
+
+    def fps(self, overall=False):
+        """Frames/sec since the previous call (or since start with overall=True)"""
+        now = time.monotonic()
+        if overall:
+            return self.frames / (now - self.started) if now > self.started else 0.0
+        elapsed = now - self._last_report
+        rate = (self.frames - self._last_frames) / elapsed if elapsed > 0 else 0.0
+        self._last_frames, self._last_report = self.frames, now
+        return rate
+
+    def summary(self, overall=False):
+        hand_rate = 100.0 * self.hands / self.frames if self.frames else 0.0
+        return (f"{self.fps(overall):5.1f} fps, {self.frames} frames, {hand_rate:3.0f}% hand, "
+                f"inference p50 {self.inference.stats()['p50_ms']:.1f} ms, "
+                f"capture->arbiter p50 {self.latency.stats()['p50_ms']:.1f} ms, "
+                f"{self.dropped} dropped, {self.restarts} restarts")
+
+
+class Worker:
+    """Supervisor-side handle of one source's process"""
+
+    def __init__(self, index, source):
+        self.index = index
+        self.source = source
+        self.process = None
+        self.conn = None
+        self.finished = False      # A video file reached its end
+        self.restart_delay = 0.0
+        self.restart_at = 0.0
+        self.stats = SourceStats()
+
+
+class Supervisor:
+    """Starts a worker process per source and restarts the ones that crash"""
+
+    def __init__(self, sources, options, min_restart_delay=1.0, max_restart_delay=30.0):
+        self.options = options
+        self.min_restart_delay = min_restart_delay
+        self.max_restart_delay = max_restart_delay
+        # spawn: MediaPipe and the dispatcher thread do not survive fork() well
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = self.context.Event()
+        self.workers = [Worker(i, source) for i, source in enumerate(sources)]
+
+    def _start(self, worker):
+        reader, writer = self.context.Pipe(duplex=False)
+        worker.process = self.context.Process(target=run_worker, name=f"source-{worker.source}",
+                                              args=(worker.source, writer, self.stop_event, self.options),
+                                              daemon=True)
+        worker.process.start()
+        writer.close()  # Only the child writes; EOF on the reader then means it exited
+        worker.conn = reader
+
+    def start(self):
+        for worker in self.workers:
+            self._start(worker)
+
+    def connections(self):
+        return [w.conn for w in self.workers if w.conn is not None]
+
+    def worker_for(self, conn):
+        for worker in self.workers:
+            if worker.conn is conn:
+                return worker
+        return None
+
+    def disconnect(self, worker):
+        """Called when a worker's pipe reaches EOF"""
+        worker.conn.close()
+        worker.conn = None
+
+    def poll(self):
+        """Reap exited workers and restart failed ones; returns False when all sources are done"""
+        if self.stop_event.is_set():
+            return False
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.finished:
+                continue
+            process = worker.process
+            if process is not None and not process.is_alive() and worker.conn is None:
+                process.join()
+                worker.process = None
+                if process.exitcode == 0:
+                    worker.finished = True
+                    log.info("[%s] Source finished", worker.source)
+                    continue
+                # Back off exponentially so a missing camera does not spin
+                worker.restart_delay = min(self.max_restart_delay,
+                                           max(self.min_restart_delay, worker.restart_delay * 2))
+                worker.restart_at = now + worker.restart_delay
+                log.warning("[%s] Worker exited with code %s, restarting in %.1f s",
+                            worker.source, process.exitcode, worker.restart_delay)
+            elif worker.process is None and now >= worker.restart_at:
+                worker.stats.restarts += 1
+                self._start(worker)
+        return not all(w.finished for w in self.workers)
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+            if worker.conn is not None:
+                worker.conn.close()
+                worker.conn = None
+
+
+class Arbiter:
+    """Feeds one source at a time into the Controller"""
+
+    def __init__(self, controller, handoff=0.5):
+        self.controller = controller
+        self.handoff = handoff    # Seconds without a hand before another source may take over
+        self.owner = None
+        self.owner_last_hand = float("-inf")
+        self.handoffs = 0
+
+    def feed(self, worker, hands, labels, now):
+        """Process the newest record of ``worker``; returns True if it drove the Controller"""
+        if worker.index != self.owner:
+            if hands is None or now - self.owner_last_hand < self.handoff:
+                return False
+            if self.owner is not None:
+                # Drop the previous source's hands so their state does not leak into the new one
+                self.controller.reset(keep_playback=True)
+                self.handoffs += 1
+                log.info("Control handed to source %s", worker.source)
+            self.owner = worker.index
+
+        if hands is not None:
+            self.owner_last_hand = now
+        self.controller.update(hands, labels)
+        return True
+
+
+def run(supervisor, arbiter, report_interval=5.0):
+    """Arbiter loop: drain worker pipes, drive the Controller, supervise workers"""
+    last_report = time.monotonic()
+    while supervisor.poll():
+        ready = wait(supervisor.connections(), timeout=0.1)
+        for conn in ready:
+            worker = supervisor.worker_for(conn)
+            received = 0
+            try:
+                # Latest record wins: only the newest frame per source drives actions
+                while conn.poll():
+                    _, capture_time, inference_time, hands, labels = unpack_record(conn.recv_bytes())
+                    received += 1
+                    worker.stats.hands += hands is not None
+                    worker.stats.inference.add(inference_time)
+                    worker.stats.latency.add(time.time() - capture_time)
+            except (EOFError, OSError):
+                supervisor.disconnect(worker)
+            if received:
+                worker.stats.frames += received
+                worker.stats.dropped += received - 1
+                worker.restart_delay = 0.0  # Healthy again
+                arbiter.feed(worker, hands, labels, arbiter.controller.clock())
+
+        if report_interval and time.monotonic() - last_report >= report_interval:
+            last_report = time.monotonic()
+            report(supervisor, arbiter)
+
+
+def report(supervisor, arbiter, overall=False):
+    """Print one throughput line per source; * marks the source in control"""
+    for worker in supervisor.workers:
+        owner = "*" if worker.index == arbiter.owner else " "
+        print(f"{owner}[{worker.source}] {worker.stats.summary(overall)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-camera hand gesture controller")
+    parser.add_argument("sources", nargs="+",
+                        help="camera indices, video files or image directories, one worker process each")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="pyautogui",
+                        help="how actions are injected (default: pyautogui)")
+    parser.add_argument("--gesture-map", metavar="PATH", help="load gesture definitions from a JSON file")
+    parser.add_argument("--classifier", metavar="PATH", help="recognize poses with a trained classifier model")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1), default=1)
+    parser.add_argument("--max-hands", type=int, default=1,
+                        help="hands each worker detects and the controller tracks (default 1)")
+    parser.add_argument("--roi", action="store_true", help="crop inference around the previous detection")
+    parser.add_argument("--frame-budget", type=float, metavar="MS",
+                        help="switch model_complexity to keep inference within MS")
+    parser.add_argument("--keyframe-interval", type=int, metavar="N",
+                        help="run inference at most every N frames, propagating landmarks in between")
+    parser.add_argument("--idle-after", type=float, metavar="S",
+                        help="after S seconds without a hand, a worker drops to low-rate presence detection")
+    parser.add_argument("--idle-fps", type=float, default=5.0, metavar="HZ",
+                        help="frame rate of an idle worker (default 5)")
+    parser.add_argument("--events-socket", metavar="PATH", help="stream gesture events on this Unix socket")
+    parser.add_argument("--events-port", type=int, metavar="PORT", help="stream gesture events on ws://127.0.0.1:PORT")
+    parser.add_argument("--events-landmarks", action="store_true", help="include raw landmarks in the event stream")
+    parser.add_argument("--events-origin", action="append", default=[], metavar="ORIGIN",
+                        help="allow WebSocket subscribers from this browser origin (repeatable)")
+    parser.add_argument("--journal", metavar="PATH", help="record every gesture decision to a telemetry journal")
+    parser.add_argument("--journal-records", type=int, default=DEFAULT_RECORDS, metavar="N",
+                        help=f"journal capacity in records before the oldest are overwritten (default {DEFAULT_RECORDS})")
+    parser.add_argument("--log-level", choices=("debug", "info", "warning", "error"), default="info",
+                        help="console messages to show; debug also logs every repeated gesture action")
+    parser.add_argument("--handoff", type=float, default=0.5,
+                        help="seconds without a hand before another source may take control (default 0.5)")
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between per-source throughput reports, 0 to disable (default 5)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+
+    controller = Controller(actions=ActionDispatcher(create_backend(args.backend)),
+                            gesture_map=GestureMap.load(args.gesture_map) if args.gesture_map else None,
+                            max_hands=args.max_hands,
+                            classifier=KNNClassifier.load(args.classifier) if args.classifier else None)
+
+    options = {"model_complexity": args.model_complexity, "max_hands": args.max_hands, "roi": args.roi,
+               "frame_budget": args.frame_budget, "keyframe_interval": args.keyframe_interval,
+               "idle_after": args.idle_after, "idle_fps": args.idle_fps, "log_level": args.log_level.upper()}
+    supervisor = Supervisor(args.sources, options)
+    arbiter = Arbiter(controller, args.handoff)
+
+    events = attach_events(controller, args.events_socket, args.events_port, args.events_landmarks,
+                           args.events_origin)
+    journal = attach_journal(controller, args.journal, args.journal_records)
+    print(f"Starting {len(args.sources)} worker processes; Ctrl+C to quit")
+    supervisor.start()
+    try:
+        run(supervisor, arbiter, args.report_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+    controller.actions.stop()
+    report(supervisor, arbiter, overall=True)
+    print(f"Control handoffs: {arbiter.handoffs}")
+    print("Action dispatcher: " + controller.actions.stats())
+    if events is not None:
+        events.close()
+        print("Events: " + events.stats())
+    if journal is not None:
+        journal.close()
+        print("Journal: " + journal.stats())
+    if controller.latency:
+        print(controller.latency_summary())
+
+
+if __name__ == "__main__":
+    main()
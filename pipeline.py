@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from profiler import RollingWindow, StageProfiler
+from sources import FramePool, mirror_results
+
+log = logging.getLogger(__name__)
+
+
+class LatestQueue:
+    """Bounded hand-off queue where the newest item always wins.
+
+    When the queue is full the oldest item is discarded instead of blocking
+    the producer, so a slow consumer only ever sees the freshest frame.
+    """
+
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1  # Stale item replaced by a newer one
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout/close"""
+        with self._condition:
+            if not self._items and not self.closed:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def wait_empty(self, timeout=None):
+        """Block until the consumer has taken every queued item"""
+        with self._condition:
+            if self._items and not self.closed:
+                self._condition.wait(timeout)
+            return not self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class FramePacket:
+    """A captured frame travelling through the pipeline stages"""
+    __slots__ = ("frame_id", "capture_time", "image", "results", "action_time")
+
+    def __init__(self, frame_id, capture_time, image):
+        self.frame_id = frame_id
+        self.capture_time = capture_time
+        self.image = image
+        self.results = None
+        self.action_time = None
+
+    @property
+    def latency(self):
+        """Capture-to-action latency in seconds (None until processed)"""
+        if self.action_time is None:
+            return None
+        return self.action_time - self.capture_time
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from the camera as fast as it delivers them.
+
+    File sources have no real-time rate to keep up with, so every frame is
+    handed over (waiting for the consumer) instead of being dropped; this also
+    keeps the source's ring buffer from overwriting a frame still in use.
+    Camera frames keep coming while inference is busy. The ring would reuse a
+    slot while a packet still points at it, so each one is copied into a
+    FramePool buffer that is reused once the packet and the views are done with it.
+    """
+
+    def __init__(self, cap, output_queue, profiler):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.profiler = profiler
+        self.output_queue = output_queue
+        self.stop_event = threading.Event()
+        self.failed = False
+        self.pool = FramePool()
+
+    def run(self):
+        frame_id = 0
+        is_file = getattr(self.cap, "is_file", False)
+        while not self.stop_event.is_set() and self.cap.isOpened():
+            if is_file and not self.output_queue.wait_empty(timeout=0.1):
+                continue
+            with self.profiler.stage("capture"):
+                success, image = self.cap.read()
+            if not success:
+                if is_file:
+                    log.info("End of input.")
+                else:
+                    log.error("Failed to capture image from camera.")
+                self.failed = True
+                break
+            capture_time = time.perf_counter()
+            if not is_file:
+                image = self.pool.copy(image)
+
+            self.output_queue.put(FramePacket(frame_id, capture_time, image))
+            frame_id += 1
+        self.output_queue.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class InferenceWorker(threading.Thread):
+    """Runs MediaPipe and the Controller on the newest captured frame"""
+
+    def __init__(self, hands, controller, input_queue, output_queue, latency_stats, recorder=None,
+                 profiler=None, mirror=True):
+        super().__init__(name="inference", daemon=True)
+        self.hands = hands
+        self.controller = controller
+        self.mirror = mirror
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.recorder = recorder
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.latency_stats = latency_stats
+        self.stop_event = threading.Event()
+        # Serializes Controller access with the UI thread (e.g. 'r' resets)
+        self.controller_lock = threading.Lock()
+
+    def run(self):
+        image_rgb = None  # Reused conversion buffer
+        while not self.stop_event.is_set():
+            packet = self.input_queue.get(timeout=0.1)
+            if packet is None:
+                if self.input_queue.closed:
+                    break
+                continue
+
+            # Improve performance by making image non-writeable
+            packet.image.flags.writeable = False
+            with self.profiler.stage("preprocess"):
+                image_rgb = cv2.cvtColor(packet.image, cv2.COLOR_BGR2RGB, dst=image_rgb)
+            with self.profiler.stage("inference"):
+                results = self.hands.process(image_rgb)
+                if self.mirror:
+                    mirror_results(results)
+            packet.image.flags.writeable = True
+
+            with self.profiler.stage("controller"), self.controller_lock:
+                present = self.controller.update(results.multi_hand_landmarks, results.multi_handedness)
+                if self.recorder is not None:
+                    self.recorder.add(self.controller.clock(), [hand.landmarks for hand in present],
+                                      [hand.label for hand in present])
+
+            packet.results = results
+            packet.action_time = time.perf_counter()
+            self.latency_stats.add(packet.latency)
+            self.profiler.record("capture_to_action", packet.latency)
+            self.output_queue.put(packet)
+        self.output_queue.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class Pipeline:
+    """Capture -> inference -> render pipeline joined by latest-frame-wins queues.
+
+    The render stage is driven by the caller (usually the main thread, which
+    owns the OpenCV window) through ``next_result()``.
+    """
+
+    def __init__(self, cap, hands, controller, recorder=None, profiler=None, mirror=True):
+        profiler = profiler or StageProfiler(enabled=False)
+        self.capture_queue = LatestQueue(maxsize=1)
+        self.render_queue = LatestQueue(maxsize=1)
+        self.latency = RollingWindow(300)  # Capture-to-action seconds
+        self.capture = CaptureThread(cap, self.capture_queue, profiler)
+        self.inference = InferenceWorker(hands, controller, self.capture_queue, self.render_queue,
+                                         self.latency, recorder=recorder, profiler=profiler, mirror=mirror)
+
+    @property
+    def controller_lock(self):
+        return self.inference.controller_lock
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+
+    def next_result(self, timeout=0.5):
+        """Return the newest processed FramePacket, or None if none arrived"""
+        return self.render_queue.get(timeout=timeout)
+
+    @property
+    def running(self):
+        return not self.render_queue.closed or len(self.render_queue) > 0
+
+    def stop(self):
+        self.capture.stop()
+        self.inference.stop()
+        self.capture.join(timeout=1.0)
+        self.inference.join(timeout=1.0)
+
+    def report(self):
+        stats = self.latency.stats()
+        return ("latency mean {:.1f} ms, p50 {:.1f} ms, p95 {:.1f} ms ({} frames); "
+                "dropped {} stale captures, {} stale renders").format(
+                    stats["mean_ms"], stats["p50_ms"], stats["p95_ms"], stats["count"],
+                    self.capture_queue.dropped, self.render_queue.dropped)
@@ -0,0 +1,223 @@
+"""Per-stage timing instrumentation.
+
+Stages are timed with time.perf_counter() into fixed-size rolling windows,
+from which p50/p95/p99 are computed on demand. Each stage should be written
+from a single thread; reading statistics from another thread is fine.
+
+StartupProfiler times the one-off initialization steps instead, running the
+slow independent ones (model, camera, output backend) concurrently.
+"""
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class _NullTimer:
+    """Context manager that does nothing (profiling disabled)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _StageTimer:
+    """Reusable context manager timing one stage"""
+    __slots__ = ("window", "start")
+
+    def __init__(self, window):
+        self.window = window
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.window.add(time.perf_counter() - self.start)
+        return False
+
+
+class RollingWindow:
+    """Preallocated ring buffer of the most recent samples (seconds)"""
+
+    def __init__(self, size):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def values(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def stats(self):
+        values = self.values()
+        if not len(values):
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+        p50, p95, p99 = np.percentile(values, (50, 95, 99)) * 1000.0
+        return {"count": self.count, "mean_ms": float(values.mean() * 1000.0),
+                "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+class StageProfiler:
+    """Collects per-stage timings and reports them as a HUD, file or summary.
+
+    Usage:
+        with profiler.stage("inference"):
+            results = hands.process(image_rgb)
+        profiler.frame_done()
+    """
+
+    FRAME = "frame"  # Time between frame_done() calls
+
+    def __init__(self, enabled=True, window=300, export_path=None, export_interval=5.0):
+        self.enabled = enabled
+        self.window = window
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.windows = {}
+        self._timers = {}
+        self._null_timer = _NullTimer()
+        self._last_frame = None
+        self._last_export = time.monotonic()
+
+    def _window(self, name):
+        window = self.windows.get(name)
+        if window is None:
+            window = self.windows[name] = RollingWindow(self.window)
+        return window
+
+    def stage(self, name):
+        """Context manager timing the enclosed block as stage ``name``"""
+        if not self.enabled:
+            return self._null_timer
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self._window(name))
+        return timer
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self._window(name).add(seconds)
+
+    def frame_done(self):
+        """Mark the end of a loop iteration (and export periodically)"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self._window(self.FRAME).add(now - self._last_frame)
+        self._last_frame = now
+
+        if self.export_path and time.monotonic() - self._last_export >= self.export_interval:
+            self._last_export = time.monotonic()
+            self.export(self.export_path)
+
+    def stats(self):
+        return {name: window.stats() for name, window in list(self.windows.items())}
+
+    def fps(self):
+        window = self.windows.get(self.FRAME)
+        values = window.values() if window is not None else ()
+        return 1.0 / float(np.median(values)) if len(values) else 0.0
+
+    def export(self, path):
+        """Write current statistics to ``path`` (.csv or .json)"""
+        stats = self.stats()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+                for name, row in stats.items():
+                    writer.writerow([name, row["count"]] + [f"{row[k]:.3f}" for k in
+                                                            ("mean_ms", "p50_ms", "p95_ms", "p99_ms")])
+        else:
+            with open(path, "w") as f:
+                json.dump({"timestamp": time.time(), "fps": self.fps(), "stages": stats}, f, indent=2)
+
+    def summary(self):
+        lines = [f"{'stage':<16}{'count':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)"]
+        for name, row in self.stats().items():
+            lines.append(f"{name:<16}{row['count']:>8}{row['mean_ms']:>9.2f}{row['p50_ms']:>9.2f}"
+                         f"{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}")
+        lines.append(f"median FPS: {self.fps():.1f}")
+        return "\n".join(lines)
+
+    def draw_hud(self, image, origin=(10, 120)):
+        """Draw p50/p95 per stage on a BGR image"""
+        import cv2
+        x, y = origin
+        for name, row in self.stats().items():
+            cv2.putText(image, f"{name}: {row['p50_ms']:.1f}/{row['p95_ms']:.1f} ms", (x, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+            y += 18
+
+
+class StartupProfiler:
+    """Times startup steps, including steps run concurrently on worker threads.
+
+    Usage:
+        startup = StartupProfiler()
+        camera = startup.submit("camera", open_source, "0")
+        with startup.step("controller"):
+            controller = Controller()
+        cap = camera.result()
+        print(startup.summary())
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.steps = {}          # name -> seconds, in completion order
+        self.concurrent = set()  # Steps that ran on worker threads
+        self._executor = None
+
+    @contextmanager
+    def step(self, name):
+        """Time the enclosed block as step ``name``"""
+        if threading.current_thread() is not threading.main_thread():
+            self.concurrent.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = time.perf_counter() - start
+
+    def submit(self, name, function, *args):
+        """Run ``function(*args)`` on a worker thread as step ``name``; returns its Future"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup")
+
+        def run():
+            with self.step(name):
+                return function(*args)
+        return self._executor.submit(run)
+
+    def finish(self):
+        """Mark the end of startup; returns its total wall time in seconds"""
+        if self.total is None:
+            self.total = time.perf_counter() - self.start
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+        return self.total
+
+    def summary(self):
+        total = self.finish()
+        serial = [f"{name} {seconds * 1000.0:.0f} ms" for name, seconds in self.steps.items()
+                  if name not in self.concurrent]
+        concurrent = [f"{name} {seconds * 1000.0:.0f} ms" for name, seconds in self.steps.items()
+                      if name in self.concurrent]
+        text = f"Startup {total * 1000.0:.0f} ms: " + ", ".join(serial)
+        if concurrent:
+            text += "; concurrently: " + ", ".join(concurrent)
+        return text
@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+
+from features import NUM_LANDMARKS, landmarks_to_array
+
+log = logging.getLogger(__name__)
+
+HANDEDNESS_DTYPE = "<U8"  # Fixed width, so .npz files load without pickle
+
+
+class Session:
+    """A recorded landmark stream.
+
+    timestamps:     (N,) float64 seconds, as seen by Controller.clock
+    hand_landmarks: (N, H, 21, 3) float32 normalized landmarks of up to H hands (zeros where absent)
+    hand_present:   (N, H) bool, True for the slots holding a detected hand (the first ones)
+    handedness:     (N, H) str, each hand's "Left"/"Right" label ("" when not recorded)
+
+    ``landmarks`` and ``present`` are the first hand's (N, 21, 3) and (N,)
+    views, for analyses that follow a single hand. Sessions recorded before
+    multi-hand support hold one hand and no handedness.
+    """
+
+    def __init__(self, timestamps, landmarks, present, handedness=None):
+        self.timestamps = timestamps
+        if landmarks.ndim == 3:
+            # Single-hand layout: add the hands axis
+            landmarks = landmarks[:, None]
+            present = present[:, None]
+        self.hand_landmarks = landmarks
+        self.hand_present = present
+        if handedness is None:
+            handedness = np.full(present.shape, "", dtype=HANDEDNESS_DTYPE)
+        self.handedness = handedness
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def max_hands(self):
+        return self.hand_landmarks.shape[1]
+
+    @property
+    def landmarks(self):
+        return self.hand_landmarks[:, 0]
+
+    @property
+    def present(self):
+        return self.hand_present[:, 0]
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) > 1 else 0.0
+
+    def detections(self, i):
+        """Frame i as Controller.update arguments: (landmark arrays or None, labels or None)"""
+        count = int(np.count_nonzero(self.hand_present[i]))
+        if not count:
+            return None, None
+        labels = self.handedness[i, :count].tolist()
+        return list(self.hand_landmarks[i, :count]), labels if all(labels) else None
+
+
+class SessionRecorder:
+    """Accumulates timestamped landmark frames and writes them as a .npz file.
+
+    Frames go into preallocated arrays that double in size when full, so
+    recording costs one array copy per hand on the vision loop. Up to
+    ``max_hands`` hands are kept per frame, each with its handedness.
+    """
+
+    def __init__(self, path, capacity=1024, max_hands=1):
+        self.path = path
+        self.count = 0
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.landmarks = np.zeros((capacity, max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.present = np.zeros((capacity, max_hands), dtype=bool)
+        self.handedness = np.full((capacity, max_hands), "", dtype=HANDEDNESS_DTYPE)
+
+    def _grow(self):
+        capacity = len(self.timestamps) * 2
+        self.timestamps = np.resize(self.timestamps, capacity)
+        self.landmarks = np.resize(self.landmarks, (capacity,) + self.landmarks.shape[1:])
+        self.present = np.resize(self.present, (capacity,) + self.present.shape[1:])
+        self.handedness = np.resize(self.handedness, (capacity,) + self.handedness.shape[1:])
+
+    def add(self, timestamp, multi_hand_landmarks=None, multi_handedness=None):
+        """Record one frame of detections, taking the same arguments as Controller.update.
+
+        Handedness may be MediaPipe classifications or plain labels; hands
+        beyond ``max_hands`` are dropped.
+        """
+        if self.count == len(self.timestamps):
+            self._grow()
+        i = self.count
+        self.timestamps[i] = timestamp
+        count = min(len(multi_hand_landmarks or ()), self.present.shape[1])
+        self.present[i] = False
+        self.landmarks[i, count:] = 0
+        self.handedness[i] = ""
+        for j in range(count):
+            self.present[i, j] = True
+            landmarks_to_array(multi_hand_landmarks[j], out=self.landmarks[i, j])
+            if multi_handedness:
+                handedness = multi_handedness[j]
+                self.handedness[i, j] = (handedness.classification[0].label
+                                         if hasattr(handedness, "classification") else str(handedness))
+        self.count += 1
+
+    def session(self):
+        n = self.count
+        return Session(self.timestamps[:n], self.landmarks[:n], self.present[:n], self.handedness[:n])
+
+    def close(self):
+        """Write the recorded frames to disk"""
+        n = self.count
+        np.savez(self.path, timestamps=self.timestamps[:n], landmarks=self.landmarks[:n],
+                 present=self.present[:n], handedness=self.handedness[:n])
+        log.info("Recorded %d frames to %s", n, self.path)
+
+
+def load_session(path):
+    """Load a session written by SessionRecorder (single- or multi-hand)"""
+    with np.load(path) as data:
+        handedness = data["handedness"] if "handedness" in data.files else None
+        return Session(data["timestamps"], data["landmarks"], data["present"], handedness)
@@ -0,0 +1,120 @@
+"""Headless replay of recorded landmark sessions through the Controller.
+
+Usage:
+    python replay.py session.npz [--realtime] [--show-actions] [--journal replay.journal] [--screen 1920 1080]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from actions import ActionDispatcher, RecordingBackend
+from controller import Controller
+from recorder import load_session
+from telemetry import Journal
+
+# Replays map the cursor onto a fixed screen, so recorded move coordinates
+# are the same on every machine (and no display is needed)
+DEFAULT_SCREEN = (1920, 1080)
+
+
+class ReplayReport:
+    """Throughput, per-frame latency and the action sequence of a replay"""
+
+    def __init__(self, frame_times, wall_time, actions, latency=""):
+        self.frame_times = np.asarray(frame_times)
+        self.wall_time = wall_time
+        self.actions = actions
+        self.latency = latency  # Per-gesture pose-onset-to-action table
+
+    @property
+    def frames(self):
+        return len(self.frame_times)
+
+    @property
+    def fps(self):
+        busy = self.frame_times.sum()
+        return self.frames / busy if busy > 0 else 0.0
+
+    def percentile_us(self, q):
+        if not self.frames:
+            return 0.0
+        return float(np.percentile(self.frame_times, q) * 1e6)
+
+    def summary(self):
+        return ("{} frames in {:.2f} s: {:.0f} frames/sec of controller time, "
+                "p50 {:.1f} us, p99 {:.1f} us, {} actions").format(
+                    self.frames, self.wall_time, self.fps,
+                    self.percentile_us(50), self.percentile_us(99), len(self.actions))
+
+
+def replay_session(session, realtime=False, backend=None, gesture_map=None, classifier=None, journal=None,
+                   screen=DEFAULT_SCREEN):
+    """Feed a recorded session through a fresh Controller.
+
+    The Controller clock is driven by the recorded timestamps so cooldowns
+    behave exactly as they did live, whether replaying at real-time or
+    maximum speed. Actions execute synchronously on ``backend`` (by default a
+    RecordingBackend for a ``screen``-sized display) so the action sequence
+    is exact. With
+    ``journal`` (a path) every gesture decision is written to a telemetry
+    journal for telemetry.py.
+    """
+    clock = [float(session.timestamps[0]) if len(session) else 0.0]
+    backend = backend or RecordingBackend(screen, clock=lambda: clock[0])
+    controller = Controller(actions=ActionDispatcher(backend, synchronous=True),
+                            gesture_map=gesture_map, clock=lambda: clock[0], max_hands=session.max_hands,
+                            classifier=classifier)
+    if journal is not None:
+        controller.journal = Journal(journal, controller.gesture_map)
+
+    frame_times = []
+    start = time.perf_counter()
+    for i in range(len(session)):
+        timestamp = float(session.timestamps[i])
+        if realtime:
+            # Sleep until this frame's offset from the start of the session
+            delay = (timestamp - session.timestamps[0]) - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        clock[0] = timestamp
+
+        frame_start = time.perf_counter()
+        controller.update(*session.detections(i))
+        frame_times.append(time.perf_counter() - frame_start)
+
+    if controller.journal is not None:
+        controller.journal.close()
+    return ReplayReport(frame_times, time.perf_counter() - start, getattr(backend, "actions", []),
+                        controller.latency_summary())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded landmark session headlessly")
+    parser.add_argument("session", help="session file written by app.py --record")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded frame rate instead of max speed")
+    parser.add_argument("--show-actions", action="store_true", help="print the full action sequence")
+    parser.add_argument("--classifier", metavar="PATH", help="recognize poses with a trained classifier model")
+    parser.add_argument("--journal", metavar="PATH", help="write every gesture decision to a telemetry journal")
+    parser.add_argument("--screen", type=int, nargs=2, default=DEFAULT_SCREEN, metavar=("W", "H"),
+                        help="screen size cursor moves are mapped to (default 1920 1080)")
+    args = parser.parse_args(argv)
+
+    classifier = None
+    if args.classifier:
+        from classifier import KNNClassifier
+        classifier = KNNClassifier.load(args.classifier)
+
+    session = load_session(args.session)
+    report = replay_session(session, realtime=args.realtime, classifier=classifier, journal=args.journal,
+                            screen=args.screen)
+    if args.show_actions:
+        for timestamp, action in report.actions:
+            print(f"{timestamp - session.timestamps[0]:8.3f}s  {action!r}")
+    print(report.summary())
+    if report.latency:
+        print(report.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Frame sources: camera, video file or image directory.
+
+Every source mimics the part of the cv2.VideoCapture interface the loops
+use (``read``, ``isOpened``, ``set``, ``release``) and reads into a
+preallocated ring of frame buffers, so steady-state capture allocates
+nothing: ``cap.read(slot)`` decodes straight into the next slot. Slots are
+reused round-robin, so a frame stays valid only until ``slots - 1`` newer
+frames have been read. A consumer that may keep a frame longer must copy it.
+The pipelined loop reads file sources in lockstep with its consumer, so the
+default of 6 covers the frames its stages can hold at once. It keeps
+capturing from cameras while inference is busy, so it copies their frames
+into a FramePool, whose buffers are reused once no stage holds them.
+
+Video files and image directories are read as fast as the consumer asks,
+which makes throughput benchmarks deterministic on machines with no camera.
+"""
+import os
+import weakref
+from collections import deque
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+class RingBuffer:
+    """Fixed set of preallocated, equally shaped frame buffers"""
+
+    def __init__(self, shape, dtype=np.uint8, slots=6):
+        self.frames = np.empty((slots,) + tuple(shape), dtype=dtype)
+        self.index = -1
+
+    @property
+    def shape(self):
+        return self.frames.shape[1:]
+
+    def next(self):
+        self.index = (self.index + 1) % len(self.frames)
+        return self.frames[self.index]
+
+
+class FramePool:
+    """Reusable buffers for frames that must outlive their ring slot.
+
+    ``copy(image)`` returns a copy of ``image`` in a pooled buffer, which
+    goes back to the pool once nothing references the returned array. Steady
+    state therefore allocates nothing, and the pool holds as many buffers as
+    there are frames in flight. Keep the returned array itself (not a slice
+    of it) for as long as its pixels are used.
+    """
+
+    def __init__(self):
+        self._free = deque()  # Appended to from whichever thread drops the last reference
+        self.allocated = 0
+
+    def copy(self, image):
+        try:
+            buffer = self._free.pop()
+        except IndexError:
+            buffer = None
+        if buffer is None or buffer.shape != image.shape or buffer.dtype != image.dtype:
+            buffer = np.empty_like(image)  # Growing the pool, or a resolution change
+            self.allocated += 1
+        frame = buffer.view()
+        np.copyto(frame, image)
+        weakref.finalize(frame, self._free.append, buffer)
+        return frame
+
+
+class FrameSource:
+    """Base class: reads BGR frames into a ring buffer"""
+
+    is_file = False  # Finite input read at max speed (end of input is not an error)
+
+    def __init__(self, name, slots=6):
+        self.name = name
+        self.slots = slots
+        self.ring = None
+        self.frames = 0
+
+    def _read_into(self, slot):
+        """Read the next frame, into ``slot`` when possible; return (success, image)"""
+        raise NotImplementedError
+
+    def read(self):
+        slot = self.ring.next() if self.ring is not None else None
+        success, image = self._read_into(slot)
+        if not success or image is None:
+            return False, None
+        if slot is None or image.ctypes.data != slot.ctypes.data:
+            # First frame or a resolution change: (re)allocate the ring at this size
+            if self.ring is None or self.ring.shape != image.shape:
+                self.ring = RingBuffer(image.shape, image.dtype, self.slots)
+            slot = self.ring.next()
+            np.copyto(slot, image)
+            image = slot
+        self.frames += 1
+        return True, image
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class CaptureSource(FrameSource):
+    """A cv2.VideoCapture device or file, decoding into the ring with cap.read(slot)"""
+
+    def __init__(self, target, name, slots=6, api=cv2.CAP_ANY):
+        super().__init__(name, slots)
+        self.cap = cv2.VideoCapture(target, api)
+
+    def _read_into(self, slot):
+        return self.cap.read(slot) if slot is not None else self.cap.read()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+class CameraSource(CaptureSource):
+    """Webcam by index (V4L2 on Linux)"""
+
+    def __init__(self, index=0, width=640, height=480, slots=6):
+        api = cv2.CAP_V4L2 if os.name == "posix" and os.path.exists("/dev/video%d" % index) else cv2.CAP_ANY
+        super().__init__(index, f"camera {index}", slots, api)
+        if self.cap.isOpened():
+            # Attempt to set higher resolution for better hand detection
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+
+class VideoFileSource(CaptureSource):
+    """A recorded clip, decoded as fast as it is read"""
+
+    is_file = True
+
+    def __init__(self, path, slots=6):
+        super().__init__(path, path, slots)
+
+
+class ImageDirectorySource(FrameSource):
+    """Image files from a directory in name order.
+
+    OpenCV cannot decode into an existing buffer, so each image is decoded
+    and then copied into the ring (resized if its size differs from the first).
+    """
+
+    is_file = True
+
+    def __init__(self, path, slots=6):
+        super().__init__(path, slots)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.position = 0
+
+    def _read_into(self, slot):
+        while self.position < len(self.paths):
+            image = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if image is None:
+                continue  # Unreadable file: skip it
+            if slot is not None and image.shape != slot.shape:
+                image = cv2.resize(image, (slot.shape[1], slot.shape[0]), dst=slot)
+            elif slot is not None:
+                np.copyto(slot, image)
+                image = slot
+            return True, image
+        return False, None
+
+    def isOpened(self):
+        return self.position < len(self.paths)
+
+
+def open_source(spec, width=640, height=480, slots=6):
+    """Open a camera index ("0"), an image directory or a video file, or None on failure"""
+    spec = str(spec)
+    if spec.isdigit():
+        source = CameraSource(int(spec), width, height, slots)
+    elif os.path.isdir(spec):
+        source = ImageDirectorySource(spec, slots)
+    else:
+        source = VideoFileSource(spec, slots)
+    return source if source.isOpened() else None
+
+
+def mirror_results(results):
+    """Mirror MediaPipe results horizontally in place.
+
+    Landmark x becomes 1 - x and Left/Right handedness is swapped, which is
+    what running inference on a flipped image would have produced, without
+    copying the image.
+    """
+    for hand_landmarks in results.multi_hand_landmarks or ():
+        for lm in hand_landmarks.landmark:
+            lm.x = 1.0 - lm.x
+    for handedness in results.multi_handedness or ():
+        for classification in getattr(handedness, "classification", ()):
+            classification.label = "Right" if classification.label == "Left" else "Left"
+    return results
@@ -0,0 +1,307 @@
+"""Synthetic hand landmark trajectories and frames.
+
+Benchmarks and demos need hands without a camera. A hand is built from a
+canonical 21-landmark skeleton in palm units (wrist at the origin, middle
+knuckle one unit above it), posed by extending or folding each finger and
+the thumb, then rotated, scaled and placed in normalized image coordinates
+with a little per-landmark jitter.
+
+SCENARIOS script one short take per gesture in the README table (plus an
+idle take that must not trigger anything) as held poses, swipes, circles
+and pushes, together with the gestures expected to fire, in order. Every
+variant of a take randomizes hand size, position, tilt and jitter from a
+seed, so results are reproducible.
+
+``render()`` draws a landmark skeleton on a textured background, and
+SyntheticSource serves rendered takes to the loops like a video file.
+
+Usage:
+    python synthetic.py sessions DIR [--variants 3]    # one .npz per take, for replay.py
+    python synthetic.py video clip.avi [--size 640 480]
+"""
+import argparse
+import math
+import os
+
+import cv2
+import numpy as np
+
+from features import NUM_LANDMARKS
+from recorder import Session
+from sources import FrameSource
+
+FPS = 30.0
+
+# Canonical hand in palm units, image y pointing down
+KNUCKLES = {"index": (-0.3, -0.95), "middle": (0.0, -1.0), "ring": (0.25, -0.95), "pinky": (0.47, -0.85)}
+FINGER_LENGTHS = {"index": 1.0, "middle": 1.1, "ring": 1.0, "pinky": 0.8}
+FINGER_LANDMARKS = {"index": (5, 6, 7, 8), "middle": (9, 10, 11, 12), "ring": (13, 14, 15, 16),
+                    "pinky": (17, 18, 19, 20)}
+THUMB_POSES = {  # CMC, MCP, IP and tip (landmarks 1-4)
+    "folded": ((-0.25, -0.2), (-0.4, -0.45), (-0.3, -0.6), (-0.15, -0.65)),
+    "out": ((-0.3, -0.2), (-0.5, -0.35), (-0.7, -0.5), (-0.85, -0.62)),
+    "up": ((-0.3, -0.25), (-0.45, -0.45), (-0.45, -0.8), (-0.45, -1.15)),
+    "down": ((-0.3, -0.25), (-0.45, -0.45), (-0.45, -0.1), (-0.45, 0.25)),
+}
+CONNECTIONS = ((0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+               (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (0, 17), (17, 18), (18, 19), (19, 20))
+
+# Pose name: (extended fingers, thumb pose, index pointing direction -1/0/1)
+POSES = {
+    "open": (("index", "middle", "ring", "pinky"), "out", 0),
+    "fist": ((), "folded", 0),
+    "index": (("index",), "folded", 0),
+    "two": (("index", "middle"), "folded", 0),
+    "three": (("index", "middle", "ring"), "folded", 0),
+    "point_left": (("index",), "folded", -1),
+    "point_right": (("index",), "folded", 1),
+    "thumb_up": ((), "up", 0),
+    "thumb_down": ((), "down", 0),
+    "ring_pinky": (("ring", "pinky"), "folded", 0),
+    "index_pinky": (("index", "pinky"), "folded", 0),
+    "neutral": (("middle", "ring"), "folded", 0),  # Matches no gesture
+}
+
+# Take name: (gestures expected to fire, in order; steps). A step is
+# (pose, frames) to hold a pose, ("absent", frames), or a movement made with
+# an open palm: ("swipe", direction), ("circle", direction) or ("push",)
+SCENARIOS = {
+    "play": (("play",), [("open", 20)]),
+    "stop": (("play", "stop"), [("open", 15), ("neutral", 8), ("fist", 15)]),
+    "cursor": (("cursor",), [("index", 30)]),
+    "click": (("click",), [("two", 15)]),
+    "zoom_in": (("zoom_in",), [("three", 15)]),
+    "zoom_out": (("play", "zoom_out"), [("open", 15), ("neutral", 8), ("open", 15)]),
+    "timeline_backward": (("timeline_backward",), [("point_left", 15)]),
+    "timeline_forward": (("timeline_forward",), [("point_right", 15)]),
+    "scroll_up": (("scroll_up",), [("thumb_up", 20)]),
+    "scroll_down": (("scroll_down",), [("thumb_down", 20)]),
+    "fast_forward": (("fast_forward",), [("ring_pinky", 15)]),
+    "go_back": (("go_back",), [("index_pinky", 15)]),
+    "seek_forward": (("seek_forward",), [("swipe", 1), ("open", 12)]),
+    "seek_backward": (("seek_backward",), [("swipe", -1), ("open", 12)]),
+    "next_video": (("next_video",), [("circle", 1), ("open", 12)]),
+    "previous_video": (("previous_video",), [("circle", -1), ("open", 12)]),
+    "fullscreen": (("fullscreen",), [("push",), ("open", 12)]),
+    "idle": ((), [("neutral", 20), ("absent", 10), ("fist", 20)]),
+}
+
+
+def _finger(knuckle, length, extended, point):
+    """MCP, PIP, DIP and tip of one finger"""
+    x, y = knuckle
+    if not extended:
+        return ((x, y), (x, y - 0.3), (x + 0.05, y - 0.15), (x + 0.05, y + 0.08))
+    dx, dy = (0.0, -1.0) if not point else (0.7 * point, -0.8)
+    norm = math.hypot(dx, dy)
+    dx, dy = dx / norm * length, dy / norm * length
+    return ((x, y),) + tuple((x + dx * t, y + dy * t) for t in (0.45, 0.75, 1.0))
+
+
+def canonical_hand(pose):
+    """(21, 3) landmarks of a named pose in palm units"""
+    fingers, thumb, point = POSES[pose]
+    points = np.zeros((NUM_LANDMARKS, 3), dtype=np.float64)
+    points[1:5, :2] = THUMB_POSES[thumb]
+    for name, indices in FINGER_LANDMARKS.items():
+        extended = name in fingers
+        points[list(indices), :2] = _finger(KNUCKLES[name], FINGER_LENGTHS[name], extended,
+                                            point if name == "index" else 0)
+    # Depth grows toward the fingertips, roughly like MediaPipe's relative z
+    points[:, 2] = -0.05 * np.hypot(points[:, 0], points[:, 1])
+    return points
+
+
+def place(canonical, wrist, size, angle=0.0):
+    """Rotate, scale and move canonical landmarks into normalized image coordinates"""
+    c, s = math.cos(angle), math.sin(angle)
+    out = np.empty_like(canonical)
+    out[:, 0] = wrist[0] + size * (c * canonical[:, 0] - s * canonical[:, 1])
+    out[:, 1] = wrist[1] + size * (s * canonical[:, 0] + c * canonical[:, 1])
+    out[:, 2] = size * canonical[:, 2]
+    return out
+
+
+class Take:
+    """Builds a landmark session frame by frame at a fixed frame rate"""
+
+    def __init__(self, rng, size=0.13, wrist=(0.5, 0.75), angle=0.0, jitter=0.001, fps=FPS):
+        self.rng = rng
+        self.size = size        # Palm size (wrist to middle knuckle), normalized
+        self.wrist = wrist
+        self.angle = angle
+        self.jitter = jitter    # Landmark noise standard deviation, normalized
+        self.fps = fps
+        self.frames = []        # (21, 3) landmarks, or None without a hand
+
+    def _add(self, pose, wrist, size):
+        landmarks = place(canonical_hand(pose), wrist, size, self.angle)
+        landmarks[:, :2] += self.rng.normal(0.0, self.jitter, (NUM_LANDMARKS, 2))
+        self.frames.append(landmarks.astype(np.float32))
+
+    def absent(self, frames):
+        self.frames.extend([None] * frames)
+
+    def hold(self, pose, frames, sway=0.1):
+        """Hold a pose, swaying slowly (``sway`` palm lengths per second at most) as a real hand does"""
+        phase = self.rng.uniform(0.0, 2.0 * math.pi)
+        for i in range(frames):
+            step = sway * self.size / self.fps * math.sin(phase + i / self.fps)
+            self.wrist = (self.wrist[0] + step, self.wrist[1])
+            self._add(pose, self.wrist, self.size)
+
+    def swipe(self, direction, frames=8, distance=3.0):
+        """Sweep an open palm ``distance`` palm lengths sideways"""
+        x0, y = self.wrist
+        for t in np.linspace(0.0, 1.0, frames):
+            self.wrist = (x0 + direction * distance * self.size * t, y)
+            self._add("open", self.wrist, self.size)
+
+    def circle(self, direction, frames=24, radius=1.3):
+        """Draw a circle (clockwise on screen for direction 1) with an open palm"""
+        x0, y0 = self.wrist
+        cx = x0 - radius * self.size
+        for t in np.linspace(0.0, 1.1, frames):
+            angle = 2.0 * math.pi * t * direction
+            self.wrist = (cx + radius * self.size * math.cos(angle), y0 + radius * self.size * math.sin(angle))
+            self._add("open", self.wrist, self.size)
+
+    def push(self, frames=8, growth=1.8):
+        """Push an open palm toward the camera: it grows by ``growth``"""
+        for scale in np.linspace(1.0, growth, frames):
+            self._add("open", self.wrist, self.size * scale)
+        self.size *= growth
+
+    def session(self, start=0.0):
+        count = len(self.frames)
+        landmarks = np.zeros((count, NUM_LANDMARKS, 3), dtype=np.float32)
+        present = np.zeros(count, dtype=bool)
+        for i, frame in enumerate(self.frames):
+            if frame is not None:
+                landmarks[i] = frame
+                present[i] = True
+        return Session(start + np.arange(count) / self.fps, landmarks, present)
+
+
+def build(name, seed=0):
+    """Session of one variant of scenario ``name``; returns (session, expected gestures)"""
+    expected, steps = SCENARIOS[name]
+    rng = np.random.default_rng(seed)
+    take = Take(rng, size=rng.uniform(0.11, 0.16), wrist=(rng.uniform(0.35, 0.65), rng.uniform(0.7, 0.8)),
+                angle=rng.normal(0.0, 0.08))
+    take.absent(5)
+    for step in steps:
+        kind = step[0]
+        if kind == "absent":
+            take.absent(step[1])
+        elif kind == "swipe":
+            take.swipe(step[1])
+        elif kind == "circle":
+            take.circle(step[1])
+        elif kind == "push":
+            take.push()
+        else:
+            take.hold(kind, step[1])
+    take.absent(10)
+    return take.session(), expected
+
+
+def concatenate(sessions, gap=2.0):
+    """Join sessions into one, ``gap`` seconds apart so hand state never carries over"""
+    timestamps, offset = [], 0.0
+    for session in sessions:
+        timestamps.append(session.timestamps - session.timestamps[0] + offset)
+        offset = timestamps[-1][-1] + gap
+    return Session(np.concatenate(timestamps), np.concatenate([s.landmarks for s in sessions]),
+                   np.concatenate([s.present for s in sessions]))
+
+
+def background(width, height, seed=0):
+    """Textured BGR background, so frames are not trivially compressible"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+    y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    image = np.empty((height, width, 3), dtype=np.float32)
+    image[..., 0] = 60 + 50 * x + 20 * y
+    image[..., 1] = 70 + 40 * y
+    image[..., 2] = 80 + 30 * x * y
+    image += rng.normal(0.0, 6.0, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def render(landmarks, image):
+    """Draw a hand skeleton from normalized landmarks onto ``image`` in place"""
+    height, width = image.shape[:2]
+    points = np.rint(landmarks[:, :2] * (width, height)).astype(np.int32)
+    palm = float(np.hypot(*(points[9] - points[0])))
+    thickness = max(2, int(0.28 * palm))
+    for a, b in CONNECTIONS:
+        cv2.line(image, tuple(points[a]), tuple(points[b]), (110, 150, 205), thickness, cv2.LINE_AA)
+    cv2.fillConvexPoly(image, points[[0, 1, 5, 9, 13, 17]], (110, 150, 205), cv2.LINE_AA)
+    return image
+
+
+class SyntheticSource(FrameSource):
+    """Frames of a landmark session, rendered on read and served like a video file.
+
+    Rendering happens in ``read()``, so it is counted as capture time,
+    roughly standing in for a camera's decode cost.
+    """
+
+    is_file = True
+
+    def __init__(self, session, width=640, height=480, slots=6, limit=None):
+        super().__init__(f"synthetic {width}x{height}", slots)
+        self.session = session
+        self.background = background(width, height)
+        self.limit = len(session) if limit is None else limit  # Frames to serve (the session repeats)
+        self.position = 0
+
+    def _read_into(self, slot):
+        if self.position >= self.limit:
+            return False, None
+        i = self.position % len(self.session)
+        self.position += 1
+        image = slot if slot is not None else np.empty_like(self.background)
+        np.copyto(image, self.background)
+        if self.session.present[i]:
+            render(self.session.landmarks[i], image)
+        return True, image
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic gesture sessions or a rendered clip")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sessions = commands.add_parser("sessions", help="one landmark session per scenario variant, for replay.py")
+    sessions.add_argument("directory")
+    sessions.add_argument("--variants", type=int, default=1, help="randomized variants per scenario (default 1)")
+    video = commands.add_parser("video", help="render every scenario into one video clip")
+    video.add_argument("path", help="output file, e.g. clip.avi")
+    video.add_argument("--size", type=int, nargs=2, default=(640, 480), metavar=("W", "H"))
+    args = parser.parse_args(argv)
+
+    if args.command == "sessions":
+        os.makedirs(args.directory, exist_ok=True)
+        for name in SCENARIOS:
+            for variant in range(args.variants):
+                session, expected = build(name, seed=variant)
+                suffix = f"_{variant}" if args.variants > 1 else ""
+                path = os.path.join(args.directory, f"{name}{suffix}.npz")
+                np.savez(path, timestamps=session.timestamps, landmarks=session.landmarks, present=session.present)
+                print(f"{path}: {len(session)} frames, expect {', '.join(expected) or 'nothing'}")
+        return
+
+    session = concatenate([build(name)[0] for name in SCENARIOS], gap=0.5)
+    source = SyntheticSource(session, *args.size)
+    writer = cv2.VideoWriter(args.path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, tuple(args.size))
+    while True:
+        success, image = source.read()
+        if not success:
+            break
+        writer.write(image)
+    writer.release()
+    print(f"Wrote {source.frames} frames to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
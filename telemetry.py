@@ -0,0 +1,245 @@
+"""Memory-mapped telemetry journal of gesture decisions.
+
+The controller can write every gesture decision to a journal file for
+post-hoc analysis of false triggers and latency. The file is a fixed-size
+ring buffer of fixed 24-byte records that is mapped into memory, so writing
+a record is two ``struct.pack_into`` calls into the page cache. Nothing
+makes a syscall per event; the kernel writes the pages back, and ``close()``
+flushes them. Once the buffer is full, the oldest records are overwritten.
+
+Layout (little-endian):
+
+    header   magic, version, record size, capacity, records written
+             (monotonic; the next slot is written % capacity), creation
+             time, metadata length; padded to HEADER_SIZE
+    metadata UTF-8 JSON after the header: gesture names, triggers and actions
+    records  capacity x RECORD
+
+Each record holds the controller timestamp, a time value whose meaning
+depends on the kind, the classifier confidence (NaN for the threshold
+rules), the gesture index, the kind, the finger mask, the handedness, the
+kind of the gesture's first action (255 when no action was issued) and a
+frame count:
+
+    fire        first action of an activation; seconds = pose onset to action
+    repeat      a held or continuous gesture acting again; seconds since the last action
+    suppressed  an activation (or finished motion) held back by its cooldown;
+                seconds of cooldown left
+    filtered    a pose that vanished before passing its enter hysteresis;
+                seconds and frames it was seen
+    exit        an active gesture ended; seconds since its pose onset
+
+Usage:
+    python app.py --journal gestures.journal [--journal-records 262144]
+    python telemetry.py summary gestures.journal [--retrigger 1.0]
+    python telemetry.py dump gestures.journal [--tail 50] [--kind fire]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from events import HANDEDNESS
+from features import THUMB
+
+MAGIC = b"GESTJRNL"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIQdI")   # magic, version, record size, capacity, written, created, metadata bytes
+COUNT = struct.Struct("<Q")
+COUNT_OFFSET = 20                     # Offset of "written" in HEADER
+HEADER_SIZE = 4096                    # Header plus metadata, one page
+RECORD = struct.Struct("<dffhBBBBH")  # time, seconds, confidence, gesture, kind, mask, hand, action, frames
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("seconds", "<f4"), ("confidence", "<f4"), ("gesture", "<i2"),
+                         ("kind", "u1"), ("mask", "u1"), ("hand", "u1"), ("action", "u1"), ("frames", "<u2")])
+DEFAULT_RECORDS = 1 << 18             # 6 MiB, hours of continuous cursor movement
+
+# Record kinds
+FIRE = 1
+REPEAT = 2
+SUPPRESSED = 3
+FILTERED = 4
+EXIT = 5
+KINDS = {FIRE: "fire", REPEAT: "repeat", SUPPRESSED: "suppressed", FILTERED: "filtered", EXIT: "exit"}
+
+# Action codes are part of the file format (and listed in its metadata), so
+# they do not follow changes to gesture_map.ACTION_KINDS
+ACTIONS = ("press", "click", "scroll", "zoom", "hotkey", "cursor")
+NO_ACTION = 255
+NAN = float("nan")
+
+
+class Journal:
+    """Writer side of a telemetry journal file"""
+
+    def __init__(self, path, gesture_map, capacity=DEFAULT_RECORDS):
+        self.path = path
+        self.capacity = capacity
+        metadata = json.dumps({"actions": ACTIONS, "gestures": [
+            {"name": g.name, "trigger": g.trigger, "actions": [[kind, *args] for kind, args in g.actions]}
+            for g in gesture_map.gestures]}).encode()
+        if HEADER.size + len(metadata) > HEADER_SIZE:
+            raise ValueError(f"Gesture map too large for the journal header ({len(metadata)} bytes of metadata)")
+
+        # Action kind issued by each gesture, so a record needs no lookup
+        self.actions = [ACTIONS.index(g.actions[0][0]) if g.actions else NO_ACTION
+                        for g in gesture_map.gestures]
+
+        size = HEADER_SIZE + capacity * RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)  # The mapping keeps the file open
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD.size, capacity, 0, time.time(), len(metadata))
+        self._map[HEADER.size:HEADER.size + len(metadata)] = metadata
+        self.count = 0
+
+    def record(self, timestamp, kind, gesture, hand, seconds=NAN, frames=0):
+        """Append one record; ``hand`` is the HandState the decision was made for"""
+        action = self.actions[gesture.index] if kind in (FIRE, REPEAT) else NO_ACTION
+        RECORD.pack_into(self._map, HEADER_SIZE + (self.count % self.capacity) * RECORD.size,
+                         timestamp, seconds, hand.confidence, gesture.index, kind,
+                         hand.finger_mask | (THUMB if hand.thumb_up else 0),
+                         HANDEDNESS.get(hand.label, 255), action, min(frames, 0xFFFF))
+        # Publish the record after it is complete, so a concurrent reader never sees half of it
+        self.count += 1
+        COUNT.pack_into(self._map, COUNT_OFFSET, self.count)
+
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+
+    def stats(self):
+        overwritten = max(0, self.count - self.capacity)
+        return f"{self.count} records written to {self.path}" + (f", {overwritten} overwritten" if overwritten else "")
+
+
+def attach(controller, path=None, capacity=DEFAULT_RECORDS):
+    """Open a journal for ``controller``'s gesture decisions; returns it (None if not requested)"""
+    if not path:
+        return None
+    controller.journal = Journal(path, controller.gesture_map, capacity)
+    return controller.journal
+
+
+def read_journal(path):
+    """Load a journal as (metadata dict, records in write order as a structured array, records written)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, record_size, capacity, count, created, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a gesture telemetry journal")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path}: unsupported journal version {version} (record size {record_size})")
+    metadata = json.loads(data[HEADER.size:HEADER.size + length])
+    metadata["created"] = created
+    slots = np.frombuffer(data, dtype=RECORD_DTYPE, count=capacity, offset=HEADER_SIZE)
+    if count <= capacity:
+        records = slots[:count]
+    else:
+        # Wrapped: the oldest surviving record is in the next slot to be written
+        start = count % capacity
+        records = np.concatenate((slots[start:], slots[:start]))
+    return metadata, records, count
+
+
+def _percentile_ms(values, q):
+    """Percentile of seconds as a right-aligned millisecond column ("-" when empty)"""
+    values = values[~np.isnan(values)]
+    return f"{np.percentile(values, q) * 1000.0:>8.0f}" if len(values) else f"{'-':>8}"
+
+
+def summarize(metadata, records, count, retrigger=1.0):
+    """Per-gesture trigger rates, repeats, suppressions, flickers and latencies as a text table"""
+    names = [g["name"] for g in metadata["gestures"]]
+    lines = []
+    if not len(records):
+        return "Empty journal"
+    span = float(records["time"][-1] - records["time"][0])
+    lines.append(f"{len(records)} records over {span:.1f} s"
+                 + (f" ({count - len(records)} older records overwritten)" if count > len(records) else ""))
+    lines.append(f"{'gesture':<18} {'fires':>6} {'/min':>6} {'repeat':>7} {'retrig':>6} {'supp':>5} "
+                 f"{'filt':>5} {'filt ms':>8} {'lat p50':>8} {'lat p95':>8} {'hold ms':>8}")
+    minutes = span / 60.0
+    for index in np.unique(records["gesture"]):
+        mine = records[records["gesture"] == index]
+        kinds = mine["kind"]
+        fires = mine[kinds == FIRE]
+        filtered = mine[kinds == FILTERED]
+        exits = mine[kinds == EXIT]
+
+        # A re-trigger fires again within ``retrigger`` seconds of the same hand's
+        # previous activation ending: usually one intended gesture detected twice
+        retriggers = 0
+        for hand in np.unique(fires["hand"]):
+            ended = np.sort(exits["time"][exits["hand"] == hand])
+            started = fires["time"][fires["hand"] == hand]
+            previous = np.searchsorted(ended, started) - 1
+            valid = previous >= 0
+            retriggers += int(np.count_nonzero(started[valid] - ended[previous[valid]] <= retrigger))
+
+        name = names[index] if 0 <= index < len(names) else f"#{index}"
+        lines.append(
+            f"{name:<18} {len(fires):>6} {len(fires) / minutes if minutes > 0 else 0.0:>6.1f} "
+            f"{np.count_nonzero(kinds == REPEAT):>7} {retriggers:>6} {np.count_nonzero(kinds == SUPPRESSED):>5} "
+            f"{len(filtered):>5} {_percentile_ms(filtered['seconds'], 50)} "
+            f"{_percentile_ms(fires['seconds'], 50)} {_percentile_ms(fires['seconds'], 95)} "
+            f"{_percentile_ms(exits['seconds'], 50)}")
+    lines.append(f"fires: activations that acted; repeat: further actions while held; retrig: fires within "
+                 f"{retrigger:g} s of the\nsame gesture ending; supp: held back by cooldown; filt: poses dropped "
+                 f"by enter hysteresis (median ms seen);\nlat: pose onset to action (ms); hold: median activation "
+                 f"length (ms)")
+    return "\n".join(lines)
+
+
+def format_record(record, names, actions, start):
+    name = names[record["gesture"]] if 0 <= record["gesture"] < len(names) else f"#{record['gesture']}"
+    hand = {value: key for key, value in HANDEDNESS.items()}.get(int(record["hand"]), "?")
+    action = actions[record["action"]] if record["action"] < len(actions) else "-"
+    fingers = "".join(letter for bit, letter in enumerate("IMRPT") if record["mask"] & (1 << bit))
+    text = (f"{record['time'] - start:9.3f}s  {KINDS.get(int(record['kind']), '?'):<10} {name:<18} "
+            f"{hand:<5} {fingers or '-':<5} {action:<7} {record['seconds'] * 1000.0:8.1f} ms")
+    if record["frames"]:
+        text += f" {record['frames']} frames"
+    if not np.isnan(record["confidence"]):
+        text += f" conf {record['confidence']:.2f}"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a gesture telemetry journal")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summary = commands.add_parser("summary", help="per-gesture trigger rates, repeats, suppressions and latencies")
+    summary.add_argument("journal")
+    summary.add_argument("--retrigger", type=float, default=1.0, metavar="S",
+                         help="count fires within S seconds of the same gesture ending as re-triggers (default 1)")
+    dump = commands.add_parser("dump", help="print the records")
+    dump.add_argument("journal")
+    dump.add_argument("--tail", type=int, metavar="N", help="only the last N records")
+    dump.add_argument("--kind", choices=sorted(KINDS.values()), help="only records of this kind")
+    args = parser.parse_args(argv)
+
+    metadata, records, count = read_journal(args.journal)
+    if args.command == "summary":
+        print(summarize(metadata, records, count, args.retrigger))
+        return
+
+    names = [g["name"] for g in metadata["gestures"]]
+    start = records["time"][0] if len(records) else 0.0
+    if args.kind:
+        records = records[records["kind"] == {v: k for k, v in KINDS.items()}[args.kind]]
+    if args.tail:
+        records = records[-args.tail:]
+    for record in records:
+        print(format_record(record, names, metadata["actions"], start))
+
+
+if __name__ == "__main__":
+    main()
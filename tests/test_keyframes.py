@@ -0,0 +1,50 @@
+import copy
+
+import numpy as np
+
+from keyframes import KeyframeTracker
+from sources import mirror_results
+
+
+class Message:
+    """Just enough of a protobuf message for KeyframeTracker and mirror_results"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def CopyFrom(self, other):
+        self.__dict__.update(copy.deepcopy(other.__dict__))
+
+
+class Results:
+    def __init__(self, multi_hand_landmarks, multi_handedness):
+        self.multi_hand_landmarks = multi_hand_landmarks
+        self.multi_handedness = multi_handedness
+
+
+class StillHandDetector:
+    """Reports the same unmirrored "Left" hand on every frame, as MediaPipe would"""
+
+    def __init__(self):
+        self.points = np.stack(np.meshgrid(np.linspace(0.3, 0.7, 7), np.linspace(0.3, 0.6, 3)), -1).reshape(-1, 2)
+
+    def process(self, image_rgb):
+        hand = Message(landmark=[Message(x=float(x), y=float(y), z=0.0) for x, y in self.points])
+        handedness = Message(classification=[Message(label="Left", score=0.9)])
+        return Results([hand], [handedness])
+
+
+def test_handedness_is_mirrored_once_on_keyframes_and_propagated_frames():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)  # Texture for optical flow
+    tracker = KeyframeTracker(StillHandDetector(), max_interval=4)
+
+    labels = {"keyframe": set(), "propagated": set()}
+    for _ in range(12):
+        keyframes = tracker.keyframes
+        results = mirror_results(tracker.process(image))
+        kind = "keyframe" if tracker.keyframes > keyframes else "propagated"
+        labels[kind].update(c.label for h in results.multi_handedness for c in h.classification)
+
+    assert tracker.propagated > 0
+    assert labels == {"keyframe": {"Right"}, "propagated": {"Right"}}
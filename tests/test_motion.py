@@ -0,0 +1,13 @@
+import numpy as np
+
+from motion import match_stroke
+
+# Each circle direction has one template per starting quarter, under the same
+# name; this stroke gives two of them the same LB_Keogh bound
+TIED_CIRCLE = np.array([[1.6, 0, 0], [1.0, 1.3, 0], [-0.4, 1.6, 0], [-1.5, 0.7, 0],
+                        [-1.5, -0.7, 0], [-0.4, -1.6, 0], [1.0, -1.3, 0], [1.6, 0, 0]])
+
+
+def test_tied_template_bounds_do_not_compare_templates():
+    name, distance = match_stroke(TIED_CIRCLE, turning=4.0)
+    assert np.isfinite(distance)
@@ -0,0 +1,314 @@
+"""Preview windows and headless controls.
+
+Every view exposes the same interface to the main loops:
+
+    show(image, results, latency_ms=None, status=None)  hand over a processed frame
+    poll_key()                                          return a pending key code or None
+    close()
+
+``status`` is a controller_status() snapshot. Callers that share the
+controller with another thread take it under their lock and pass it in, so
+drawing and window I/O never hold that lock.
+
+InlineView draws and displays every frame on the calling thread (the
+original behaviour), PreviewRenderer draws the newest frame on its own
+thread at a capped rate, and HeadlessView skips all drawing and window I/O
+and takes its 'q'/'r' commands from signals and stdin instead.
+
+Frames arrive unmirrored (mirroring is applied to the landmarks) and
+belong to the frame source's ring buffer. Views that display them flip or
+copy them into their own reusable buffer before drawing. Headless runs
+never copy the image at all.
+"""
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from profiler import StageProfiler
+
+WINDOW_NAME = "Hand Gesture Video Controller"
+
+
+def display_image(image, mirror, buffer=None):
+    """The frame to draw on: ``image`` flipped (when mirroring) or copied into ``buffer``, never the frame itself"""
+    if mirror:
+        return cv2.flip(image, 1, dst=buffer)
+    if buffer is None or buffer.shape != image.shape:
+        return image.copy()
+    np.copyto(buffer, image)
+    return buffer
+
+
+def controller_status(controller):
+    """Snapshot of the controller state the overlay shows: (playing, ((hand key, active label, fingers), ...)).
+
+    Take it on the thread that updates the controller. The preview thread
+    then draws from plain values while the controller keeps changing.
+    """
+    return controller.playing_video, tuple(
+        (hand.key, hand.gesture.label if hand.fired and hand.gesture is not None and hand.gesture.flag else None,
+         hand.finger_status)
+        for hand in controller.present_hands)
+
+
+class StatusOverlay:
+    """Draws FPS, gesture status, history and finger indicators on frames"""
+
+    def __init__(self, controller, profiler=None, hud=False):
+        self.controller = controller
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.hud = hud
+
+        # Variables for FPS calculation
+        self.previous_time = 0
+
+        # Variables for UI and status tracking
+        self.max_history = 5
+        self.gesture_history = deque(maxlen=self.max_history)
+        self.last_status = "No hand detected"
+        self.status_stability_counter = 0
+        self.stability_threshold = 3
+
+        # MediaPipe drawing helpers, imported only when something is drawn
+        from mediapipe import solutions
+        self.connections = solutions.hands.HAND_CONNECTIONS
+        self.draw_landmarks = solutions.drawing_utils.draw_landmarks
+        self.landmark_style = solutions.drawing_styles.get_default_hand_landmarks_style()
+        self.connection_style = solutions.drawing_styles.get_default_hand_connections_style()
+
+    def draw(self, image, results, latency_ms=None, fps=None, status=None):
+        """Draw the overlay; ``status`` is a controller_status() snapshot (taken now if omitted)"""
+        playing, hands = status if status is not None else controller_status(self.controller)
+
+        # Calculate FPS (unless the caller measured the loop rate itself)
+        current_time = time.time()
+        if fps is None:
+            fps = 1 / (current_time - self.previous_time) if (current_time - self.previous_time) > 0 else 0
+        self.previous_time = current_time
+
+        # Draw FPS on image
+        cv2.putText(image, f"FPS: {int(fps)}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if latency_ms is not None:
+            cv2.putText(image, f"Latency: {latency_ms:.0f} ms", (10, 90),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+        # Draw status text
+        status_text = "No hand detected"
+        status_color = (0, 0, 255)  # Red
+
+        # Check if hand(s) detected
+        if results.multi_hand_landmarks:
+            # Draw landmarks on image with better visibility
+            with self.profiler.stage("draw_landmarks"):
+                for hand_landmarks in results.multi_hand_landmarks:
+                    self.draw_landmarks(
+                        image,
+                        hand_landmarks,
+                        self.connections,
+                        self.landmark_style,
+                        self.connection_style
+                    )
+
+            # Update status text
+            status_text = "Hand detected" if len(results.multi_hand_landmarks) == 1 else "Hands detected"
+            status_color = (0, 255, 0)  # Green
+
+            # Show active gesture - more comprehensive status
+            active_gestures = []
+            if playing:
+                active_gestures.append("Playing")
+            for key, label, _ in hands:
+                if label is not None:
+                    active_gestures.append(f"{key}: {label}" if len(hands) > 1 else label)
+
+            if active_gestures:
+                status_text += " - " + ", ".join(active_gestures)
+
+                # Add to gesture history
+                if active_gestures[0] not in self.gesture_history:
+                    self.gesture_history.append(active_gestures[0])  # Oldest entry drops off
+
+        # Stabilize status display to avoid flickering
+        if status_text == self.last_status:
+            self.status_stability_counter += 1
+        else:
+            self.status_stability_counter = 0
+            self.last_status = status_text
+
+        # Only update displayed status if stable for a few frames
+        if self.status_stability_counter >= self.stability_threshold:
+            displayed_status = status_text
+        else:
+            displayed_status = self.last_status
+
+        # Draw status text
+        cv2.putText(image, displayed_status, (10, image.shape[0] - 20),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+
+        # Draw recent gesture history
+        for i, gesture in enumerate(reversed(self.gesture_history)):
+            cv2.putText(image, gesture, (image.shape[1] - 200, 30 + i * 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+        # Draw finger status indicators for debugging
+        if hands:
+            finger_status = " ".join(fingers or "-" for _, _, fingers in hands)
+            cv2.putText(image, f"Fingers: {finger_status}", (10, 60),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+        # Per-stage timings
+        if self.hud:
+            self.profiler.draw_hud(image)
+
+
+class InlineView:
+    """Draws the overlay and shows the window for every frame"""
+
+    def __init__(self, controller, profiler=None, hud=False, mirror=True):
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.overlay = StatusOverlay(controller, self.profiler, hud)
+        self.mirror = mirror
+        self._display = None
+        self._key = None
+        cv2.namedWindow(WINDOW_NAME)
+
+    def show(self, image, results, latency_ms=None, status=None):
+        """Draw and show a frame; ``status`` is a controller_status() snapshot (taken now if omitted)"""
+        with self.profiler.stage("overlay"):
+            image = self._display = display_image(image, self.mirror, self._display)
+            self.overlay.draw(image, results, latency_ms, status=status)
+        with self.profiler.stage("display"):
+            cv2.imshow(WINDOW_NAME, image)
+            self._key = cv2.waitKey(1) & 0xFF
+
+    def poll_key(self):
+        key, self._key = self._key, None
+        return key
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class PreviewRenderer(threading.Thread):
+    """Renders the newest frame at no more than ``max_fps`` on its own thread.
+
+    ``show()`` only swaps a reference and snapshots the controller status,
+    so the gesture loop never waits on drawing or window I/O. Key presses are queued for the loop to poll, so
+    all Controller changes still happen on the loop's thread. Note that some
+    platforms (macOS) only allow OpenCV windows on the main thread.
+    """
+
+    def __init__(self, controller, max_fps=10.0, profiler=None, hud=False, mirror=True):
+        super().__init__(name="preview", daemon=True)
+        self.interval = 1.0 / max_fps
+        self.mirror = mirror
+        self._display = None
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.overlay = StatusOverlay(controller, self.profiler, hud)
+        self.keys = queue.Queue()
+        self._latest = None
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._submitted = 0
+        self._rate_start = time.perf_counter()
+        self.loop_fps = 0.0
+        self.start()
+
+    def show(self, image, results, latency_ms=None, status=None):
+        # Measure the gesture loop rate here, since the overlay runs slower
+        self._submitted += 1
+        now = time.perf_counter()
+        if now - self._rate_start >= 1.0:
+            self.loop_fps = self._submitted / (now - self._rate_start)
+            self._submitted, self._rate_start = 0, now
+        if status is None:
+            status = controller_status(self.overlay.controller)
+        with self._condition:
+            self._latest = (image, results, latency_ms, status)
+            self._condition.notify()
+
+    def run(self):
+        cv2.namedWindow(WINDOW_NAME)
+        next_frame = time.perf_counter()
+        while True:
+            with self._condition:
+                while self._latest is None and not self._stopping:
+                    self._condition.wait(0.1)
+                if self._stopping:
+                    break
+                frame, self._latest = self._latest, None
+
+            image, results, latency_ms, status = frame
+            with self.profiler.stage("overlay"):
+                image = self._display = display_image(image, self.mirror, self._display)
+                self.overlay.draw(image, results, latency_ms, fps=self.loop_fps, status=status)
+            with self.profiler.stage("display"):
+                cv2.imshow(WINDOW_NAME, image)
+            key = cv2.waitKey(1) & 0xFF
+            if key != 0xFF:
+                self.keys.put(key)
+
+            # Cap the preview rate; pump window events while waiting
+            next_frame += self.interval
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                key = cv2.waitKey(max(1, int(delay * 1000))) & 0xFF
+                if key != 0xFF:
+                    self.keys.put(key)
+            else:
+                next_frame = time.perf_counter()
+        cv2.destroyAllWindows()
+
+    def poll_key(self):
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.join(timeout=1.0)
+
+
+class HeadlessView:
+    """No drawing or windows; 'q'/'r' come from signals and stdin.
+
+    SIGINT/SIGTERM quit, SIGUSR1 resets the controller (POSIX), and typing
+    q or r followed by Enter on stdin does the same.
+    """
+
+    def __init__(self):
+        self.keys = queue.Queue()
+        signal.signal(signal.SIGINT, lambda *_: self.keys.put(ord('q')))
+        signal.signal(signal.SIGTERM, lambda *_: self.keys.put(ord('q')))
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda *_: self.keys.put(ord('r')))
+        if sys.stdin is not None and sys.stdin.isatty():
+            threading.Thread(target=self._read_stdin, name="stdin", daemon=True).start()
+
+    def _read_stdin(self):
+        for line in sys.stdin:
+            command = line.strip().lower()
+            if command:
+                self.keys.put(ord(command[0]))
+
+    def show(self, image, results, latency_ms=None, status=None):
+        pass
+
+    def poll_key(self):
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)